@@ -1,17 +1,24 @@
 from src.web.config import app
 from flask_socketio import SocketIO
-from flask import request, jsonify, send_from_directory, render_template
+from flask import request, jsonify, send_from_directory, render_template, Response
 from flask_cors import CORS
 import logging
 import time
 from pathlib import Path
-import cv2
 import uuid
 import os
+import base64
 
 from src.web.utils import FileHandler
-from src.detection_and_tracking.detector import YOLODetector
-from src.web.tasks import process_video, celery
+from src.web.detections_store import iter_frames, read_frames, read_names
+from src.web.result_cache import ResultCache
+from src.web.batching import BatchInferenceServer, ServerBusyError, InferenceTimeoutError
+from src.detection_and_tracking.model_pool import model_registry
+from src.detection_and_tracking.adaptive import MODELS
+from src.detection_and_tracking.tiling import Tiler
+from src.detection_and_tracking.backends import PRECISIONS
+from src.web.tasks import process_video, process_video_parallel, celery, job_registry
+from src.web.jobs import FINAL_FAILURE_STATES, file_digest
 from src.web.socket_handler import socketio, active_streams, WebcamStream
 
 # Configure logging
@@ -20,7 +27,66 @@ logger = logging.getLogger(__name__)
 
 # Initialize components
 file_handler = FileHandler()
-detector = YOLODetector()
+detector = model_registry.acquire()  # Held for the lifetime of the app
+inference_server = BatchInferenceServer(
+    detector,
+    max_batch_size=app.config['INFERENCE_MAX_BATCH_SIZE'],
+    max_wait_ms=app.config['INFERENCE_MAX_WAIT_MS'],
+    max_queue_size=app.config['INFERENCE_MAX_QUEUE_SIZE'],
+    timeout=app.config['INFERENCE_TIMEOUT']
+)
+
+result_cache = ResultCache(
+    max_bytes=app.config['RESULT_CACHE_MAX_BYTES'],
+    disk_dir=app.config['RESULT_CACHE_DIR'],
+    disk_max_bytes=app.config['RESULT_CACHE_DISK_MAX_BYTES']
+)
+
+# Ways the image endpoint can return its result
+IMAGE_OUTPUT_MODES = ('url', 'json', 'inline', 'jpeg')
+
+def result_settings() -> dict:
+    """Detector settings that change image results, part of every cache key."""
+    return {
+        'model': detector.model_name,
+        'backend': detector.backend,
+        'precision': detector.precision,
+        'tracker': detector.tracker,
+        'tiling': detector.tiler.to_dict() if detector.tiler is not None else None,
+        'trajectory_length': detector.trajectory_manager.max_points,
+        'fade_steps': detector.trajectory_manager.fade_steps
+    }
+
+def claim_video_job(file_path: str, params: dict, task_id: str):
+    """
+    Register a video job under its content hash and parameters.
+    
+    Returns the ID of an existing job for the same video and parameters that
+    is queued, running or completed, or None if ``task_id`` should run it,
+    together with the job key that was claimed for ``task_id``. Without
+    Redis, every upload gets a job of its own and the key is None.
+    """
+    try:
+        registry = job_registry()
+        job_key = registry.job_key(file_digest(file_path), params)
+        existing_id = registry.claim(job_key, task_id)
+        if existing_id is None:
+            return None, job_key
+        if process_video.AsyncResult(existing_id).state in FINAL_FAILURE_STATES:
+            registry.replace(job_key, task_id)
+            return None, job_key
+        logger.info(f"Attaching duplicate upload to task {existing_id}")
+        return existing_id, None
+    except Exception as e:
+        logger.warning(f"Job deduplication unavailable: {e}")
+        return None, None
+
+def release_video_job(job_key: str, task_id: str):
+    """Drop the claim of a job whose task was never enqueued."""
+    try:
+        job_registry().release(job_key, task_id)
+    except Exception as e:
+        logger.warning(f"Could not release job {job_key}: {e}")
 
 # Initialize SocketIO with Flask app
 socketio.init_app(app, 
@@ -51,6 +117,14 @@ def health_check():
         }
     })
 
+@app.route('/api/v1/cache', methods=['GET'])
+def cache_stats():
+    """Hit/miss metrics of the image result cache."""
+    return jsonify({
+        "success": True,
+        "data": result_cache.stats()
+    })
+
 @app.route('/api/v1/detect/image', methods=['POST'])
 def process_image():
     """Process uploaded image and return detections."""
@@ -90,32 +164,75 @@ def process_image():
         # Get parameters
         conf_threshold = float(request.form.get('conf_threshold', 0.5))
         display_width = int(request.form.get('display_width', 640))
+        output = request.form.get('output', 'url').lower()
+        save_upload = request.form.get('save_upload', 'false').lower() == 'true'
         
-        # Save uploaded file
-        start_time = time.time()
-        file_path, filename = file_handler.save_upload(file, prefix='img')
+        if output not in IMAGE_OUTPUT_MODES:
+            return jsonify({
+                "success": False,
+                "error": {
+                    "code": "invalid_parameter",
+                    "message": f"output must be one of: {', '.join(IMAGE_OUTPUT_MODES)}"
+                }
+            }), 400
         
-        # Read and process image
-        image = cv2.imread(file_path)
+        # Decode the upload in memory; only keep it on disk if asked to
+        start_time = time.time()
+        image = file_handler.decode_upload(file)
         if image is None:
             raise ValueError("Could not read uploaded image")
+        if save_upload:
+            _, filename = file_handler.save_upload(file, prefix='img')
+        else:
+            filename = file_handler.unique_filename(file, prefix='img')
             
-        # Detect objects
-        results = detector.detect_and_track(image, conf_threshold)
+        # Identical pixels with identical settings give identical results
+        cache_key = result_cache.key(image, {**result_settings(), 'conf_threshold': conf_threshold})
+        entry = result_cache.get(cache_key)
+        cached = entry is not None and (output == 'json' or entry.get('jpeg') is not None)
+        
+        if not cached:
+            # Detect objects, batched together with concurrent requests
+            try:
+                detections = inference_server.submit(image, conf_threshold)
+            except (ServerBusyError, InferenceTimeoutError) as e:
+                return jsonify({
+                    "success": False,
+                    "error": {
+                        "code": "server_busy",
+                        "message": str(e)
+                    }
+                }), 503
+            
+            # Track in a session of its own so no tracker state is shared
+            session = detector.create_session()
+            results = session.track(detections, image)
+            entry = {"detections": results.to_list(), "jpeg": None}
+            
+            # Draw results only when the caller wants the annotated image
+            if output != 'json':
+                image_with_results = session.draw_results(image, results, in_place=True)
+                entry["jpeg"] = file_handler.encode_jpeg(image_with_results)
+            result_cache.put(cache_key, entry)
+        
+        data = {"detections": entry["detections"], "cached": cached}
         
-        # Draw results and save
-        image_with_results = detector.draw_results(image, results)
-        result_url = file_handler.save_result(image_with_results, filename)
+        if output == 'url':
+            data["processed_image_url"] = file_handler.save_result_jpeg(entry["jpeg"], filename)
+        elif output == 'inline':
+            data["processed_image"] = f"data:image/jpeg;base64,{base64.b64encode(entry['jpeg']).decode('utf-8')}"
+        elif output == 'jpeg':
+            return Response(entry["jpeg"], mimetype='image/jpeg', headers={
+                'X-Detections-Count': str(len(entry["detections"])),
+                'X-Processing-Time': f"{time.time() - start_time:.4f}",
+                'X-Cache': 'HIT' if cached else 'MISS'
+            })
         
-        processing_time = time.time() - start_time
+        data["processing_time"] = time.time() - start_time
         
         return jsonify({
             "success": True,
-            "data": {
-                "detections": results,
-                "processed_image_url": result_url,
-                "processing_time": processing_time
-            }
+            "data": data
         })
         
     except Exception as e:
@@ -168,6 +285,15 @@ def process_video_file():
         conf_threshold = float(request.form.get('conf_threshold', 0.5))
         display_width = int(request.form.get('display_width', 640))
         save_output = request.form.get('save_output', 'false').lower() == 'true'
+        segments = int(request.form.get('segments', 1))
+        if segments < 1:
+            raise ValueError("segments must be positive")
+        detect_interval = int(request.form.get('detect_interval', 1))
+        if detect_interval < 1:
+            raise ValueError("detect_interval must be positive")
+        # Workers run in other processes, so pass the configured tiling along
+        tiling = detector.tiler.to_dict() if detector.tiler is not None else None
+        precision = detector.precision
         
         # Save uploaded file
         file_path, filename = file_handler.save_upload(file, prefix='video')
@@ -176,18 +302,69 @@ def process_video_file():
         if not os.path.exists(file_path):
             raise ValueError(f"Saved file not found at {file_path}")
             
-        # Start processing task
-        task = process_video.delay(
-            str(file_path),  # Convert Path to string
-            conf_threshold=conf_threshold,
-            display_width=display_width,
-            save_output=save_output
-        )
+        # Identical uploads with identical parameters share one job
+        params = {
+            'conf_threshold': conf_threshold,
+            'save_output': save_output,
+            'segments': segments,
+            'detect_interval': detect_interval,
+            'tiling': tiling,
+            'precision': precision,
+            'model': detector.model_name,
+            'tracker': detector.tracker
+        }
+        task_id = str(uuid.uuid4())
+        existing_id, job_key = claim_video_job(file_path, params, task_id)
+        if existing_id is not None:
+            os.remove(file_path)
+            return jsonify({
+                "success": True,
+                "data": {
+                    "task_id": existing_id,
+                    "deduplicated": True
+                }
+            })
+            
+        # Start processing task, split across workers for segments > 1
+        try:
+            if segments > 1:
+                task = process_video_parallel.apply_async(
+                    args=(str(file_path),),
+                    kwargs=dict(
+                        conf_threshold=conf_threshold,
+                        display_width=display_width,
+                        save_output=save_output,
+                        segments=segments,
+                        detect_interval=detect_interval,
+                        tiling=tiling,
+                        precision=precision
+                    ),
+                    task_id=task_id
+                )
+            else:
+                task = process_video.apply_async(
+                    args=(str(file_path),),  # Convert Path to string
+                    kwargs=dict(
+                        conf_threshold=conf_threshold,
+                        display_width=display_width,
+                        save_output=save_output,
+                        detect_interval=detect_interval,
+                        tiling=tiling,
+                        precision=precision
+                    ),
+                    task_id=task_id
+                )
+        except Exception:
+            # Duplicates must not attach to a task that was never enqueued
+            if job_key is not None:
+                release_video_job(job_key, task_id)
+            raise
         
         return jsonify({
             "success": True,
             "data": {
-                "task_id": task.id
+                "task_id": task.id,
+                "deduplicated": False
             }
         })
         
@@ -219,11 +396,21 @@ def get_video_status(task_id):
                 'status': 'pending',
                 'progress': 0
             }
-        elif task.state == 'PROGRESS':
+        elif task.state in ('STARTED', 'PROGRESS'):
+            # Parallel jobs stay STARTED while their segments are running
+            info = task.info if isinstance(task.info, dict) else {}
             response = {
                 'status': 'processing',
-                'progress': task.info.get('progress', 0)
+                'progress': info.get('progress', 0)
             }
+            # Optional details published by the progress reporter
+            for key in ('frames_processed', 'total_frames', 'fps', 'eta', 'detections'):
+                if key in info:
+                    response[key] = info[key]
+            # Streamed output can already be played or read while the job runs
+            for key in ('output_video_url', 'detections_url'):
+                if info.get(key):
+                    response[key] = info[key]
         elif task.state == 'SUCCESS':
             response = {
                 'status': 'completed',
@@ -251,23 +438,115 @@ def get_video_status(task_id):
             }
         }), 500
 
+@app.route('/api/v1/detect/video/<task_id>/detections', methods=['GET'])
+def get_video_detections(task_id):
+    """Page or stream the per-frame detections of a video job by frame range."""
+    try:
+        try:
+            start = int(request.args.get('start', 0))
+            limit = int(request.args.get('limit', 100))
+            end = request.args.get('end')
+            end = int(end) if end is not None else None
+        except ValueError:
+            raise ValueError("start, end and limit must be integers")
+        output_format = request.args.get('format', 'json').lower()
+        
+        if start < 0 or (end is not None and end < start) or not 1 <= limit <= 1000 \
+                or output_format not in ('json', 'ndjson'):
+            return jsonify({
+                "success": False,
+                "error": {
+                    "code": "invalid_parameters",
+                    "message": "Expected start >= 0, end >= start, limit in [1, 1000] "
+                               "and format json or ndjson"
+                }
+            }), 400
+        
+        path = Path(file_handler.detections_result_path(task_id)[0])
+        if not path.exists():
+            return jsonify({
+                "success": False,
+                "error": {
+                    "code": "not_found",
+                    "message": f"No detections for task {task_id}"
+                }
+            }), 404
+        
+        task = process_video.AsyncResult(task_id)
+        complete = task.state in ('SUCCESS', 'FAILURE')
+        
+        if output_format == 'ndjson':
+            # Stream the names header and the whole range without buffering it
+            def generate():
+                with open(path, 'rb') as f:
+                    yield f.readline()
+                yield from iter_frames(path, start, end)
+            return Response(generate(), mimetype='application/x-ndjson')
+        
+        if end is not None:
+            limit = min(limit, end - start)
+        frames, next_frame = read_frames(path, start, limit) if limit else ([], start)
+        return jsonify({
+            "success": True,
+            "data": {
+                "names": read_names(path),
+                "frames": frames,
+                "next": next_frame,
+                "complete": complete
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Error reading video detections: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": {
+                "code": "detections_error",
+                "message": str(e)
+            }
+        }), 500
+
 @app.route('/api/v1/stream/start', methods=['POST'])
 def start_stream():
     """Start webcam stream."""
     try:
         # Get parameters
         conf_threshold = float(request.form.get('conf_threshold', 0.5))
+        transport = request.form.get('transport', 'base64').lower()
+        motion_sensitivity = request.form.get('motion_sensitivity')
+        if motion_sensitivity is not None:
+            motion_sensitivity = float(motion_sensitivity)
+        target_fps = request.form.get('target_fps')
+        if target_fps is not None:
+            target_fps = float(target_fps)
+            if target_fps <= 0:
+                raise ValueError("target_fps must be positive")
+        model = request.form.get('model', detector.model_name)
+        if model not in MODELS:
+            raise ValueError(f"model must be one of: {', '.join(MODELS)}")
         
         # Generate stream ID
         stream_id = str(uuid.uuid4())
         
-        # Create and start stream
-        stream = WebcamStream(
-            stream_id=stream_id,
-            detector=detector,
-            conf_threshold=conf_threshold
-        )
-        stream.start()
+        # Lease a detector with its own tracker on a shared model, so the
+        # registry keeps the model loaded while the stream runs on it
+        session = model_registry.acquire(model, detector.tracker, precision=detector.precision)
+        session.tiler = detector.tiler
+        session.trajectory_manager.max_points = detector.trajectory_manager.max_points
+        session.trajectory_manager.fade_steps = detector.trajectory_manager.fade_steps
+        try:
+            stream = WebcamStream(
+                stream_id=stream_id,
+                detector=session,
+                conf_threshold=conf_threshold,
+                transport=transport,
+                motion_sensitivity=motion_sensitivity,
+                target_fps=target_fps
+            )
+            stream.start()
+        except Exception:
+            model_registry.release(session)
+            raise
         
         # Store stream
         active_streams[stream_id] = stream
@@ -276,7 +555,11 @@ def start_stream():
             "success": True,
             "data": {
                 "stream_id": stream_id,
-                "stream_url": f"ws://{request.host}/stream"
+                "stream_url": f"ws://{request.host}/stream",
+                "transport": transport,
+                "model": model,
+                "motion_sensitivity": motion_sensitivity,
+                "adaptive": stream.operating_point
             }
         })
         
@@ -301,12 +584,15 @@ def stop_stream(stream_id):
         stream = active_streams[stream_id]
         stream.stop()
         del active_streams[stream_id]
+        # stop() returns once the stream thread is done with the detector
+        model_registry.release(stream.detector)
         
         return jsonify({
             "success": True,
             "data": {
                 "stream_id": stream_id,
-                "status": "stopped"
+                "status": "stopped",
+                "skip_ratio": stream.skip_ratio
             }
         })
         
@@ -331,7 +617,15 @@ def get_config():
             'conf_threshold': detector.conf_threshold,  # Default values
             'trajectory_length': detector.trajectory_manager.max_points,
             'fade_steps': detector.trajectory_manager.fade_steps,
-            'display_width': 640  # Default display width
+            'display_width': 640,  # Default display width
+            'tiling': detector.tiler.to_dict() if detector.tiler is not None else None,
+            'backend': detector.backend,
+            'precision': detector.precision,
+            'imgsz': detector.imgsz,
+            # Operating point of each stream that adapts to load
+            'adaptive_streams': {stream_id: stream.operating_point
+                                 for stream_id, stream in list(active_streams.items())
+                                 if stream.adaptive is not None}
         }
         
         return jsonify({
@@ -356,6 +650,7 @@ def update_config():
         data = request.get_json()
         if not data:
             raise ValueError("No configuration data provided")
+        settings = result_settings()
             
         # Only allow updating certain parameters
         if 'conf_threshold' in data:
@@ -376,6 +671,26 @@ def update_config():
             if fade_steps < 0:
                 raise ValueError("fade_steps cannot be negative")
             detector.trajectory_manager.fade_steps = fade_steps
+        
+        if 'tiling' in data:
+            # null turns tiled inference off, an object updates its settings
+            if data['tiling'] is None:
+                detector.tiler = None
+            else:
+                current = detector.tiler.to_dict() if detector.tiler is not None else {}
+                detector.tiler = Tiler.from_dict({**current, **data['tiling']})
+        
+        if 'precision' in data:
+            # Swap the weights of the app's detector; new sessions, streams and
+            # video jobs pick up the new precision
+            precision = data['precision']
+            if precision not in PRECISIONS:
+                raise ValueError(f"precision must be one of: {', '.join(PRECISIONS)}")
+            model_registry.switch_precision(detector, precision)
+        
+        # Cached results were produced with the old settings
+        if result_settings() != settings:
+            result_cache.clear()
             
         # Return updated config
         return get_config()
@@ -427,6 +742,12 @@ def cleanup_files():
                 file.unlink()
             except Exception as e:
                 logger.error(f"Error deleting file {file}: {e}")
+        
+        # Finished jobs can no longer be reused once their results are gone
+        try:
+            job_registry().forget_all()
+        except Exception as e:
+            logger.error(f"Error clearing job registry: {e}")
 
         return jsonify({
             "success": True,
@@ -0,0 +1,234 @@
+import argparse
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from src.detection_and_tracking.backends import BACKENDS, IMAGE_EXTENSIONS, PRECISIONS, resolve_backend
+from src.detection_and_tracking.detections import Detections
+from src.detection_and_tracking.detector import YOLODetector
+from src.utils.segments import box_iou
+from src.utils.video_capture import VideoCapture
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def read_frames(path: str, count: int) -> List[np.ndarray]:
+    """Read the first ``count`` frames of a video."""
+    frames = []
+    with VideoCapture(path) as video:
+        while len(frames) < count:
+            success, frame = video.read_frame()
+            if not success:
+                break
+            frames.append(frame)
+    if not frames:
+        raise ValueError(f"Could not read frames from {path}")
+    return frames
+
+def read_images(folder: str, count: int) -> List[np.ndarray]:
+    """Read up to ``count`` images from a folder, in name order."""
+    paths = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    frames = [image for image in (cv2.imread(str(p)) for p in paths[:count]) if image is not None]
+    if not frames:
+        raise ValueError(f"No images found in {folder}")
+    return frames
+
+def average_precision(reference: List[Detections], candidate: List[Detections],
+                      iou_threshold: float = 0.5) -> float:
+    """
+    mAP of the candidate, taking the reference detections as ground truth.
+
+    Per class, candidate boxes are ranked by confidence and matched to
+    unmatched reference boxes of the same frame; AP is the area under the
+    interpolated precision/recall curve, averaged over reference classes.
+    """
+    classes = sorted({int(c) for d in reference for c in d.cls})
+    if not classes:
+        return 1.0
+
+    aps = []
+    for cls in classes:
+        truths = [d.xyxy[d.cls == cls] for d in reference]
+        used = [np.zeros(len(t), dtype=bool) for t in truths]
+        predictions = sorted(
+            ((float(conf), frame, box)
+             for frame, d in enumerate(candidate)
+             for box, conf in zip(d.xyxy[d.cls == cls], d.conf[d.cls == cls])),
+            key=lambda p: -p[0])
+
+        hits = np.zeros(len(predictions))
+        for i, (_, frame, box) in enumerate(predictions):
+            if not len(truths[frame]):
+                continue
+            iou = box_iou(box[None], truths[frame])[0]
+            iou[used[frame]] = 0
+            best = int(np.argmax(iou))
+            if iou[best] >= iou_threshold:
+                used[frame][best] = True
+                hits[i] = 1
+
+        total = sum(len(t) for t in truths)
+        true_positives = np.cumsum(hits)
+        recall = np.concatenate([[0], true_positives / total, [1]])
+        precision = np.concatenate([[1], true_positives / np.arange(1, len(hits) + 1), [0]])
+        # Make precision monotonically decreasing, then integrate over recall
+        precision = np.maximum.accumulate(precision[::-1])[::-1]
+        aps.append(float(np.sum(np.diff(recall) * precision[1:])))
+    return float(np.mean(aps))
+
+def compare_detections(reference: List[Detections], candidate: List[Detections],
+                       iou_threshold: float = 0.5) -> Dict:
+    """
+    Agreement of a candidate's detections with a reference run.
+
+    Boxes are matched greedily per frame by IoU within the same class.
+
+    Returns:
+        Dict: box recall and box precision of the candidate against the
+              reference, mean IoU and mean confidence difference of matched boxes, and
+              mAP@0.5 with the reference as ground truth
+    """
+    matched, ious, conf_deltas = 0, [], []
+    total_reference = sum(len(d) for d in reference)
+    total_candidate = sum(len(d) for d in candidate)
+    for ref, cand in zip(reference, candidate):
+        if not len(ref) or not len(cand):
+            continue
+        iou = box_iou(ref.xyxy, cand.xyxy)
+        iou[ref.cls[:, None] != cand.cls[None, :]] = 0
+        while True:
+            i, j = np.unravel_index(np.argmax(iou), iou.shape)
+            if iou[i, j] < iou_threshold:
+                break
+            matched += 1
+            ious.append(float(iou[i, j]))
+            conf_deltas.append(float(cand.conf[j] - ref.conf[i]))
+            iou[i, :] = 0
+            iou[:, j] = 0
+
+    return {
+        'box_recall': matched / total_reference if total_reference else 1.0,
+        'box_precision': matched / total_candidate if total_candidate else 1.0,
+        'mean_iou': float(np.mean(ious)) if ious else None,
+        'mean_conf_delta': float(np.mean(conf_deltas)) if conf_deltas else None,
+        'map50': average_precision(reference, candidate, iou_threshold)
+    }
+
+def benchmark(detector: YOLODetector, frames: List[np.ndarray], batch_size: int,
+              conf_threshold: float, runs: int) -> Dict:
+    """Time untracked batched inference over the frames."""
+    # Warm up caches and lazily created sessions
+    detector.predict(frames[:batch_size], conf_threshold)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        detections = []
+        for i in range(0, len(frames), batch_size):
+            detections.extend(detector.predict(frames[i:i + batch_size], conf_threshold))
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    return {
+        'ms_per_frame': best / len(frames) * 1000,
+        'fps': len(frames) / best,
+        'detections': detections
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare inference backends and precisions')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--video', type=str, default='demo_files/demo_video.mp4',
+                      help='Video whose frames are used as input')
+    source.add_argument('--images', type=str, default=None,
+                      help='Folder of images used as input instead of a video')
+    parser.add_argument('--model', type=str, default='yolov8n.pt',
+                      help='YOLO model size to use')
+    parser.add_argument('--backends', type=str, nargs='+', default=list(BACKENDS),
+                      choices=list(BACKENDS),
+                      help='Backends to compare')
+    parser.add_argument('--precisions', type=str, nargs='+', default=['fp32'],
+                      choices=list(PRECISIONS),
+                      help='Precisions to compare; the first backend and precision '
+                           'is the accuracy reference')
+    parser.add_argument('--calibration', type=str, default=None, metavar='DIR',
+                      help='Image folder for static INT8 calibration '
+                           '(default: dynamic quantization)')
+    parser.add_argument('--frames', type=int, default=64,
+                      help='Number of frames to run')
+    parser.add_argument('--batch-size', type=int, default=8,
+                      help='Frames per forward pass')
+    parser.add_argument('--threads', type=int, default=None,
+                      help='Intra-op threads of each backend')
+    parser.add_argument('--runs', type=int, default=3,
+                      help='Timed passes over the frames; the fastest is reported')
+    parser.add_argument('--conf', type=float, default=0.25,
+                      help='Confidence threshold for detections (0-1)')
+    parser.add_argument('--json', type=str, default=None,
+                      help='Also write the report to this file')
+    args = parser.parse_args()
+
+    if args.images:
+        frames = read_images(args.images, args.frames)
+        logger.info(f"Benchmarking {args.model} on {len(frames)} images from {args.images}")
+    else:
+        frames = read_frames(args.video, args.frames)
+        logger.info(f"Benchmarking {args.model} on {len(frames)} frames of {args.video}")
+
+    # int8 always runs on ONNX Runtime, so drop combinations that resolve to the same run
+    configs = []
+    for precision in args.precisions:
+        for backend in args.backends:
+            try:
+                config = (resolve_backend(backend, precision), precision)
+            except ValueError:
+                continue
+            if config not in configs:
+                configs.append(config)
+
+    report, reference = [], None
+    for backend, precision in configs:
+        try:
+            start = time.perf_counter()
+            detector = YOLODetector(model_size=args.model, backend=backend, threads=args.threads,
+                                    precision=precision, calibration_dir=args.calibration)
+            load_time = time.perf_counter() - start
+            result = benchmark(detector, frames, args.batch_size, args.conf, args.runs)
+        except Exception as e:
+            logger.error(f"Skipping {backend} {precision}: {e}")
+            continue
+
+        detections = result.pop('detections')
+        if reference is None:
+            reference = detections
+        report.append({
+            'backend': backend,
+            'precision': precision,
+            'load_s': load_time,
+            **result,
+            **compare_detections(reference, detections)
+        })
+
+    if report:
+        print(f"\nAccuracy is measured against {report[0]['backend']} {report[0]['precision']}")
+    print(f"\n{'backend':<10} {'precision':<9} {'load s':>8} {'ms/frame':>9} {'fps':>7} "
+          f"{'speedup':>8} {'mAP50':>6} {'box R':>7} {'box P':>7} {'IoU':>6}")
+    for row in report:
+        mean_iou = f"{row['mean_iou']:.3f}" if row['mean_iou'] is not None else '-'
+        speedup = report[0]['ms_per_frame'] / row['ms_per_frame']
+        print(f"{row['backend']:<10} {row['precision']:<9} {row['load_s']:>8.2f} "
+              f"{row['ms_per_frame']:>9.2f} {row['fps']:>7.1f} {speedup:>7.2f}x "
+              f"{row['map50']:>6.3f} {row['box_recall']:>7.3f} {row['box_precision']:>7.3f} {mean_iou:>6}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,12 @@ import cv2
 import logging
 import argparse
 from src.detection_and_tracking.detector import YOLODetector
+from src.detection_and_tracking.backends import BACKENDS, PRECISIONS, resolve_backend
 from src.utils.processor import process_live_video, process_video_file, process_image
+from src.utils.headless import HeadlessOutput
+from src.utils.video_capture import CAPTURE_BACKENDS
+from src.detection_and_tracking.motion import MotionGate
+from src.detection_and_tracking.tiling import Tiler
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -38,11 +43,101 @@ def main():
                    help='Number of steps for trajectory fade effect')
     
     
+    # Inference parameters
+    parser.add_argument('--backend', type=str, default='torch', choices=list(BACKENDS),
+                      help='Inference backend; onnx and openvino export the model once '
+                           'and run it on CPU')
+    parser.add_argument('--threads', type=int, default=None,
+                      help='Intra-op threads of the inference backend')
+    parser.add_argument('--precision', type=str, default='fp32', choices=list(PRECISIONS),
+                      help='Model weights; int8 quantizes the model once and runs it '
+                           'on ONNX Runtime')
+    parser.add_argument('--calibration', type=str, default=None, metavar='DIR',
+                      help='Image folder for static INT8 calibration '
+                           '(default: dynamic quantization)')
+    parser.add_argument('--batch-size', type=int, default=8,
+                      help='Number of video file frames to run through the model at once')
+    parser.add_argument('--detect-interval', type=int, default=1,
+                      help='Run the model on every N-th frame only and predict boxes '
+                           'from the tracker in between')
+    parser.add_argument('--motion-sensitivity', type=float, default=None,
+                      help='Skip inference while nothing moves; 0-1, higher reacts to '
+                           'smaller changes (default: off)')
+    
+    # Decoding
+    parser.add_argument('--prefetch', type=int, default=4,
+                      help='Frames decoded ahead on a background thread (0 to decode inline)')
+    parser.add_argument('--capture-backend', type=str, default='any',
+                      choices=list(CAPTURE_BACKENDS),
+                      help='OpenCV capture backend')
+    parser.add_argument('--decode-threads', type=int, default=None,
+                      help='Number of decoder threads')
+    parser.add_argument('--hw-decode', action='store_true',
+                      help='Use hardware-accelerated decoding if available')
+    parser.add_argument('--decode-width', type=int, default=None,
+                      help='Decode at a reduced width, keeping the aspect ratio')
+    
+    # Tiled / region-of-interest inference
+    parser.add_argument('--tiled', action='store_true',
+                      help='Run the model on overlapping full-resolution tiles for small objects')
+    parser.add_argument('--tile-size', type=int, default=640,
+                      help='Tile side length in source pixels')
+    parser.add_argument('--tile-overlap', type=float, default=0.2,
+                      help='Fraction of each tile shared with its neighbours')
+    parser.add_argument('--roi', type=str, action='append', default=None, metavar='X1,Y1,X2,Y2',
+                      help='Only search this region (repeatable); implies tiled inference')
+    
+    # Pipeline configuration
+    parser.add_argument('--pipeline', action='store_true',
+                      help='Run capture, inference and display on separate threads')
+    parser.add_argument('--drop-policy', type=str, default=None,
+                      choices=['block', 'drop_oldest', 'drop_newest'],
+                      help='What to do when a pipeline queue is full '
+                           '(default: drop_oldest for webcam, block for video)')
+    
     # Display parameters
     parser.add_argument('--display-width', type=int, default=640,
                       help='Width of each frame in the display')
     
+    # Headless mode
+    parser.add_argument('--headless', action='store_true',
+                      help='Run without a display and write results to files instead')
+    parser.add_argument('--detections', type=str, default=None,
+                      help='Headless: write detections as NDJSON to this file ("-" for stdout)')
+    parser.add_argument('--annotated', type=str, default=None,
+                      help='Headless: write the annotated video (or image) to this file')
+    
     args = parser.parse_args()
+    if (args.detections or args.annotated) and not args.headless:
+        parser.error('--detections and --annotated require --headless')
+    if args.headless and not (args.detections or args.annotated):
+        parser.error('--headless requires --detections and/or --annotated')
+    
+    if args.calibration and args.precision != 'int8':
+        parser.error('--calibration requires --precision int8')
+    try:
+        resolve_backend(args.backend, args.precision)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    output = HeadlessOutput(args.detections, args.annotated) if args.headless else None
+    tiler = None
+    if args.tiled or args.roi:
+        try:
+            rois = [[int(v) for v in roi.split(',')] for roi in args.roi or []]
+            if any(len(roi) != 4 for roi in rois):
+                raise ValueError('--roi must be four comma-separated integers')
+            tiler = Tiler(tile_size=args.tile_size, overlap=args.tile_overlap, rois=rois)
+        except ValueError as e:
+            parser.error(f'Invalid tiling options: {e}')
+    capture_options = {
+        'prefetch': args.prefetch,
+        'backend': args.capture_backend,
+        'decode_threads': args.decode_threads,
+        'hw_acceleration': args.hw_decode,
+        'decode_width': args.decode_width
+    }
+    motion_gate = MotionGate(args.motion_sensitivity) if args.motion_sensitivity is not None else None
 
     try:
         # Initialize detector with specified model and tracker
@@ -52,23 +147,50 @@ def main():
             trajectory_length=args.trajectory_length,
             fade_steps=args.fade_steps,
             conf_threshold=args.conf,
-            display_width=args.display_width
+            display_width=args.display_width,
+            tiler=tiler,
+            backend=args.backend,
+            threads=args.threads,
+            precision=args.precision,
+            calibration_dir=args.calibration
         )
         
+        if output is not None:
+            output.open()
+        
         if args.webcam:
             process_live_video(detector, conf_threshold=args.conf, 
-                             display_width=args.display_width)
+                             display_width=args.display_width,
+                             pipelined=args.pipeline,
+                             drop_policy=args.drop_policy or 'drop_oldest',
+                             output=output,
+                             detect_interval=args.detect_interval,
+                             motion_gate=motion_gate,
+                             capture_options=capture_options)
         elif args.video:
             process_video_file(detector, args.video, conf_threshold=args.conf,
-                             display_width=args.display_width)
+                             display_width=args.display_width,
+                             batch_size=args.batch_size,
+                             pipelined=args.pipeline,
+                             drop_policy=args.drop_policy or 'block',
+                             output=output,
+                             detect_interval=args.detect_interval,
+                             motion_gate=motion_gate,
+                             capture_options=capture_options)
         elif args.image:
             process_image(detector, args.image, conf_threshold=args.conf,
-                        display_width=args.display_width)
+                        display_width=args.display_width,
+                        output=output)
             
+    except KeyboardInterrupt:
+        logger.info("Interrupted")
     except Exception as e:
         logger.error(f"Error: {e}")
     finally:
-        cv2.destroyAllWindows()
+        if output is not None:
+            output.close()
+        else:
+            cv2.destroyAllWindows()
         logger.info("Application terminated")
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+import logging
+from pathlib import Path
+from threading import Thread
+from typing import Dict, List, Optional, Tuple
+
+from .detector import YOLODetector
+from .model_pool import ModelRegistry, model_registry
+
+logger = logging.getLogger(__name__)
+
+# Inference input sizes tried under load, multiples of the 32 px stride
+IMAGE_SIZES = (640, 512, 416, 320)
+
+# GFLOPs of the YOLOv8 detection family at 640 px, from the Ultralytics model card
+MODEL_GFLOPS = {
+    'yolov8n.pt': 8.7,
+    'yolov8s.pt': 28.6,
+    'yolov8m.pt': 78.9,
+    'yolov8l.pt': 165.2,
+    'yolov8x.pt': 257.8
+}
+
+# Models an adaptive detector can start from, smallest first
+MODELS = tuple(MODEL_GFLOPS)
+
+def operating_points(model_size: str, imgsz: int = 640,
+                     image_sizes: Tuple[int, ...] = IMAGE_SIZES,
+                     cascade: bool = True) -> List[Tuple[str, int]]:
+    """
+    Ladder of (model, input size) points, from the given one down to the cheapest.
+
+    Points are ordered by estimated cost, the model's GFLOPs scaled by the
+    input area, so every step down is cheaper than the one before it. Points
+    that would return to a larger model further down are left out, so the
+    model only ever shrinks along the ladder. With ``cascade``, smaller
+    models of the YOLOv8 family are part of the ladder; otherwise, and for
+    models outside the family, only the size changes.
+    """
+    sizes = sorted({imgsz, *(size for size in image_sizes if size < imgsz)}, reverse=True)
+    if cascade and model_size in MODEL_GFLOPS:
+        models = [name for name, gflops in MODEL_GFLOPS.items()
+                  if gflops <= MODEL_GFLOPS[model_size]]
+    else:
+        models = [model_size]
+    candidates = sorted(((model, size) for model in models for size in sizes),
+                        key=lambda point: -estimated_cost(*point))
+
+    points, smallest = [], float('inf')
+    for model, size in candidates:
+        gflops = MODEL_GFLOPS.get(model, 0.0)
+        if gflops <= smallest:
+            points.append((model, size))
+            smallest = gflops
+    return points
+
+def estimated_cost(model_size: str, imgsz: int) -> float:
+    """Relative inference cost of a model at an input size."""
+    return MODEL_GFLOPS.get(model_size, 1.0) * (imgsz / 640) ** 2
+
+class AdaptiveController:
+    """
+    Keep a detector within the per-frame latency budget of a target FPS.
+
+    Frame latencies are smoothed with a moving average. When it exceeds
+    the budget, the detector steps one point down the operating point
+    ladder: a smaller input size or a smaller model. When the latency
+    predicted for the next point up fits within ``headroom`` of the budget,
+    it steps back up. After every change the controller waits ``cooldown``
+    frames so the average reflects the new point. A step up that has to be
+    undone shortly after doubles the wait before the next step up, so a
+    borderline load does not make the detector oscillate.
+
+    The detector must be leased from the model registry. Models are loaded
+    on a background thread; the detector keeps running at its current point
+    until the new model is ready, and then moves its lease over to it, so
+    the registry never unloads a model the detector runs. Tracker state is
+    kept across changes, so track IDs survive them.
+    """
+    def __init__(self, detector: YOLODetector, target_fps: float = 15,
+                 image_sizes: Tuple[int, ...] = IMAGE_SIZES, cascade: bool = True,
+                 headroom: float = 0.8, smoothing: float = 0.2, cooldown: int = 15,
+                 registry: Optional[ModelRegistry] = None):
+        """
+        Initialize the controller.
+
+        Args:
+            detector: Detector whose model and input size are adjusted
+            target_fps: Frame rate to sustain; the budget is its frame interval
+            image_sizes: Input sizes to step through
+            cascade: Also step down to smaller YOLOv8 models
+            headroom: Fraction of the budget a step up must fit in
+            smoothing: Weight of the newest sample in the moving average
+            cooldown: Frames to wait after a change before the next one
+            registry: ModelRegistry the detector is leased from, defaults
+                      to the process-wide one
+        """
+        if target_fps <= 0:
+            raise ValueError("target_fps must be positive")
+        self.detector = detector
+        self.target_fps = target_fps
+        self.budget = 1.0 / target_fps
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.cooldown = cooldown
+        self.registry = registry if registry is not None else model_registry
+        self.points = operating_points(detector.model_name, detector.imgsz, image_sizes, cascade)
+        self.level = 0
+        self.latency = None
+        self.changes = 0
+        self._frames_at_level = 0
+        self._last_step = 0  # +1 after a step down, -1 after a step up
+        self._backoff = 1
+        self._loading: Optional[Thread] = None
+        self._loaded: Dict = {}
+
+    @property
+    def model_name(self) -> str:
+        """Model of the current operating point."""
+        return self.points[self.level][0]
+
+    @property
+    def imgsz(self) -> int:
+        """Input size of the current operating point."""
+        return self.points[self.level][1]
+
+    def update(self, latency: float) -> bool:
+        """
+        Record the latency of one processed frame and adjust the detector.
+
+        Call this from the thread that runs the detector, after each frame.
+
+        Args:
+            latency: Seconds spent on the frame
+
+        Returns:
+            bool: True if the operating point changed
+        """
+        self.latency = latency if self.latency is None else (
+            self.smoothing * latency + (1 - self.smoothing) * self.latency)
+        if self._loading is not None:
+            if self._loading.is_alive():
+                return False
+            return self._finish_loading()
+
+        self._frames_at_level += 1
+        if self._frames_at_level < self.cooldown:
+            return False
+
+        # The last step up held up long enough to count as settled
+        if self._last_step < 0 and self._frames_at_level >= 4 * self.cooldown:
+            self._backoff = 1
+
+        if self.latency > self.budget and self.level < len(self.points) - 1:
+            if self._last_step < 0 and self._frames_at_level < 4 * self.cooldown:
+                self._backoff = min(self._backoff * 2, 32)
+            return self._step(self.level + 1)
+
+        if self.level > 0 and self._frames_at_level >= self.cooldown * self._backoff:
+            up = self.points[self.level - 1]
+            predicted = self.latency * estimated_cost(*up) / estimated_cost(*self.points[self.level])
+            if predicted <= self.headroom * self.budget:
+                return self._step(self.level - 1)
+        return False
+
+    def _step(self, level: int) -> bool:
+        """Move to another operating point, loading its model in the background."""
+        model_size = self.points[level][0]
+        if model_size == self.detector.model_name:
+            self._apply(level)
+            return True
+
+        def load():
+            try:
+                self.registry.get_model(model_size, self.detector.precision)
+            except Exception as e:
+                self._loaded['error'] = e
+
+        self._loaded = {'level': level}
+        self._loading = Thread(target=load, name='adaptive-model-load', daemon=True)
+        self._loading.start()
+        return False
+
+    def _finish_loading(self) -> bool:
+        """Switch to a model loaded in the background, or drop it from the ladder."""
+        self._loading = None
+        level = self._loaded['level']
+        if 'error' not in self._loaded:
+            try:
+                self.registry.switch_model(self.detector, self.points[level][0])
+            except Exception as e:
+                self._loaded['error'] = e
+        if 'error' in self._loaded:
+            failed = self.points[level][0]
+            logger.error(f"Could not load {failed} for adaptive inference: {self._loaded['error']}")
+            current = self.points[self.level]
+            self.points = [point for point in self.points if point[0] != failed]
+            self.level = self.points.index(current)
+            self._frames_at_level = 0
+            return False
+
+        self._apply(level)
+        return True
+
+    def _apply(self, level: int):
+        """Point the detector at an operating point whose model it already runs."""
+        self._last_step = 1 if level > self.level else -1
+        self.level = level
+        self.detector.imgsz = self.imgsz
+        self._frames_at_level = 0
+        self.changes += 1
+        logger.info(f"Adaptive inference now runs {Path(self.model_name).stem} at {self.imgsz} px "
+                    f"({self.latency * 1000:.1f} ms/frame, target {self.budget * 1000:.1f} ms)")
+
+    def close(self):
+        """
+        Return the detector to its starting point before it is released.
+
+        Waits for a model still loading in the background, so the registry
+        is not touched after the stream is gone, and moves the detector back
+        onto its starting model so it is pooled under the model it was
+        leased for. Call it once the thread running the detector has stopped.
+        """
+        if self._loading is not None:
+            self._loading.join()
+            self._loading = None
+        model_size, imgsz = self.points[0]
+        self.detector.imgsz = imgsz
+        self.level = 0
+        if self.detector.model_name != model_size:
+            try:
+                self.registry.switch_model(self.detector, model_size)
+            except Exception as e:
+                logger.error(f"Could not restore {model_size} for adaptive inference: {e}")
+
+    def operating_point(self) -> Dict:
+        """Current operating point and latency, for reporting."""
+        return {
+            'model': self.model_name,
+            'imgsz': self.imgsz,
+            'target_fps': self.target_fps,
+            'latency_ms': self.latency * 1000 if self.latency is not None else None,
+            'level': self.level,
+            'levels': len(self.points),
+            'changes': self.changes
+        }
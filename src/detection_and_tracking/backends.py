@@ -0,0 +1,279 @@
+import logging
+import shutil
+from pathlib import Path
+from typing import List, Optional
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+logger = logging.getLogger(__name__)
+
+# Inference backends selectable by name
+BACKENDS = ('torch', 'onnx', 'openvino')
+
+# Weight precisions; int8 runs a quantized ONNX model on ONNX Runtime
+PRECISIONS = ('fp32', 'int8')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+def load_model(model_size: str = "yolov8n.pt", weights_dir: str = "yolo/weights") -> YOLO:
+    """
+    Load YOLO weights from the weights directory, downloading them if needed.
+    
+    Args:
+        model_size (str): Weights file name, e.g. "yolov8n.pt"
+        weights_dir (str): Directory holding downloaded weights
+        
+    Returns:
+        YOLO: Loaded model
+    """
+    # Setup weights directory
+    weights_dir = Path(weights_dir)
+    weights_dir.mkdir(parents=True, exist_ok=True)
+    
+    # Check if model exists in weights directory
+    model_path = weights_dir / model_size
+    if not model_path.exists():
+        logger.info(f"Model not found in {weights_dir}. Downloading...")
+        temp_model = YOLO(model_size)
+        downloaded_path = Path(model_size)
+        if downloaded_path.exists():
+            shutil.move(str(downloaded_path), str(model_path))
+            logger.info(f"Model saved to {model_path}")
+        else:
+            raise FileNotFoundError(f"Downloaded model not found at {downloaded_path}")
+    
+    try:
+        model = YOLO(str(model_path))
+        logger.info(f"Loaded YOLO model from: {model_path}")
+        return model
+    except Exception as e:
+        logger.error(f"Error loading YOLO model: {str(e)}")
+        raise
+
+def artifact_path(model_size: str, backend: str, weights_dir: str = "yolo/weights") -> Path:
+    """
+    Location of a model's exported artifact in the weights directory.
+
+    Matches the names Ultralytics' exporter writes next to the .pt file:
+    ``yolov8n.onnx`` for ONNX and a ``yolov8n_openvino_model`` directory
+    for OpenVINO IR.
+    """
+    stem = Path(model_size).stem
+    weights_dir = Path(weights_dir)
+    if backend == 'onnx':
+        return weights_dir / f"{stem}.onnx"
+    if backend == 'openvino':
+        return weights_dir / f"{stem}_openvino_model"
+    return weights_dir / model_size
+
+def resolve_backend(backend: str, precision: str = 'fp32') -> str:
+    """Backend that actually runs a model of the given precision."""
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}. Options: {', '.join(PRECISIONS)}")
+    if precision == 'int8':
+        if backend == 'openvino':
+            raise ValueError("int8 precision is only supported with the onnx backend")
+        return 'onnx'
+    return backend
+
+def export_model(model_size: str, backend: str, weights_dir: str = "yolo/weights",
+                 imgsz: int = 640) -> Path:
+    """
+    Export PyTorch weights for a backend, reusing a cached export if present.
+
+    Exports use a dynamic batch dimension so batched inference keeps working.
+
+    Returns:
+        Path: Exported artifact
+    """
+    path = artifact_path(model_size, backend, weights_dir)
+    if backend == 'torch' or path.exists():
+        return path
+
+    logger.info(f"Exporting {model_size} to {backend}, this only happens once...")
+    exported = load_model(model_size, weights_dir).export(
+        format=backend, imgsz=imgsz, dynamic=True, simplify=True)
+    exported = Path(exported)
+    if exported.resolve() != path.resolve():
+        exported.rename(path)
+    logger.info(f"Exported model saved to {path}")
+    return path
+
+def load_calibration_images(folder: str, imgsz: int = 640, limit: int = 200) -> List[np.ndarray]:
+    """
+    Preprocess calibration images exactly like Ultralytics does for ONNX.
+
+    Images are letterboxed to ``imgsz`` x ``imgsz``, converted to RGB,
+    scaled to [0, 1] and laid out as 1x3xHxW float32 tensors.
+    """
+    paths = sorted(p for p in Path(folder).iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    tensors = []
+    for path in paths[:limit]:
+        image = cv2.imread(str(path))
+        if image is None:
+            logger.warning(f"Skipping unreadable calibration image {path.name}")
+            continue
+        height, width = image.shape[:2]
+        scale = min(imgsz / height, imgsz / width)
+        new_w, new_h = int(round(width * scale)), int(round(height * scale))
+        canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+        top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+        canvas[top:top + new_h, left:left + new_w] = cv2.resize(
+            image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        tensor = canvas[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+        tensors.append(np.ascontiguousarray(tensor))
+    if not tensors:
+        raise ValueError(f"No calibration images found in {folder}")
+    return tensors
+
+def quantized_path(model_size: str, calibration_dir: Optional[str] = None,
+                   weights_dir: str = "yolo/weights") -> Path:
+    """Location of a model's INT8 ONNX export, per quantization method."""
+    method = 'static' if calibration_dir else 'dynamic'
+    return Path(weights_dir) / f"{Path(model_size).stem}_int8_{method}.onnx"
+
+def quantize_model(model_size: str, calibration_dir: Optional[str] = None,
+                   weights_dir: str = "yolo/weights", imgsz: int = 640) -> Path:
+    """
+    Produce INT8 ONNX weights, reusing a cached result if present.
+
+    Without ``calibration_dir``, weights are quantized dynamically and
+    activations are quantized at run time. With it, activation ranges are
+    calibrated on the images in the folder and the model is quantized
+    statically in QDQ format, which is faster but depends on how
+    representative the images are. The detection head is kept in float,
+    since quantizing the box regression costs the most accuracy. Delete
+    the cached file to recalibrate.
+
+    Returns:
+        Path: Quantized model
+    """
+    path = quantized_path(model_size, calibration_dir, weights_dir)
+    if path.exists():
+        return path
+
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_dynamic, quantize_static)
+
+    fp32_path = export_model(model_size, 'onnx', weights_dir, imgsz)
+    fp32_model = onnx.load(str(fp32_path))
+
+    # Nodes of the last module, the Detect head
+    modules = [node.name.split('/')[1] for node in fp32_model.graph.node
+               if node.name.startswith('/model.')]
+    head = max(modules, key=lambda name: int(name.split('.')[1])) if modules else None
+    excluded = [node.name for node in fp32_model.graph.node
+                if head is not None and node.name.startswith(f'/{head}/')]
+
+    logger.info(f"Quantizing {model_size} to INT8 "
+                f"({'static, calibrated on ' + calibration_dir if calibration_dir else 'dynamic'})...")
+    if calibration_dir:
+        input_name = fp32_model.graph.input[0].name
+        samples = iter(load_calibration_images(calibration_dir, imgsz))
+
+        class Reader(CalibrationDataReader):
+            def get_next(self):
+                sample = next(samples, None)
+                return {input_name: sample} if sample is not None else None
+
+        quantize_static(str(fp32_path), str(path), Reader(), quant_format=QuantFormat.QDQ,
+                        per_channel=True, activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8, nodes_to_exclude=excluded)
+    else:
+        quantize_dynamic(str(fp32_path), str(path), weight_type=QuantType.QUInt8,
+                         nodes_to_exclude=excluded)
+
+    # Keep the class names and input size Ultralytics reads from the metadata
+    quantized = onnx.load(str(path))
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(fp32_model.metadata_props)
+    onnx.save(quantized, str(path))
+    logger.info(f"Quantized model saved to {path}")
+    return path
+
+def load_backend_model(model_size: str = "yolov8n.pt", backend: str = 'torch',
+                       threads: Optional[int] = None, inter_op_threads: Optional[int] = None,
+                       weights_dir: str = "yolo/weights", precision: str = 'fp32',
+                       calibration_dir: Optional[str] = None) -> YOLO:
+    """
+    Load a model for the given inference backend.
+
+    Non-PyTorch backends go through Ultralytics' own runtime wrappers, so
+    pre- and post-processing and the returned Results are identical to the
+    PyTorch path.
+
+    Args:
+        model_size (str): Weights file name, e.g. "yolov8n.pt"
+        backend (str): One of BACKENDS
+        threads (Optional[int]): Intra-op threads, None keeps the runtime default
+        inter_op_threads (Optional[int]): Inter-op threads (ONNX Runtime only)
+        weights_dir (str): Directory holding weights and exports
+        precision (str): One of PRECISIONS; int8 always runs on ONNX Runtime
+        calibration_dir (Optional[str]): Image folder for static INT8
+                        calibration; dynamic quantization without it
+
+    Returns:
+        YOLO: Model ready for ``predict``
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}. "
+                         f"Options: {', '.join(BACKENDS)}")
+    backend = resolve_backend(backend, precision)
+
+    if backend == 'torch':
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return load_model(model_size, weights_dir)
+
+    if precision == 'int8':
+        path = quantize_model(model_size, calibration_dir, weights_dir)
+    else:
+        path = export_model(model_size, backend, weights_dir)
+    model = YOLO(str(path), task='detect')
+    # The runtime session is created lazily by the first prediction
+    model.predict(np.zeros((64, 64, 3), dtype=np.uint8), verbose=False)
+    configure_threads(model, path, threads, inter_op_threads)
+    return model
+
+def configure_threads(model: YOLO, path: Path, threads: Optional[int] = None,
+                      inter_op_threads: Optional[int] = None):
+    """
+    Rebuild the runtime session of an exported model with tuned threading.
+
+    Ultralytics creates ONNX Runtime and OpenVINO sessions with default
+    options; this replaces them with sessions using full graph optimization
+    and the requested thread counts.
+    """
+    if not threads and not inter_op_threads:
+        return
+    runtime = getattr(model.predictor, 'model', None)
+
+    if getattr(runtime, 'onnx', False):
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = onnxruntime.ExecutionMode.ORT_PARALLEL
+        runtime.session = onnxruntime.InferenceSession(
+            str(path), sess_options=options, providers=runtime.session.get_providers())
+    elif getattr(runtime, 'xml', False):
+        from openvino.runtime import Core
+        core = Core()
+        xml = next(path.glob('*.xml')) if path.is_dir() else path
+        config = {'PERFORMANCE_HINT': 'LATENCY'}
+        if threads:
+            config['INFERENCE_NUM_THREADS'] = threads
+        runtime.ov_compiled_model = core.compile_model(
+            core.read_model(str(xml)), device_name='CPU', config=config)
+    else:
+        logger.warning("Thread settings are not supported by this model runtime")
+        return
+    logger.info(f"Configured {path.name} with {threads or 'default'} intra-op and "
+                f"{inter_op_threads or 'default'} inter-op threads")
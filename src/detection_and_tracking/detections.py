@@ -0,0 +1,130 @@
+import numpy as np
+from typing import Dict, List, Optional, Union
+
+
+class Detections:
+    """
+    Columnar container for the detections of a single frame.
+
+    Boxes, confidences, classes and track IDs are kept as NumPy arrays so a
+    whole frame can be moved off the device in one transfer and processed
+    without per-box Python objects. Untracked boxes have a track ID of -1.
+    Boxes predicted from tracker motion instead of detected are flagged in
+    ``interpolated``. Convert to the JSON-style list of dicts with
+    ``to_list()`` only at the API boundary.
+    """
+    def __init__(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray,
+                 track_id: Optional[np.ndarray] = None, names: Optional[Dict[int, str]] = None,
+                 interpolated: Optional[np.ndarray] = None):
+        """
+        Initialize the detections.
+
+        Args:
+            xyxy (np.ndarray): Boxes as (N, 4) array of x1, y1, x2, y2
+            conf (np.ndarray): Confidence per box, shape (N,)
+            cls (np.ndarray): Class ID per box, shape (N,)
+            track_id (Optional[np.ndarray]): Track ID per box, -1 if untracked
+            names (Optional[Dict[int, str]]): Class ID to class name mapping
+            interpolated (Optional[np.ndarray]): True per box predicted from
+                            tracker motion rather than detected
+        """
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls).reshape(-1).astype(np.int32)
+        if track_id is None:
+            self.track_id = np.full(len(self.xyxy), -1, dtype=np.int64)
+        else:
+            self.track_id = np.asarray(track_id).reshape(-1).astype(np.int64)
+        self.names = names if names is not None else {}
+        if interpolated is None:
+            self.interpolated = np.zeros(len(self.xyxy), dtype=bool)
+        else:
+            self.interpolated = np.asarray(interpolated, dtype=bool).reshape(-1)
+
+    @classmethod
+    def empty(cls, names: Optional[Dict[int, str]] = None) -> 'Detections':
+        """Create an empty set of detections."""
+        return cls(np.zeros((0, 4)), np.zeros(0), np.zeros(0), names=names)
+
+    @classmethod
+    def from_boxes(cls, boxes, names: Dict[int, str]) -> 'Detections':
+        """
+        Build detections from an Ultralytics ``Boxes`` object.
+
+        The whole ``boxes.data`` tensor is copied to host memory at once.
+        """
+        data = boxes.data.cpu().numpy()
+        track_id = data[:, 4] if boxes.is_track else None
+        return cls(data[:, :4], data[:, -2], data[:, -1], track_id, names)
+
+    @classmethod
+    def from_tracks(cls, tracks: np.ndarray, names: Dict[int, str]) -> 'Detections':
+        """Build detections from tracker output rows (x1, y1, x2, y2, id, conf, cls, idx)."""
+        return cls(tracks[:, :4], tracks[:, 5], tracks[:, 6], tracks[:, 4], names)
+
+    def __len__(self) -> int:
+        return len(self.xyxy)
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> 'Detections':
+        """Select a subset of detections by index, slice or boolean mask."""
+        if isinstance(index, (int, np.integer)):
+            index = [index]
+        return Detections(self.xyxy[index], self.conf[index], self.cls[index],
+                          self.track_id[index], self.names, self.interpolated[index])
+
+    @property
+    def is_tracked(self) -> np.ndarray:
+        """Boolean mask of boxes that carry a track ID."""
+        return self.track_id >= 0
+
+    @property
+    def centers(self) -> np.ndarray:
+        """Integer box centers as an (N, 2) array."""
+        boxes = self.xyxy.astype(np.int32)
+        return np.stack(((boxes[:, 0] + boxes[:, 2]) // 2,
+                         (boxes[:, 1] + boxes[:, 3]) // 2), axis=1)
+
+    def to_dict(self) -> Dict[str, List]:
+        """
+        Convert to a compact, JSON-serializable columnar dict.
+
+        Class names are not included; send ``names`` once per stream or job.
+        """
+        return {
+            'xyxy': self.xyxy.astype(np.float64).round(1).tolist(),
+            'conf': self.conf.astype(np.float64).round(4).tolist(),
+            'cls': self.cls.tolist(),
+            'track_id': self.track_id.tolist(),
+            'interpolated': self.interpolated.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, List], names: Optional[Dict[int, str]] = None) -> 'Detections':
+        """Rebuild detections from the output of ``to_dict()``."""
+        return cls(data['xyxy'], data['conf'], data['cls'], data['track_id'], names,
+                   data.get('interpolated'))
+
+    def to_list(self) -> List[Dict]:
+        """
+        Convert to the JSON-serializable list of dicts used by the API.
+
+        Returns:
+            List[Dict]: One dict per box with bbox, confidence, class_id,
+                        class_name, track_id (None if untracked) and
+                        interpolated
+        """
+        bboxes = self.xyxy.astype(np.int64).tolist()
+        confs = self.conf.tolist()
+        class_ids = self.cls.tolist()
+        track_ids = self.track_id.tolist()
+        interpolated = self.interpolated.tolist()
+
+        return [{
+            'bbox': bbox,
+            'confidence': conf,
+            'class_id': class_id,
+            'class_name': self.names.get(class_id, str(class_id)),
+            'track_id': track_id if track_id >= 0 else None,
+            'interpolated': is_interpolated
+        } for bbox, conf, class_id, track_id, is_interpolated
+            in zip(bboxes, confs, class_ids, track_ids, interpolated)]
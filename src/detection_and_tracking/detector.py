@@ -1,55 +1,252 @@
 from ultralytics import YOLO
+from ultralytics.trackers import BOTSORT, BYTETracker
+from ultralytics.trackers.basetrack import BaseTrack
+from ultralytics.utils import IterableSimpleNamespace, yaml_load
+from ultralytics.utils.checks import check_yaml
 import numpy as np
 import cv2
+import copy
 import logging
 import os
-import shutil
-from typing import List, Tuple, Dict, Optional, Union
-from pathlib import Path
-from collections import deque
+import pickle
+import threading
+from typing import List, Tuple, Optional, Union
+from functools import lru_cache
+
+from .backends import load_backend_model, resolve_backend
+from .detections import Detections
+from .motion import MotionGate
+from .tiling import Tiler
+
+TRACKER_MAP = {'bytetrack': BYTETracker, 'botsort': BOTSORT}
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def load_tracker_config(tracker: str) -> IterableSimpleNamespace:
+    """Parse a tracker YAML once; sessions share the read-only config."""
+    return IterableSimpleNamespace(**yaml_load(check_yaml(tracker)))
 
 class TrajectoryManager:
-    """Manages object trajectories with fading effect."""
-    def __init__(self, max_points: int = 30, fade_steps: int = 10):
-        self.trajectories = {}  # track_id -> deque of points
-        self.max_points = max_points
+    """
+    Manages object trajectories with fading effect.
+    
+    Points live in a preallocated ring buffer of shape
+    (max_tracks, max_points, 2); each track owns one row. Updates and
+    eviction are vectorized, and drawing batches all tracks into one
+    ``cv2.polylines`` call per fade step.
+    """
+    def __init__(self, max_points: int = 30, fade_steps: int = 10, max_tracks: int = 64):
         self.fade_steps = fade_steps
+        self._max_points = max_points
+        self._allocate(max_tracks)
+    
+    def _allocate(self, max_tracks: int):
+        """(Re)allocate empty buffers for the given number of tracks."""
+        self._points = np.zeros((max_tracks, self._max_points, 2), dtype=np.int32)
+        self._heads = np.zeros(max_tracks, dtype=np.int64)  # Next write position
+        self._lengths = np.zeros(max_tracks, dtype=np.int64)
+        self._row_ids = np.full(max_tracks, -1, dtype=np.int64)  # Track ID per row
+        self._rows = {}  # track_id -> row
+    
+    @property
+    def max_points(self) -> int:
+        """Maximum number of points kept per trajectory."""
+        return self._max_points
+    
+    @max_points.setter
+    def max_points(self, value: int):
+        """Resize the ring buffer; existing trajectories are cleared."""
+        self._max_points = value
+        self._allocate(len(self._points))
+    
+    @property
+    def track_ids(self) -> List[int]:
+        """IDs of the tracks that currently have a trajectory."""
+        return list(self._rows.keys())
+    
+    def clear(self):
+        """Remove all trajectories."""
+        self._lengths[:] = 0
+        self._heads[:] = 0
+        self._row_ids[:] = -1
+        self._rows.clear()
+    
+    def _row_for(self, track_id: int) -> int:
+        """Get the buffer row of a track, claiming a free one if needed."""
+        row = self._rows.get(track_id)
+        if row is not None:
+            return row
+        
+        free = np.flatnonzero(self._row_ids < 0)
+        if len(free) == 0:
+            # Grow the buffer by doubling its track capacity
+            capacity = len(self._points)
+            self._points = np.concatenate([self._points, np.zeros_like(self._points)])
+            self._heads = np.concatenate([self._heads, np.zeros(capacity, dtype=np.int64)])
+            self._lengths = np.concatenate([self._lengths, np.zeros(capacity, dtype=np.int64)])
+            self._row_ids = np.concatenate([self._row_ids, np.full(capacity, -1, dtype=np.int64)])
+            free = [capacity]
+        
+        row = int(free[0])
+        self._row_ids[row] = track_id
+        self._heads[row] = 0
+        self._lengths[row] = 0
+        self._rows[track_id] = row
+        return row
     
     def update(self, track_id: int, center_point: tuple):
         """Update trajectory for a tracked object."""
-        if track_id not in self.trajectories:
-            self.trajectories[track_id] = deque(maxlen=self.max_points)
-        self.trajectories[track_id].append(center_point)
+        self.update_many(np.array([track_id]), np.array([center_point]))
+    
+    def update_many(self, track_ids: np.ndarray, center_points: np.ndarray):
+        """
+        Append one point to each of several trajectories at once.
+        
+        Args:
+            track_ids: (N,) track IDs, all distinct
+            center_points: (N, 2) points in the same order
+        """
+        if len(track_ids) == 0:
+            return
+        rows = np.array([self._row_for(int(track_id)) for track_id in track_ids])
+        self._points[rows, self._heads[rows]] = center_points
+        self._heads[rows] = (self._heads[rows] + 1) % self._max_points
+        self._lengths[rows] = np.minimum(self._lengths[rows] + 1, self._max_points)
+    
+    def prune(self, active_track_ids: set):
+        """Drop the trajectories of objects that are no longer tracked."""
+        used = self._row_ids >= 0
+        stale = used & ~np.isin(self._row_ids, list(active_track_ids))
+        for track_id in self._row_ids[stale].tolist():
+            del self._rows[track_id]
+        self._row_ids[stale] = -1
+        self._lengths[stale] = 0
     
-    def draw_trajectories(self, frame: np.ndarray, active_track_ids: set):
-        """Draw trajectories with fading effect."""
+    def points(self, track_id: int) -> np.ndarray:
+        """Points of one trajectory, oldest first, as an (L, 2) array."""
+        row = self._rows.get(track_id)
+        if row is None:
+            return np.zeros((0, 2), dtype=np.int32)
+        length = self._lengths[row]
+        order = (self._heads[row] - length + np.arange(length)) % self._max_points
+        return self._points[row, order]
+    
+    def draw_trajectories(self, frame: np.ndarray, active_track_ids: set,
+                          color: Tuple[int, int, int] = (0, 0, 255), thickness: int = 2,
+                          scale: float = 1.0):
+        """Draw trajectories with fading effect, scaling points by ``scale``."""
         # Remove trajectories of objects that are no longer tracked
-        current_ids = set(self.trajectories.keys())
-        for track_id in current_ids - active_track_ids:
-            del self.trajectories[track_id]
-        
-        # Draw active trajectories
-        for track_id in active_track_ids:
-            if track_id not in self.trajectories:
-                continue
-                
-            points = list(self.trajectories[track_id])
-            if len(points) < 2:
-                continue
-            
-            # Draw lines with fading effect
-            for i in range(len(points) - 1):
-                # Calculate alpha based on point age
-                alpha = (i + 1) / len(points)  # Newer points are more opaque
-                color = (0, 0, 255)  # Red color for trajectory
-                
-                # Draw line segment with calculated alpha
-                cv2.line(frame,
-                        (int(points[i][0]), int(points[i][1])),
-                        (int(points[i+1][0]), int(points[i+1][1])),
-                        color,
-                        thickness=2,
-                        lineType=cv2.LINE_AA)
+        self.prune(active_track_ids)
+        
+        rows = np.array([self._rows[track_id] for track_id in active_track_ids
+                         if track_id in self._rows], dtype=np.int64)
+        if len(rows):
+            rows = rows[self._lengths[rows] >= 2]
+        if len(rows) == 0:
+            return
+        
+        # Gather all trajectories oldest first in one go: (tracks, max_points, 2)
+        lengths = self._lengths[rows]
+        order = (self._heads[rows, None] - lengths[:, None] + np.arange(self._max_points)) % self._max_points
+        points = self._points[rows[:, None], order]
+        if scale != 1.0:
+            points = (points * scale).astype(np.int32)
+        valid = np.arange(self._max_points) < lengths[:, None]
+        
+        # Only blend inside the area the trajectories cover
+        covered_points = points[valid]
+        height, width = frame.shape[:2]
+        x0, y0 = np.maximum(covered_points.min(axis=0) - thickness - 1, 0)
+        x1, y1 = np.minimum(covered_points.max(axis=0) + thickness + 2, (width, height))
+        if x1 <= x0 or y1 <= y0:
+            return
+        points = points - np.array([x0, y0], dtype=np.int32)
+        
+        # Split every trajectory into fade steps by age, oldest step first
+        steps = max(1, self.fade_steps)
+        edges = np.round((lengths[:, None] - 1) * np.arange(steps + 1) / steps).astype(int)
+        bands = [[] for _ in range(steps)]
+        for track_points, track_edges in zip(points, edges.tolist()):
+            for step in range(steps):
+                if track_edges[step + 1] > track_edges[step]:
+                    bands[step].append(track_points[track_edges[step]:track_edges[step + 1] + 1])
+        
+        # Rasterize per-pixel opacity, newer steps are more opaque
+        alpha = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        for step, lines in enumerate(bands):
+            if lines:
+                cv2.polylines(alpha, lines, False,
+                              int(255 * (step + 1) / steps), thickness=thickness,
+                              lineType=cv2.LINE_AA)
+        
+        # Blend the trajectory color into the covered pixels with that opacity
+        covered = cv2.findNonZero(alpha)
+        if covered is None:
+            return
+        xs, ys = covered.reshape(-1, 2).T
+        region = frame[y0:y1, x0:x1]
+        pixels = region[ys, xs].astype(np.float32)
+        weight = alpha[ys, xs, None].astype(np.float32) / 255.0
+        region[ys, xs] = (pixels + weight * (np.array(color, dtype=np.float32) - pixels)).astype(np.uint8)
+
+def draw_overlay(frame: np.ndarray, results: Detections,
+                 trajectory_manager: TrajectoryManager, scale: float = 1.0) -> np.ndarray:
+    """
+    Draw detection and tracking results with trajectories in place.
+    
+    Args:
+        frame: Image to draw on, modified in place
+        results: Detections in source frame coordinates
+        trajectory_manager: Trajectory state, updated with the tracked boxes
+        scale: Factor from source frame to ``frame`` coordinates, for drawing
+               directly onto a resized display image
+    """
+    bboxes = (results.xyxy * scale).astype(np.int32).tolist()
+    track_ids = results.track_id.tolist()
+    interpolated = results.interpolated.tolist()
+    
+    # Update all trajectories with the center points of tracked boxes at once
+    tracked = results.is_tracked
+    trajectory_manager.update_many(results.track_id[tracked], results.centers[tracked])
+    active_track_ids = set(results.track_id[tracked].tolist())
+    
+    for i, bbox in enumerate(bboxes):
+        track_id = track_ids[i] if track_ids[i] >= 0 else None
+        
+        # Different colors for tracked vs untracked objects
+        color = (0, 0, 255) if track_id is not None else (0, 255, 0)
+        
+        # Create label with class, confidence and track ID if available
+        class_id = int(results.cls[i])
+        label_parts = [
+            f"{results.names.get(class_id, class_id)} {results.conf[i]:.2f}"
+        ]
+        if track_id is not None:
+            label_parts.append(f"ID:{track_id}")
+        label = " ".join(label_parts)
+        
+        # Draw box, thinner when it was predicted rather than detected
+        cv2.rectangle(frame, 
+                     (bbox[0], bbox[1]), 
+                     (bbox[2], bbox[3]), 
+                     color, 1 if interpolated[i] else 2)
+        
+        # Draw label
+        cv2.putText(frame, label, 
+                   (bbox[0], bbox[1] - 10),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, 
+                   color, 2)
+    
+    # Draw trajectories
+    trajectory_manager.draw_trajectories(frame, active_track_ids, scale=scale)
+        
+    return frame
+
+def draw_detections(frame: np.ndarray, results: Detections,
+                    trajectory_manager: TrajectoryManager) -> np.ndarray:
+    """Draw detection and tracking results with trajectories on a copy of the frame."""
+    return draw_overlay(frame.copy(), results, trajectory_manager)
 
 class YOLODetector:
     """
@@ -57,7 +254,11 @@ class YOLODetector:
     """
     def __init__(self, model_size: str = "yolov8n.pt", tracker: str = "bytetrack.yaml", 
                  trajectory_length: int = 30, fade_steps: int = 10, 
-                 conf_threshold: float = 0.5, display_width: int = 640):
+                 conf_threshold: float = 0.5, display_width: int = 640,
+                 model: Optional[YOLO] = None, model_lock: Optional[threading.Lock] = None,
+                 tiler: Optional[Tiler] = None, backend: str = 'torch',
+                 threads: Optional[int] = None, precision: str = 'fp32',
+                 calibration_dir: Optional[str] = None, imgsz: int = 640):
         """
         Initialize the YOLO detector.
         
@@ -70,35 +271,34 @@ class YOLODetector:
             fade_steps (int): Number of steps for trajectory fade effect
             conf_threshold (float): Confidence threshold for detections
             display_width (int): Width of the display window
+            model (Optional[YOLO]): Preloaded model to share instead of loading one
+            model_lock (Optional[threading.Lock]): Lock guarding inference on a
+                            shared model
+            tiler (Optional[Tiler]): Run ROI or tiled inference instead of
+                            passing whole frames to the model
+            backend (str): Inference backend: "torch", or "onnx"/"openvino"
+                            to run an exported copy of the model on CPU
+            threads (Optional[int]): Intra-op threads of the inference backend
+            precision (str): "fp32", or "int8" to run quantized weights on
+                            ONNX Runtime
+            calibration_dir (Optional[str]): Images for static INT8 calibration;
+                            weights are quantized dynamically without it
+            imgsz (int): Inference input size in pixels, a multiple of 32
         """
         self.logger = logging.getLogger(__name__)
         self.model_name = model_size
         self.tracker = tracker
         self.conf_threshold = conf_threshold
         self.display_width = display_width
+        self.backend = resolve_backend(backend, precision)
+        self.precision = precision
+        self.imgsz = imgsz
         
-        # Setup weights directory
-        self.weights_dir = Path("yolo/weights")
-        self.weights_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Check if model exists in weights directory
-        model_path = self.weights_dir / model_size
-        if not model_path.exists():
-            self.logger.info(f"Model not found in {self.weights_dir}. Downloading...")
-            temp_model = YOLO(model_size)
-            downloaded_path = Path(model_size)
-            if downloaded_path.exists():
-                shutil.move(str(downloaded_path), str(model_path))
-                self.logger.info(f"Model saved to {model_path}")
-            else:
-                raise FileNotFoundError(f"Downloaded model not found at {downloaded_path}")
-        
-        try:
-            self.model = YOLO(str(model_path))
-            self.logger.info(f"Loaded YOLO model from: {model_path}")
-        except Exception as e:
-            self.logger.error(f"Error loading YOLO model: {str(e)}")
-            raise
+        # Reuse an already loaded model if one is given, e.g. from the model registry
+        self.model = model if model is not None else load_backend_model(
+            model_size, backend, threads, precision=precision, calibration_dir=calibration_dir)
+        self.model_lock = model_lock if model_lock is not None else threading.Lock()
+        self.tiler = tiler
 
         # Initialize trajectory manager with specified parameters
         self.trajectory_manager = TrajectoryManager(
@@ -106,95 +306,274 @@ class YOLODetector:
             fade_steps=fade_steps
         )
 
-    def detect_and_track(self, frame: np.ndarray, conf_threshold: float = 0.5) -> List[Dict]:
+        # Tracker state persists between frames, like model.track(persist=True)
+        self.tracker_state = self._create_tracker()
+        # Position in the stream, used to pick detection frames when skipping
+        self.frame_index = 0
+        # Reused while a motion gate reports a static scene
+        self.last_results = Detections.empty()
+        # Settings callers may change per use, restored by restore_settings()
+        self._settings = {
+            'conf_threshold': conf_threshold,
+            'display_width': display_width,
+            'tiler': tiler,
+            'imgsz': imgsz,
+            'trajectory_length': trajectory_length,
+            'fade_steps': fade_steps
+        }
+
+    def create_session(self) -> 'YOLODetector':
+        """
+        Create a detector that shares this detector's model weights but owns
+        its tracker and trajectory state.
+        
+        Use one session per stream or request so unrelated inputs never mix
+        track IDs, while all of them run on a single copy of the model.
+        """
+        return YOLODetector(
+            model_size=self.model_name,
+            tracker=self.tracker,
+            trajectory_length=self.trajectory_manager.max_points,
+            fade_steps=self.trajectory_manager.fade_steps,
+            conf_threshold=self.conf_threshold,
+            display_width=self.display_width,
+            model=self.model,
+            model_lock=self.model_lock,
+            tiler=self.tiler,
+            backend=self.backend,
+            precision=self.precision,
+            imgsz=self.imgsz
+        )
+
+    def reset(self):
+        """Clear tracker and trajectory state, e.g. before reusing the detector for a new job."""
+        self.tracker_state = self._create_tracker()
+        self.frame_index = 0
+        self.last_results = Detections.empty()
+        self.trajectory_manager.clear()
+
+    def restore_settings(self):
+        """Undo changes to the settings the detector was created with, e.g. before pooling it."""
+        self.conf_threshold = self._settings['conf_threshold']
+        self.display_width = self._settings['display_width']
+        self.tiler = self._settings['tiler']
+        self.imgsz = self._settings['imgsz']
+        if self.trajectory_manager.max_points != self._settings['trajectory_length']:
+            self.trajectory_manager.max_points = self._settings['trajectory_length']
+        self.trajectory_manager.fade_steps = self._settings['fade_steps']
+
+    def get_state(self) -> bytes:
+        """
+        Serialize the tracking state so a job can resume where it stopped.
+        
+        Covers the tracker with its Kalman filters, the stream position, the
+        last results and the process-wide track ID counter. Trajectories are
+        not included; they are rebuilt by drawing the stored results.
+        """
+        return pickle.dumps({
+            'tracker': self.tracker_state,
+            'frame_index': self.frame_index,
+            'last_results': self.last_results,
+            'track_id_count': BaseTrack._count
+        })
+
+    def set_state(self, state: bytes):
+        """Restore tracking state saved by ``get_state()``."""
+        data = pickle.loads(state)
+        self.tracker_state = data['tracker']
+        self.frame_index = data['frame_index']
+        self.last_results = data['last_results']
+        # New tracks must not reuse IDs handed out before the checkpoint
+        BaseTrack._count = max(BaseTrack._count, data['track_id_count'])
+
+    def _create_tracker(self):
+        """Build a fresh tracker from the configured tracker YAML."""
+        cfg = load_tracker_config(self.tracker)
+        if cfg.tracker_type not in TRACKER_MAP:
+            raise ValueError(f"Unsupported tracker type: {cfg.tracker_type}")
+        return TRACKER_MAP[cfg.tracker_type](args=cfg, frame_rate=30)
+
+    def predict(self, frames: List[np.ndarray], conf_threshold: float = 0.5) -> List[Detections]:
         """
-        Detect and track objects in a frame using YOLO's built-in tracking.
+        Run one batched forward pass without tracking.
+        
+        Frames of different sizes are letterboxed to a common input size by
+        Ultralytics, so independent images can share a batch. With a tiler
+        set, the crops of all frames form the batch and are merged back into
+        one set of detections per frame.
         
         Args:
-            frame (np.ndarray): Input frame
+            frames (List[np.ndarray]): Input frames
             conf_threshold (float): Confidence threshold for detections
             
         Returns:
-            List[Dict]: List of tracked objects with bounding boxes and IDs
+            List[Detections]: Untracked detections for each input frame
         """
-        try:
-            # Run tracking
-            results = self.model.track(
-                source=frame, 
-                conf=conf_threshold,
-                persist=True,  # Persist tracks between frames
-                tracker=self.tracker,
-                verbose = False
-            )[0]
-            
-            # Process results
-            tracked_objects = []
-            if results.boxes is not None and len(results.boxes):
-                for box in results.boxes:
-                    # Get box coordinates, confidence, class and track ID
-                    x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                    confidence = float(box.conf[0])
-                    class_id = int(box.cls[0])
-                    class_name = results.names[class_id]
-                    track_id = int(box.id[0]) if box.id is not None else None
-                    
-                    tracked_objects.append({
-                        'bbox': [int(x1), int(y1), int(x2), int(y2)],
-                        'confidence': confidence,
-                        'class_id': class_id,
-                        'class_name': class_name,
-                        'track_id': track_id
-                    })
-            
-            return tracked_objects
-            
-        except Exception as e:
-            self.logger.error(f"Error during tracking: {str(e)}")
+        if not frames:
             return []
+        
+        tiler = self.tiler
+        if tiler is None:
+            sources = list(frames)
+        else:
+            crops = [tiler.crop(frame) for frame in frames]
+            sources = [crop for frame_crops, _ in crops for crop in frame_crops]
+        
+        with self.model_lock:
+            # Always pass the size: Ultralytics keeps predict arguments on the
+            # shared model, so one session's size would leak into the others
+            batch_results = self.model.predict(
+                source=sources,
+                conf=conf_threshold,
+                imgsz=self.imgsz,
+                verbose=False
+            )
+        
+        batch_detections = [Detections.from_boxes(result.boxes, result.names) for result in batch_results]
+        if tiler is None:
+            return batch_detections
+        
+        # Regroup crop detections per frame and merge them
+        merged, start = [], 0
+        for _, regions in crops:
+            frame_detections = batch_detections[start:start + len(regions)]
+            merged.append(tiler.merge(frame_detections, regions, self.model.names))
+            start += len(regions)
+        return merged
 
-    def draw_results(self, frame: np.ndarray, results: List[Dict]) -> np.ndarray:
-        """Draw detection and tracking results with trajectories on the frame."""
-        draw_frame = frame.copy()
+    def track(self, detections: Detections, frame: np.ndarray) -> Detections:
+        """
+        Feed one frame's detections to the tracker.
+        
+        Mirrors Ultralytics' own tracking callback so that IDs match what
+        ``model.track(persist=True)`` would have produced.
+        """
+        if len(detections) == 0:
+            return detections
         
-        # Keep track of active track IDs
-        active_track_ids = set()
+        tracks = self.tracker_state.update(detections, frame)
+        if len(tracks) == 0:
+            # No confirmed tracks yet, report the raw detections without IDs
+            return detections
         
-        for obj in results:
-            bbox = obj['bbox']
-            track_id = obj.get('track_id')
+        return Detections.from_tracks(tracks, detections.names)
+
+    def extrapolate(self, fraction: float) -> Detections:
+        """
+        Predict the boxes of confirmed tracks from the tracker's Kalman state.
+        
+        The tracker's velocity estimate covers one tracker update, so when
+        detecting every N frames, the k-th frame after a detection advances
+        each track by ``fraction = k / N`` of it. The tracker itself is left
+        untouched; the next real detection corrects the tracks.
+        
+        Args:
+            fraction (float): Fraction of one tracker update to advance
             
-            if track_id is not None:
-                active_track_ids.add(track_id)
-                # Calculate center point of bbox
-                center_x = (bbox[0] + bbox[2]) // 2
-                center_y = (bbox[1] + bbox[3]) // 2
-                # Update trajectory
-                self.trajectory_manager.update(track_id, (center_x, center_y))
+        Returns:
+            Detections: Predicted boxes, flagged as interpolated
+        """
+        tracks = [track for track in self.tracker_state.tracked_stracks
+                  if track.is_activated and track.mean is not None]
+        if not tracks:
+            return Detections.empty(self.model.names)
+        
+        boxes = []
+        for track in tracks:
+            # Work on a copy so the box conversion of the track class is reused
+            predicted = copy.copy(track)
+            predicted.mean = track.mean.copy()
+            predicted.mean[:4] += fraction * track.mean[4:8]
+            boxes.append(predicted.tlbr)
+        
+        return Detections(
+            np.array(boxes),
+            np.array([track.score for track in tracks]),
+            np.array([track.cls for track in tracks]),
+            np.array([track.track_id for track in tracks]),
+            self.model.names,
+            interpolated=np.ones(len(tracks), dtype=bool)
+        )
+
+    def detect_batch(self, frames: List[np.ndarray], conf_threshold: float = 0.5,
+                     detect_interval: int = 1,
+                     motion_gate: Optional[MotionGate] = None) -> List[Detections]:
+        """
+        Detect objects in several frames with a single forward pass, then
+        update the tracker with each frame in order.
+        
+        Args:
+            frames (List[np.ndarray]): Consecutive frames of the same stream
+            conf_threshold (float): Confidence threshold for detections
+            detect_interval (int): Run the model on every N-th frame of the
+                            stream only. Boxes on the frames in between are
+                            extrapolated from the tracker and marked as
+                            interpolated.
+            motion_gate (Optional[MotionGate]): Skip inference on frames in
+                            which nothing moved and reuse the last results
             
-            # Different colors for tracked vs untracked objects
-            color = (0, 0, 255) if track_id is not None else (0, 255, 0)
+        Returns:
+            List[Detections]: Tracked objects for each input frame
+        """
+        if not frames:
+            return []
+        
+        try:
+            interval = max(1, detect_interval)
+            indices = range(self.frame_index, self.frame_index + len(frames))
+            self.frame_index += len(frames)
+            is_detection_frame = [index % interval == 0 for index in indices]
+            if motion_gate is not None:
+                is_detection_frame = [detect and motion_gate.check(frame)
+                                      for frame, detect in zip(frames, is_detection_frame)]
+            is_static = [index % interval == 0 and not detect
+                         for index, detect in zip(indices, is_detection_frame)]
             
-            # Create label with class, confidence and track ID if available
-            label_parts = [
-                f"{obj['class_name']} {obj['confidence']:.2f}"
-            ]
-            if track_id is not None:
-                label_parts.append(f"ID:{track_id}")
-            label = " ".join(label_parts)
+            # One batched forward pass for all frames that need detection
+            batch_detections = iter(self.predict(
+                [frame for frame, detect in zip(frames, is_detection_frame) if detect],
+                conf_threshold
+            ))
             
-            # Draw box
-            cv2.rectangle(draw_frame, 
-                         (bbox[0], bbox[1]), 
-                         (bbox[2], bbox[3]), 
-                         color, 2)
+            # Tracking is sequential, so feed the tracker in frame order
+            results = []
+            for frame, index, detect, static in zip(frames, indices, is_detection_frame, is_static):
+                if detect:
+                    self.last_results = self.track(next(batch_detections), frame)
+                elif not static:
+                    self.last_results = self.extrapolate((index % interval) / interval)
+                results.append(self.last_results)
+            return results
             
-            # Draw label
-            cv2.putText(draw_frame, label, 
-                       (bbox[0], bbox[1] - 10),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, 
-                       color, 2)
-        
-        # Draw trajectories
-        self.trajectory_manager.draw_trajectories(draw_frame, active_track_ids)
+        except Exception as e:
+            self.logger.error(f"Error during batch tracking: {str(e)}")
+            return [Detections.empty() for _ in frames]
+
+    def detect_and_track(self, frame: np.ndarray, conf_threshold: float = 0.5,
+                         detect_interval: int = 1,
+                         motion_gate: Optional[MotionGate] = None) -> Detections:
+        """
+        Detect and track objects in a frame.
+        
+        Args:
+            frame (np.ndarray): Input frame
+            conf_threshold (float): Confidence threshold for detections
+            detect_interval (int): Run the model on every N-th frame only
+            motion_gate (Optional[MotionGate]): Skip inference when nothing moved
             
-        return draw_frame 
\ No newline at end of file
+        Returns:
+            Detections: Tracked objects with bounding boxes and IDs
+        """
+        return self.detect_batch([frame], conf_threshold, detect_interval, motion_gate)[0]
+
+    def draw_results(self, frame: np.ndarray, results: Detections,
+                     in_place: bool = False) -> np.ndarray:
+        """
+        Draw detection and tracking results with trajectories on the frame.
+        
+        Pass ``in_place=True`` to draw into ``frame`` itself when the caller
+        no longer needs the undecorated image.
+        """
+        if in_place:
+            return draw_overlay(frame, results, self.trajectory_manager)
+        return draw_detections(frame, results, self.trajectory_manager)
@@ -0,0 +1,211 @@
+import logging
+import os
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ultralytics import YOLO
+
+from .backends import load_backend_model, resolve_backend
+from .detector import YOLODetector
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """
+    Process-wide pool of loaded YOLO models and the detectors built on them.
+
+    Weights are loaded once per model name and precision and shared by every
+    detector that uses them. Detectors are leased per (model, precision,
+    tracker) key: each lease gets
+    its own tracker and trajectory state, and the instance goes back to an
+    idle pool when released. When more than ``max_models`` models are loaded,
+    the least recently used model without active leases is unloaded.
+
+    Models are loaded outside the registry lock, so a slow load (including
+    exports and quantization) only blocks callers waiting for that model.
+    """
+    def __init__(self, max_models: int = 2, max_idle: int = 4,
+                 backend: str = 'torch', threads: Optional[int] = None,
+                 precision: str = 'fp32', calibration_dir: Optional[str] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            max_models (int): Maximum number of models kept in memory
+            max_idle (int): Maximum number of idle detectors kept per key
+            backend (str): Inference backend fp32 models are loaded with
+            threads (Optional[int]): Intra-op threads of the backend
+            precision (str): Default precision of leased detectors
+            calibration_dir (Optional[str]): Images for static INT8 calibration
+        """
+        self.max_models = max_models
+        self.max_idle = max_idle
+        self.backend = backend
+        self.threads = threads
+        self.precision = precision
+        self.calibration_dir = calibration_dir
+        self._models: "OrderedDict[Tuple[str, str], Tuple[YOLO, threading.Lock]]" = OrderedDict()
+        self._idle: Dict[Tuple[str, str, str], List[YOLODetector]] = defaultdict(list)
+        self._active: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._loading: Dict[Tuple[str, str], threading.Event] = {}
+        self._lock = threading.RLock()
+
+    def get_model(self, model_size: str = "yolov8n.pt",
+                  precision: Optional[str] = None) -> Tuple[YOLO, threading.Lock]:
+        """
+        Get a loaded model and its inference lock, loading it on first use.
+
+        Returns:
+            Tuple[YOLO, threading.Lock]: Shared model and the lock guarding it
+        """
+        key = (model_size, precision or self.precision)
+        while True:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key]
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            # Another thread is loading this model; check again once it is done
+            loading.wait()
+
+        try:
+            model = load_backend_model(model_size, self.backend, self.threads,
+                                       precision=key[1], calibration_dir=self.calibration_dir)
+            entry = (model, threading.Lock())
+            with self._lock:
+                self._models[key] = entry
+                self._evict(keep=key)
+            return entry
+        finally:
+            with self._lock:
+                del self._loading[key]
+            loading.set()
+
+    def _retain(self, key: Tuple[str, str],
+                entry: Tuple[YOLO, threading.Lock]) -> Tuple[YOLO, threading.Lock]:
+        """
+        Count a new lease on a model and return the registry's copy of it.
+
+        The model may have been unloaded between loading it and taking the
+        lock, in which case the loaded copy is put back instead of loading
+        a second one later. Caller holds the lock.
+        """
+        if key not in self._models:
+            self._models[key] = entry
+        self._models.move_to_end(key)
+        self._active[key] += 1
+        return self._models[key]
+
+    def preload(self, model_sizes: List[str]):
+        """Load the given models up front, e.g. at worker startup."""
+        for model_size in model_sizes:
+            self.get_model(model_size)
+
+    def acquire(self, model_size: str = "yolov8n.pt", tracker: str = "bytetrack.yaml",
+                precision: Optional[str] = None, **kwargs) -> YOLODetector:
+        """
+        Lease a detector with fresh tracker state on a shared model.
+
+        Extra keyword arguments are passed to YOLODetector when a new
+        instance has to be created. Pair every call with ``release()``.
+        """
+        key = (model_size, precision or self.precision)
+        with self._lock:
+            idle = self._idle[(*key, tracker)]
+            detector = idle.pop() if idle else None
+            if detector is not None:
+                self._retain(key, self._models[key])
+
+        if detector is None:
+            entry = self.get_model(*key)
+            with self._lock:
+                model, model_lock = self._retain(key, entry)
+            detector = YOLODetector(model_size=model_size, tracker=tracker,
+                                    model=model, model_lock=model_lock,
+                                    backend=self.backend, precision=key[1], **kwargs)
+
+        detector.reset()
+        return detector
+
+    def release(self, detector: YOLODetector):
+        """Return a leased detector to the idle pool."""
+        key = (detector.model_name, detector.precision)
+        # The next lessee starts from the settings the detector was built with
+        detector.restore_settings()
+        with self._lock:
+            self._active[key] -= 1
+            idle = self._idle[(*key, detector.tracker)]
+            if key in self._models and len(idle) < self.max_idle:
+                idle.append(detector)
+            self._evict()
+
+    def switch_model(self, detector: YOLODetector, model_size: Optional[str] = None,
+                     precision: Optional[str] = None):
+        """
+        Move a leased detector onto other weights in place.
+
+        The lease moves with it, so the new model counts as in use and the
+        old one can be unloaded. Tracker and trajectory state are kept, so
+        long-lived detectors can change model or precision without being
+        released.
+        """
+        old_key = (detector.model_name, detector.precision)
+        new_key = (model_size or detector.model_name, precision or detector.precision)
+        if new_key == old_key:
+            return
+        entry = self.get_model(*new_key)
+        with self._lock:
+            model, model_lock = self._retain(new_key, entry)
+        with detector.model_lock:
+            detector.model, detector.model_lock = model, model_lock
+        detector.model_name, detector.precision = new_key
+        detector.backend = resolve_backend(self.backend, new_key[1])
+        # Only now is the old model no longer in use by this detector
+        with self._lock:
+            self._active[old_key] -= 1
+            self._evict()
+
+    def switch_precision(self, detector: YOLODetector, precision: str):
+        """Move a leased detector onto the weights of another precision in place."""
+        self.switch_model(detector, precision=precision)
+
+    @contextmanager
+    def lease(self, model_size: str = "yolov8n.pt", tracker: str = "bytetrack.yaml",
+              precision: Optional[str] = None, **kwargs) -> Iterator[YOLODetector]:
+        """Context manager around ``acquire()`` and ``release()``."""
+        detector = self.acquire(model_size, tracker, precision, **kwargs)
+        try:
+            yield detector
+        finally:
+            self.release(detector)
+
+    def loaded_models(self) -> List[Tuple[str, str]]:
+        """(model, precision) of the models in memory, least recently used first."""
+        with self._lock:
+            return list(self._models.keys())
+
+    def _evict(self, keep: Optional[Tuple[str, str]] = None):
+        """Unload least recently used models without active leases."""
+        for model_key in list(self._models.keys()):
+            if len(self._models) <= self.max_models:
+                break
+            if self._active[model_key] > 0 or model_key == keep:
+                continue
+            del self._models[model_key]
+            for key in [key for key in self._idle if key[:2] == model_key]:
+                del self._idle[key]
+            logger.info(f"Unloaded model {model_key[0]} ({model_key[1]}) from registry")
+
+# Shared registry for the current process
+model_registry = ModelRegistry(
+    max_models=int(os.environ.get('MAX_LOADED_MODELS', 2)),
+    backend=os.environ.get('INFERENCE_BACKEND', 'torch'),
+    threads=int(os.environ.get('INFERENCE_THREADS', 0)) or None,
+    precision=os.environ.get('INFERENCE_PRECISION', 'fp32'),
+    calibration_dir=os.environ.get('INT8_CALIBRATION_DIR') or None
+)
@@ -0,0 +1,92 @@
+import cv2
+import numpy as np
+from typing import Optional
+
+class MotionGate:
+    """
+    Cheap change detector placed in front of the model.
+
+    Frames are shrunk to a small grayscale thumbnail, blurred, and compared
+    with the thumbnail of the last frame that went through the model. If too
+    few pixels changed, inference can be skipped and the last detections
+    reused. Comparing against the last inferred frame rather than the
+    previous one means slow movement still adds up and triggers eventually.
+    """
+    def __init__(self, sensitivity: float = 0.5, width: int = 160,
+                 max_skip: int = 30):
+        """
+        Initialize the gate.
+
+        Args:
+            sensitivity: 0-1, higher values react to smaller changes
+            width: Width of the thumbnail frames are compared at
+            max_skip: Force inference after this many skipped frames in a
+                      row, so tracks and lighting changes never go stale
+        """
+        self.width = width
+        self.max_skip = max_skip
+        self.sensitivity = sensitivity
+        self.frames = 0
+        self.skipped = 0
+        self._reference: Optional[np.ndarray] = None
+        self._skipped_in_row = 0
+
+    @property
+    def sensitivity(self) -> float:
+        """How small a change triggers inference, from 0 to 1."""
+        return self._sensitivity
+
+    @sensitivity.setter
+    def sensitivity(self, value: float):
+        """Map sensitivity to a per-pixel difference and a changed-area threshold."""
+        if not 0 <= value <= 1:
+            raise ValueError("sensitivity must be between 0 and 1")
+        self._sensitivity = value
+        self.pixel_threshold = int(8 + (1 - value) * 40)
+        self.area_threshold = 0.0005 + (1 - value) * 0.005
+
+    @property
+    def skip_ratio(self) -> float:
+        """Fraction of frames for which inference was skipped."""
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def reset(self):
+        """Forget the reference frame and counters."""
+        self.frames = 0
+        self.skipped = 0
+        self._reference = None
+        self._skipped_in_row = 0
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """Downscaled, blurred grayscale version of a frame."""
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, int(height * self.width / width)))
+        small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def check(self, frame: np.ndarray) -> bool:
+        """
+        Decide whether a frame needs inference.
+
+        Returns:
+            bool: True if the scene changed (the frame becomes the new
+                  reference), False if the last detections can be reused
+        """
+        self.frames += 1
+        thumbnail = self._thumbnail(frame)
+
+        if self._reference is not None and self._reference.shape == thumbnail.shape \
+                and self._skipped_in_row < self.max_skip:
+            diff = cv2.absdiff(thumbnail, self._reference)
+            changed = cv2.countNonZero(cv2.threshold(
+                diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)[1])
+            if changed < self.area_threshold * diff.size:
+                self.skipped += 1
+                self._skipped_in_row += 1
+                return False
+
+        self._reference = thumbnail
+        self._skipped_in_row = 0
+        return True
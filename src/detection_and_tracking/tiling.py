@@ -0,0 +1,169 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .detections import Detections
+
+Region = Tuple[int, int, int, int]
+
+class Tiler:
+    """
+    Region-of-interest and tiled (SAHI-style) inference planning.
+
+    A frame is cut into crops at native resolution: either the user-defined
+    ROIs, or an overlapping grid of ``tile_size`` tiles covering the frame.
+    ROIs larger than a tile are gridded as well. All crops of a frame are run
+    as one batch, and the per-crop detections are shifted back to frame
+    coordinates and merged with class-aware cross-tile NMS before tracking.
+    """
+    MATCH_METRICS = ('iou', 'ios')
+
+    def __init__(self, tile_size: int = 640, overlap: float = 0.2,
+                 rois: Optional[Sequence[Sequence[int]]] = None,
+                 full_frame: bool = True, nms_threshold: float = 0.5,
+                 match_metric: str = 'ios'):
+        """
+        Initialize the tiler.
+
+        Args:
+            tile_size: Side length of the square tiles in source pixels
+            overlap: Fraction of a tile shared with its neighbour, 0 to <1
+            rois: Optional [x1, y1, x2, y2] regions; only these are searched
+            full_frame: Also run the whole frame (downscaled as usual) so
+                        large objects split across tiles are still found.
+                        Ignored when ROIs are given.
+            nms_threshold: Overlap above which two boxes of the same class
+                           are considered duplicates
+            match_metric: "iou", or "ios" (intersection over the smaller
+                          box), which also removes partial boxes cut off at
+                          tile borders
+        """
+        if tile_size < 32:
+            raise ValueError("tile_size must be at least 32")
+        if not 0 <= overlap < 1:
+            raise ValueError("overlap must be in [0, 1)")
+        if match_metric not in self.MATCH_METRICS:
+            raise ValueError(f"Unknown match metric: {match_metric}. "
+                             f"Options: {', '.join(self.MATCH_METRICS)}")
+        self.tile_size = int(tile_size)
+        self.overlap = float(overlap)
+        self.rois = [tuple(int(v) for v in roi) for roi in rois] if rois else []
+        for x1, y1, x2, y2 in self.rois:
+            if x2 <= x1 or y2 <= y1:
+                raise ValueError(f"Invalid ROI: {[x1, y1, x2, y2]}")
+        self.full_frame = full_frame
+        self.nms_threshold = nms_threshold
+        self.match_metric = match_metric
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Tiler':
+        """Build a tiler from the output of ``to_dict()``."""
+        return cls(**data)
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable settings, e.g. for the config API or Celery tasks."""
+        return {
+            'tile_size': self.tile_size,
+            'overlap': self.overlap,
+            'rois': [list(roi) for roi in self.rois],
+            'full_frame': self.full_frame,
+            'nms_threshold': self.nms_threshold,
+            'match_metric': self.match_metric
+        }
+
+    def _grid(self, start: int, length: int) -> List[int]:
+        """Tile start offsets along one axis; the last tile is shifted to end flush."""
+        if length <= self.tile_size:
+            return [start]
+        stride = max(1, int(self.tile_size * (1 - self.overlap)))
+        offsets = list(range(start, start + length - self.tile_size, stride))
+        offsets.append(start + length - self.tile_size)
+        return offsets
+
+    def regions(self, frame_shape: Tuple[int, ...]) -> List[Region]:
+        """
+        Crop regions for a frame of the given shape.
+
+        Returns:
+            List of (x1, y1, x2, y2) regions in frame coordinates
+        """
+        height, width = frame_shape[:2]
+        areas = []
+        for x1, y1, x2, y2 in self.rois or [(0, 0, width, height)]:
+            x1, x2 = max(0, min(x1, width)), max(0, min(x2, width))
+            y1, y2 = max(0, min(y1, height)), max(0, min(y2, height))
+            if x2 > x1 and y2 > y1:
+                areas.append((x1, y1, x2, y2))
+
+        regions = []
+        for x1, y1, x2, y2 in areas:
+            for top in self._grid(y1, y2 - y1):
+                for left in self._grid(x1, x2 - x1):
+                    regions.append((left, top,
+                                    min(left + self.tile_size, x2),
+                                    min(top + self.tile_size, y2)))
+
+        # The full frame catches objects larger than a tile
+        if self.full_frame and not self.rois and (0, 0, width, height) not in regions:
+            regions.append((0, 0, width, height))
+        return regions
+
+    def crop(self, frame: np.ndarray) -> Tuple[List[np.ndarray], List[Region]]:
+        """Cut a frame into its crops (views, no copies) and their regions."""
+        regions = self.regions(frame.shape)
+        return [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in regions], regions
+
+    def merge(self, detections: List[Detections], regions: List[Region],
+              names: Optional[Dict[int, str]] = None) -> Detections:
+        """
+        Shift per-crop detections to frame coordinates and remove duplicates.
+
+        Args:
+            detections: Untracked detections of each crop
+            regions: Region each crop was cut from
+            names: Class names of the merged result
+
+        Returns:
+            Detections: Merged detections of the whole frame
+        """
+        if not detections:
+            return Detections.empty(names)
+
+        offsets = [np.tile(np.array(region[:2], dtype=np.float32), 2) for region in regions]
+        xyxy = np.concatenate([d.xyxy + offset for d, offset in zip(detections, offsets)])
+        conf = np.concatenate([d.conf for d in detections])
+        cls = np.concatenate([d.cls for d in detections])
+        merged = Detections(xyxy, conf, cls, names=names if names is not None else detections[0].names)
+
+        if len(detections) == 1:
+            return merged
+        return merged[self._nms(merged)]
+
+    def _nms(self, detections: Detections) -> np.ndarray:
+        """Greedy class-aware NMS; returns the indices to keep, best first."""
+        order = np.argsort(-detections.conf, kind='stable')
+        boxes = detections.xyxy[order]
+        cls = detections.cls[order]
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+        suppressed = np.zeros(len(order), dtype=bool)
+        keep = []
+        for i in range(len(order)):
+            if suppressed[i]:
+                continue
+            keep.append(order[i])
+
+            rest = np.arange(i + 1, len(order))
+            rest = rest[~suppressed[rest] & (cls[rest] == cls[i])]
+            if not len(rest):
+                continue
+            top_left = np.maximum(boxes[i, :2], boxes[rest, :2])
+            bottom_right = np.minimum(boxes[i, 2:], boxes[rest, 2:])
+            intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=1)
+            if self.match_metric == 'ios':
+                denominator = np.minimum(areas[i], areas[rest])
+            else:
+                denominator = areas[i] + areas[rest] - intersection
+            overlap = intersection / np.maximum(denominator, 1e-6)
+            suppressed[rest[overlap > self.nms_threshold]] = True
+
+        return np.array(keep, dtype=np.int64)
@@ -1,7 +1,8 @@
 import cv2
 import numpy as np
 import time
-from typing import Tuple
+from threading import Event
+from typing import Optional, Tuple
 
 class FPSCounter:
     """Simple FPS counter"""
@@ -18,6 +19,78 @@ class FPSCounter:
             return len(self.times) / (self.times[-1] - self.times[0])
         return 0.0
 
+class FramePacer:
+    """
+    Deadline-based frame pacing.
+    
+    Sleeps only for the time left until the next frame deadline, so work done
+    per frame does not add to the frame interval. When a frame overruns by
+    whole intervals, those slots are skipped instead of bursting to catch up.
+    Also reports a smoothed achieved FPS and per-frame latency.
+    """
+    def __init__(self, frame_rate: float = 30, smoothing: float = 0.1):
+        """
+        Args:
+            frame_rate: Target frames per second
+            smoothing: Weight of the newest sample in the moving averages
+        """
+        self.interval = 1.0 / frame_rate
+        self.smoothing = smoothing
+        self.next_deadline = None
+        self.last_frame_time = None
+        self.fps = 0.0
+        self.latency = 0.0
+        self.skipped = 0
+    
+    def wait(self, stop_event: Optional[Event] = None) -> int:
+        """
+        Wait for the next frame deadline.
+        
+        Args:
+            stop_event: Optional event that interrupts the wait
+        
+        Returns:
+            int: Number of frame slots missed since the previous deadline
+        """
+        now = time.perf_counter()
+        if self.next_deadline is None:
+            self.next_deadline = now
+        
+        delay = self.next_deadline - now
+        missed = 0
+        if delay > 0:
+            if stop_event is not None:
+                stop_event.wait(delay)
+            else:
+                time.sleep(delay)
+        else:
+            # Behind schedule: drop the slots we can no longer meet
+            missed = int(-delay // self.interval)
+            self.skipped += missed
+            self.next_deadline += missed * self.interval
+        
+        self.next_deadline += self.interval
+        return missed
+    
+    def frame_done(self, start_time: float):
+        """
+        Record a finished frame.
+        
+        Args:
+            start_time: time.perf_counter() value when the frame was captured
+        """
+        now = time.perf_counter()
+        self.latency = self._smooth(self.latency, now - start_time)
+        if self.last_frame_time is not None and now > self.last_frame_time:
+            self.fps = self._smooth(self.fps, 1.0 / (now - self.last_frame_time))
+        self.last_frame_time = now
+    
+    def _smooth(self, average: float, sample: float) -> float:
+        """Exponential moving average that starts at the first sample."""
+        if average == 0.0:
+            return sample
+        return (1 - self.smoothing) * average + self.smoothing * sample
+
 def resize_with_aspect_ratio(image: np.ndarray, target_width: int = 640) -> np.ndarray:
     """
     Resize image maintaining aspect ratio.
@@ -0,0 +1,111 @@
+import cv2
+import json
+import logging
+import sys
+import time
+from typing import Optional
+
+import numpy as np
+
+from ..detection_and_tracking.detector import YOLODetector
+from ..detection_and_tracking.detections import Detections
+from .video_writer import StreamingVideoWriter
+
+logger = logging.getLogger(__name__)
+
+class HeadlessOutput:
+    """
+    Output sink for running the processor without a display.
+
+    Detections are written as NDJSON: a first line with the class names,
+    then one line per frame with its index and ``Detections.to_dict()``
+    (the same layout as the web results). An annotated image or video is
+    only rendered when a path for it is given, so no drawing or display
+    work is done otherwise. Throughput is reported when the sink closes.
+    """
+    def __init__(self, detections_path: Optional[str] = None,
+                 annotated_path: Optional[str] = None, fps: float = 30.0):
+        """
+        Initialize the sink.
+
+        Args:
+            detections_path: NDJSON detections file, "-" for stdout, or None
+            annotated_path: Annotated video (or image, for single images) file, or None
+            fps: Frame rate of the annotated video
+        """
+        self.detections_path = detections_path
+        self.annotated_path = annotated_path
+        self.fps = fps
+        self.frames = 0
+        self.detections = 0
+        self.start_time = None
+        self._file = None
+        self._writer = None
+
+    def open(self):
+        """Open the detections file and start the throughput clock."""
+        if self.detections_path == '-':
+            self._file = sys.stdout
+        elif self.detections_path:
+            self._file = open(self.detections_path, 'w')
+        self.start_time = time.perf_counter()
+
+    def write(self, detector: YOLODetector, frame: np.ndarray, results: Detections):
+        """Write the detections of one frame, and the annotated frame if requested."""
+        self._record(results)
+
+        if self.annotated_path:
+            # The raw frame is not needed afterwards, so draw straight into it
+            annotated = detector.draw_results(frame, results, in_place=True)
+            if self._writer is None:
+                height, width = annotated.shape[:2]
+                self._writer = StreamingVideoWriter(self.annotated_path, self.fps, (width, height))
+            self._writer.write(annotated)
+
+    def write_image(self, detector: YOLODetector, image: np.ndarray, results: Detections):
+        """Write the detections of a single image and save the annotated image if requested."""
+        self._record(results)
+
+        if self.annotated_path:
+            cv2.imwrite(self.annotated_path, detector.draw_results(image, results, in_place=True))
+
+    def _record(self, results: Detections):
+        """Write the detections line of the next frame and update the counters."""
+        if self._file is not None:
+            if self.frames == 0:
+                self._write_line({'names': results.names})
+            self._write_line({'frame': self.frames, **results.to_dict()})
+
+        self.frames += 1
+        self.detections += len(results)
+
+    def _write_line(self, record: dict):
+        """Write one NDJSON record."""
+        self._file.write(json.dumps(record) + '\n')
+        if self._file is sys.stdout:
+            self._file.flush()
+
+    def close(self):
+        """Close all outputs and report throughput."""
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        if self._file is not None and self._file is not sys.stdout:
+            self._file.close()
+        self._file = None
+
+        if self.start_time is not None:
+            elapsed = time.perf_counter() - self.start_time
+            fps = self.frames / elapsed if elapsed > 0 else 0.0
+            logger.info(f"Processed {self.frames} frames with {self.detections} detections "
+                        f"in {elapsed:.2f}s ({fps:.1f} FPS)")
+            self.start_time = None
+
+    def __enter__(self):
+        """Context manager enter."""
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
@@ -0,0 +1,225 @@
+import logging
+import threading
+from collections import deque
+from threading import Thread, Event
+from typing import Any, Iterator, Optional, Tuple
+
+import numpy as np
+
+from ..detection_and_tracking.detector import YOLODetector
+from ..detection_and_tracking.detections import Detections
+from ..detection_and_tracking.motion import MotionGate
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the stream as it travels through the stage queues
+END_OF_STREAM = object()
+
+class FrameQueue:
+    """
+    Bounded queue between two pipeline stages.
+
+    The policy decides what happens when the producer outruns the consumer:
+        - "block": the producer waits for space (backpressure)
+        - "drop_oldest": the oldest queued item is discarded, so the consumer
+          always gets the newest frame (best for live sources)
+        - "drop_newest": the incoming item is discarded
+    """
+    POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+    def __init__(self, maxsize: int = 2, policy: str = 'block'):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown drop policy: {policy}. Options: {', '.join(self.POLICIES)}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item: Any, timeout: Optional[float] = None, force: bool = False) -> bool:
+        """
+        Add an item according to the queue policy.
+
+        Args:
+            item: Item to enqueue
+            timeout: Maximum time to wait for space in "block" mode
+            force: Always block for space, regardless of policy. Used for
+                   items that must not be lost, such as the end marker.
+
+        Returns:
+            bool: True if the item was queued, False if it was dropped or
+                  the wait timed out
+        """
+        with self._cond:
+            if len(self._items) >= self.maxsize:
+                if self.policy == 'block' or force:
+                    if not self._cond.wait_for(lambda: len(self._items) < self.maxsize, timeout):
+                        return False
+                elif self.policy == 'drop_oldest':
+                    self._items.popleft()
+                    self.dropped += 1
+                else:
+                    self.dropped += 1
+                    return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Remove and return the oldest item.
+
+        Returns:
+            Tuple[bool, Any]: (success, item); success is False on timeout
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._items) > 0, timeout):
+                return False, None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return True, item
+
+    def get_nowait(self) -> Tuple[bool, Any]:
+        """Remove and return the oldest item without waiting."""
+        return self.get(timeout=0)
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._items)
+
+class StreamPipeline:
+    """
+    Threaded capture -> inference pipeline feeding a render stage.
+
+    Capture and inference each run on their own thread and are connected by
+    bounded FrameQueues, so decoding overlaps with inference. The render stage
+    consumes ``results()`` on the calling thread, which keeps OpenCV HighGUI
+    calls on the main thread.
+    """
+    def __init__(self, video, detector: YOLODetector, conf_threshold: float = 0.5,
+                 queue_size: int = 2, drop_policy: str = 'block', batch_size: int = 1,
+                 detect_interval: int = 1, motion_gate: Optional[MotionGate] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            video: VideoCapture instance (must already be started)
+            detector: YOLODetector instance
+            conf_threshold: Confidence threshold for detections
+            queue_size: Capacity of each stage queue
+            drop_policy: Policy applied when a queue is full (see FrameQueue)
+            batch_size: Maximum number of queued frames inferred at once
+            detect_interval: Run the model on every N-th frame only (see
+                             YOLODetector.detect_batch)
+            motion_gate: Skip inference on frames in which nothing moved
+        """
+        self.video = video
+        self.detector = detector
+        self.conf_threshold = conf_threshold
+        self.batch_size = max(1, batch_size)
+        self.detect_interval = detect_interval
+        self.motion_gate = motion_gate
+        self.capture_queue = FrameQueue(queue_size, drop_policy)
+        self.result_queue = FrameQueue(queue_size, drop_policy)
+        self.stop_event = Event()
+        self.threads = []
+
+    def start(self):
+        """Start the capture and inference threads."""
+        self.threads = [
+            Thread(target=self._capture_loop, name='pipeline-capture', daemon=True),
+            Thread(target=self._inference_loop, name='pipeline-inference', daemon=True)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        """Signal all stages to stop and wait for the threads to finish."""
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join(timeout=1)
+        self.threads = []
+
+    @property
+    def dropped_frames(self) -> int:
+        """Total number of frames dropped by the queue policies."""
+        return self.capture_queue.dropped + self.result_queue.dropped
+
+    def _put_end(self, frame_queue: FrameQueue):
+        """Push the end marker, waiting for space unless stopping."""
+        while not self.stop_event.is_set():
+            if frame_queue.put(END_OF_STREAM, timeout=0.1, force=True):
+                return
+
+    def _capture_loop(self):
+        """Capture stage: decode frames and hand them to inference."""
+        try:
+            while not self.stop_event.is_set():
+                success, frame = self.video.read_frame()
+                if not success:
+                    break
+                # Retry on timeout in block mode so no frame is silently lost
+                while not self.stop_event.is_set():
+                    if self.capture_queue.put(frame, timeout=0.1) or \
+                            self.capture_queue.policy != 'block':
+                        break
+        except Exception as e:
+            logger.error(f"Error in capture stage: {e}")
+        finally:
+            self._put_end(self.capture_queue)
+
+    def _inference_loop(self):
+        """Inference stage: run detection and tracking on queued frames."""
+        try:
+            finished = False
+            while not finished and not self.stop_event.is_set():
+                success, item = self.capture_queue.get(timeout=0.1)
+                if not success:
+                    continue
+                if item is END_OF_STREAM:
+                    break
+
+                # Opportunistically batch whatever else is already waiting
+                frames = [item]
+                while len(frames) < self.batch_size:
+                    success, item = self.capture_queue.get_nowait()
+                    if not success:
+                        break
+                    if item is END_OF_STREAM:
+                        finished = True
+                        break
+                    frames.append(item)
+
+                batch_results = self.detector.detect_batch(frames, self.conf_threshold,
+                                                           self.detect_interval,
+                                                           self.motion_gate)
+                for frame, results in zip(frames, batch_results):
+                    while not self.stop_event.is_set():
+                        if self.result_queue.put((frame, results), timeout=0.1) or \
+                                self.result_queue.policy != 'block':
+                            break
+        except Exception as e:
+            logger.error(f"Error in inference stage: {e}")
+        finally:
+            self._put_end(self.result_queue)
+
+    def results(self) -> Iterator[Tuple[np.ndarray, Detections]]:
+        """Yield (frame, detections) pairs in order until the stream ends."""
+        while not self.stop_event.is_set():
+            success, item = self.result_queue.get(timeout=0.1)
+            if not success:
+                continue
+            if item is END_OF_STREAM:
+                break
+            yield item
+
+    def __enter__(self):
+        """Context manager enter."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.stop()
@@ -1,13 +1,22 @@
 import cv2
 import logging
+from typing import Dict, Optional
 from .video_capture import VideoCapture
-from .display_utils import FPSCounter, create_side_by_side_display, add_fps_to_frames
+from .display_utils import FPSCounter
+from .renderer import OverlayRenderer
+from .headless import HeadlessOutput
+from .pipeline import StreamPipeline
 from ..detection_and_tracking.detector import YOLODetector
+from ..detection_and_tracking.motion import MotionGate
 
 logger = logging.getLogger(__name__)
 
 def process_live_video(detector: YOLODetector, conf_threshold: float = 0.5, 
-                      display_width: int = 640, camera_id: int = 1):
+                      display_width: int = 640, camera_id: int = 1,
+                      pipelined: bool = False, drop_policy: str = 'drop_oldest',
+                      output: Optional[HeadlessOutput] = None, detect_interval: int = 1,
+                      motion_gate: Optional[MotionGate] = None,
+                      capture_options: Optional[Dict] = None):
     """
     Process live video from webcam.
     
@@ -15,15 +24,32 @@ def process_live_video(detector: YOLODetector, conf_threshold: float = 0.5,
         detector: YOLODetector instance
         conf_threshold: Confidence threshold for detections
         display_width: Width of each frame in the display
+        pipelined: Run capture, inference and render on separate threads
+        drop_policy: Queue policy in pipelined mode. The default keeps only
+                     the newest frame so a live feed never falls behind.
+        output: Write results to this sink instead of showing them. Stop
+                the run with Ctrl+C.
+        detect_interval: Run the model on every N-th frame only and
+                         extrapolate tracked boxes in between
+        motion_gate: Skip inference while the scene is static
+        capture_options: Extra VideoCapture arguments (prefetch, backend,
+                         decode_threads, hw_acceleration, decode_width)
     """
     fps_counter = FPSCounter()
     
-    with VideoCapture(camera_id) as video:
+    with VideoCapture(camera_id, **(capture_options or {})) as video:
         logger.info("Video capture started")
-        process_video_stream(video, detector, fps_counter, conf_threshold, display_width)
+        process_video_stream(video, detector, fps_counter, conf_threshold, display_width,
+                             pipelined=pipelined, drop_policy=drop_policy, queue_size=1,
+                             output=output, detect_interval=detect_interval,
+                             motion_gate=motion_gate)
 
 def process_video_file(detector: YOLODetector, video_path: str, conf_threshold: float = 0.5,
-                      display_width: int = 640):
+                      display_width: int = 640, batch_size: int = 8,
+                      pipelined: bool = False, drop_policy: str = 'block',
+                      output: Optional[HeadlessOutput] = None, detect_interval: int = 1,
+                      motion_gate: Optional[MotionGate] = None,
+                      capture_options: Optional[Dict] = None):
     """
     Process video file.
     
@@ -32,15 +58,46 @@ def process_video_file(detector: YOLODetector, video_path: str, conf_threshold:
         video_path: Path to video file
         conf_threshold: Confidence threshold for detections
         display_width: Width of each frame in the display
+        batch_size: Number of frames to run through the model at once
+        pipelined: Run capture, inference and render on separate threads
+        drop_policy: Queue policy in pipelined mode. The default applies
+                     backpressure so every frame of the file is processed.
+        output: Write results to this sink instead of showing them
+        detect_interval: Run the model on every N-th frame only and
+                         extrapolate tracked boxes in between
+        motion_gate: Skip inference while the scene is static
+        capture_options: Extra VideoCapture arguments (prefetch, backend,
+                         decode_threads, hw_acceleration, decode_width)
     """
     fps_counter = FPSCounter()
     
-    with VideoCapture(video_path) as video:
+    with VideoCapture(video_path, **(capture_options or {})) as video:
         logger.info(f"Processing video: {video_path}")
-        process_video_stream(video, detector, fps_counter, conf_threshold, display_width)
+        process_video_stream(video, detector, fps_counter, conf_threshold, display_width,
+                             batch_size=batch_size, pipelined=pipelined,
+                             drop_policy=drop_policy, queue_size=max(2, batch_size),
+                             output=output, detect_interval=detect_interval,
+                             motion_gate=motion_gate)
+
+def render_frame(detector: YOLODetector, frame, results, fps_counter: FPSCounter,
+                 renderer: OverlayRenderer) -> bool:
+    """
+    Draw results for one frame and show the side-by-side display.
+    
+    Returns:
+        bool: False if the user asked to quit
+    """
+    display_frame = renderer.render(detector, frame, results, fps_counter.update())
+    cv2.imshow('Object Detection & Tracking', display_frame)
+
+    return not (cv2.waitKey(1) & 0xFF == ord('q'))
 
 def process_video_stream(video, detector: YOLODetector, fps_counter: FPSCounter, 
-                        conf_threshold: float = 0.5, display_width: int = 640):
+                        conf_threshold: float = 0.5, display_width: int = 640,
+                        batch_size: int = 1, pipelined: bool = False,
+                        drop_policy: str = 'block', queue_size: int = 2,
+                        output: Optional[HeadlessOutput] = None, detect_interval: int = 1,
+                        motion_gate: Optional[MotionGate] = None):
     """
     Common video processing loop for both live and file inputs.
     
@@ -50,34 +107,75 @@ def process_video_stream(video, detector: YOLODetector, fps_counter: FPSCounter,
         fps_counter: FPSCounter instance
         conf_threshold: Confidence threshold for detections
         display_width: Width of each frame in the display
+        batch_size: Number of frames to run through the model at once.
+                    Keep at 1 for live sources to avoid added latency.
+        pipelined: Run capture and inference on their own threads, connected
+                   to the render loop by bounded queues
+        drop_policy: What a full queue does in pipelined mode:
+                     "block", "drop_oldest" or "drop_newest"
+        queue_size: Capacity of each queue in pipelined mode
+        output: Headless sink. When given, results are written to it and
+                nothing is drawn or shown unless it asks for annotated video.
+        detect_interval: Run the model on every N-th frame only. Boxes on the
+                         frames in between are predicted from the tracker's
+                         motion model and marked as interpolated.
+        motion_gate: Change detector in front of the model. While it reports
+                     a static scene, the last detections are reused.
     """
-    while True:
-        success, frame = video.read_frame()
-        if not success:
-            break
-
-        # Get detections and tracks
-        results = detector.detect_and_track(frame, conf_threshold)
+    if output is not None:
+        if video.fps > 0:
+            output.fps = video.fps
         
-        # Draw results
-        frame_with_results = detector.draw_results(frame, results)
+        def handle(frame, results) -> bool:
+            output.write(detector, frame, results)
+            return True
+    else:
+        renderer = OverlayRenderer(display_width)
+        
+        def handle(frame, results) -> bool:
+            return render_frame(detector, frame, results, fps_counter, renderer)
+    
+    try:
+        if pipelined:
+            with StreamPipeline(video, detector, conf_threshold, queue_size=queue_size,
+                                drop_policy=drop_policy, batch_size=batch_size,
+                                detect_interval=detect_interval,
+                                motion_gate=motion_gate) as pipeline:
+                for frame, results in pipeline.results():
+                    if not handle(frame, results):
+                        break
+            if pipeline.dropped_frames:
+                logger.info(f"Dropped {pipeline.dropped_frames} frames to keep up with the source")
+            return
 
-        fps = fps_counter.update()
-        frame_copy, frame_with_results = add_fps_to_frames(
-            frame, frame_with_results, fps)
+        while True:
+            # Read the next batch of frames
+            frames = []
+            while len(frames) < batch_size:
+                success, frame = video.read_frame()
+                if not success:
+                    break
+                frames.append(frame)
+            if not frames:
+                break
 
-        display_frame = create_side_by_side_display(
-            frame_copy, 
-            frame_with_results,
-            target_width=display_width
-        )
-        cv2.imshow('Object Detection & Tracking', display_frame)
+            # Get detections and tracks for the whole batch
+            batch_results = detector.detect_batch(frames, conf_threshold, detect_interval, motion_gate)
+        
+            for frame, results in zip(frames, batch_results):
+                if not handle(frame, results):
+                    return
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+            # A short batch means the source is exhausted
+            if len(frames) < batch_size:
+                break
+    finally:
+        if motion_gate is not None:
+            logger.info(f"Motion gate skipped inference on {motion_gate.skipped} of "
+                        f"{motion_gate.frames} frames ({motion_gate.skip_ratio:.1%})")
 
 def process_image(detector: YOLODetector, image_path: str, conf_threshold: float = 0.5,
-                 display_width: int = 640):
+                 display_width: int = 640, output: Optional[HeadlessOutput] = None):
     """
     Process single image.
     
@@ -86,6 +184,7 @@ def process_image(detector: YOLODetector, image_path: str, conf_threshold: float
         image_path: Path to image file
         conf_threshold: Confidence threshold for detections
         display_width: Width of each frame in the display
+        output: Write results to this sink instead of showing them
     """
     logger.info(f"Processing image: {image_path}")
     
@@ -95,13 +194,11 @@ def process_image(detector: YOLODetector, image_path: str, conf_threshold: float
             raise ValueError(f"Could not read image: {image_path}")
             
         results = detector.detect_and_track(image, conf_threshold)
-        image_with_results = detector.draw_results(image, results)
+        if output is not None:
+            output.write_image(detector, image, results)
+            return
         
-        display_frame = create_side_by_side_display(
-            image, 
-            image_with_results,
-            target_width=display_width
-        )
+        display_frame = OverlayRenderer(display_width).render(detector, image, results)
         cv2.imshow('Object Detection & Tracking', display_frame)
         cv2.waitKey(0)
         
@@ -0,0 +1,86 @@
+import cv2
+import numpy as np
+from typing import Optional, Tuple
+
+from ..detection_and_tracking.detector import YOLODetector, draw_overlay
+from ..detection_and_tracking.detections import Detections
+
+class OverlayRenderer:
+    """
+    Single-pass renderer for the side-by-side display.
+
+    Keeps one preallocated canvas with a label strip on top and two halves
+    below. Each frame is resized once, straight into the left half, copied
+    to the right half, and boxes, labels, trajectories and the FPS text are
+    then drawn in place at display scale. No intermediate full-size copies
+    of the frame are made.
+    """
+    LABEL_HEIGHT = 30
+
+    def __init__(self, target_width: int = 640, labels: bool = True):
+        """
+        Initialize the renderer.
+
+        Args:
+            target_width: Width of each half of the display
+            labels: Whether to draw the "Original"/"Detection" label strip
+        """
+        self.target_width = int(target_width)
+        self.labels = labels
+        self.canvas: Optional[np.ndarray] = None
+        self._frame_shape: Optional[Tuple[int, int]] = None
+        self._original = None
+        self._detection = None
+        self.scale = 1.0
+
+    def _allocate(self, frame_shape: Tuple[int, int]):
+        """(Re)allocate the canvas for a new source frame size."""
+        height, width = frame_shape
+        self.scale = self.target_width / float(width)
+        display_height = int(height * self.scale)
+        top = self.LABEL_HEIGHT if self.labels else 0
+
+        self.canvas = np.zeros((top + display_height, 2 * self.target_width, 3), dtype=np.uint8)
+        self._original = self.canvas[top:, :self.target_width]
+        self._detection = self.canvas[top:, self.target_width:]
+        self._frame_shape = frame_shape
+
+        # The label strip never changes, so it is drawn only once
+        if self.labels:
+            cv2.putText(self.canvas, "Original", (self.target_width//4, 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            cv2.putText(self.canvas, "Detection", (self.target_width + self.target_width//4, 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+
+    def render(self, detector: YOLODetector, frame: np.ndarray, results: Detections,
+               fps: Optional[float] = None) -> np.ndarray:
+        """
+        Render one frame and its detections into the canvas.
+
+        Args:
+            detector: Detector whose trajectory state is drawn
+            frame: Source frame, left untouched
+            results: Detections in source frame coordinates
+            fps: FPS value to show on both halves, or None to hide it
+
+        Returns:
+            The shared canvas. It is overwritten by the next call.
+        """
+        if self._frame_shape != frame.shape[:2]:
+            self._allocate(frame.shape[:2])
+
+        cv2.resize(frame, (self._original.shape[1], self._original.shape[0]),
+                   dst=self._original, interpolation=cv2.INTER_AREA)
+        np.copyto(self._detection, self._original)
+
+        draw_overlay(self._detection, results, detector.trajectory_manager, scale=self.scale)
+
+        if fps is not None:
+            fps_text = f"FPS: {fps:.1f}"
+            font_scale = self.target_width / 500.0
+            thickness = max(1, int(font_scale * 2))
+            for half in (self._original, self._detection):
+                cv2.putText(half, fps_text, (10, 30),
+                            cv2.FONT_HERSHEY_SIMPLEX, font_scale, (0, 255, 0), thickness)
+
+        return self.canvas
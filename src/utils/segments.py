@@ -0,0 +1,212 @@
+import json
+import logging
+import shutil
+import subprocess
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def probe_keyframes(video_path: str, fps: float) -> Optional[List[int]]:
+    """
+    Find keyframe indices of a video with ffprobe.
+
+    Args:
+        video_path: Path to video file
+        fps: Frame rate used to convert timestamps to frame indices
+
+    Returns:
+        Sorted keyframe indices, or None if ffprobe is unavailable or fails
+    """
+    ffprobe = shutil.which('ffprobe')
+    if ffprobe is None or fps <= 0:
+        return None
+
+    try:
+        output = subprocess.run(
+            [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'packet=pts_time,flags', '-of', 'json', video_path],
+            capture_output=True, check=True, timeout=60
+        ).stdout
+        packets = json.loads(output).get('packets', [])
+    except Exception as e:
+        logger.warning(f"Could not probe keyframes of {video_path}: {e}")
+        return None
+
+    keyframes = {
+        int(round(float(packet['pts_time']) * fps))
+        for packet in packets
+        if 'K' in packet.get('flags', '') and 'pts_time' in packet
+    }
+    return sorted(keyframes) or None
+
+def plan_segments(total_frames: int, num_segments: int,
+                  keyframes: Optional[List[int]] = None,
+                  min_frames: int = 1) -> List[Tuple[int, int]]:
+    """
+    Split a video into contiguous frame ranges.
+
+    Boundaries are placed evenly and then snapped to the nearest keyframe
+    when keyframes are known, so each segment can be decoded independently.
+
+    Args:
+        total_frames: Number of frames in the video
+        num_segments: Desired number of segments
+        keyframes: Optional keyframe indices to align boundaries to
+        min_frames: Minimum number of frames per segment
+
+    Returns:
+        List of (start, end) frame ranges, end exclusive
+    """
+    if total_frames <= 0:
+        return [(0, 0)]
+    num_segments = max(1, min(num_segments, total_frames // max(1, min_frames)))
+
+    boundaries = [0]
+    for i in range(1, num_segments):
+        target = round(i * total_frames / num_segments)
+        if keyframes:
+            target = min(keyframes, key=lambda k: abs(k - target))
+        # Skip boundaries that would create a segment that is too short
+        if target - boundaries[-1] >= min_frames and total_frames - target >= min_frames:
+            boundaries.append(target)
+    boundaries.append(total_frames)
+
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+def box_iou(boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+    """
+    Pairwise IoU between two sets of xyxy boxes.
+
+    Returns:
+        (N, M) IoU matrix
+    """
+    boxes1 = np.asarray(boxes1, dtype=np.float32).reshape(-1, 4)
+    boxes2 = np.asarray(boxes2, dtype=np.float32).reshape(-1, 4)
+
+    top_left = np.maximum(boxes1[:, None, :2], boxes2[None, :, :2])
+    bottom_right = np.minimum(boxes1[:, None, 2:], boxes2[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(axis=2)
+
+    area1 = (boxes1[:, 2:] - boxes1[:, :2]).prod(axis=1)
+    area2 = (boxes2[:, 2:] - boxes2[:, :2]).prod(axis=1)
+    union = area1[:, None] + area2[None, :] - intersection
+
+    return intersection / np.maximum(union, 1e-6)
+
+def _match_frame(prev: Dict, cur: Dict, iou_threshold: float) -> List[Tuple[int, int]]:
+    """Greedily match tracked boxes of the same class in two views of one frame."""
+    prev_ids = np.asarray(prev['track_id'], dtype=np.int64)
+    cur_ids = np.asarray(cur['track_id'], dtype=np.int64)
+    prev_mask, cur_mask = prev_ids >= 0, cur_ids >= 0
+    if not prev_mask.any() or not cur_mask.any():
+        return []
+
+    iou = box_iou(np.asarray(prev['xyxy'])[prev_mask], np.asarray(cur['xyxy'])[cur_mask])
+    same_class = np.asarray(prev['cls'])[prev_mask][:, None] == np.asarray(cur['cls'])[cur_mask][None, :]
+    iou[~same_class] = 0
+
+    pairs = []
+    prev_ids, cur_ids = prev_ids[prev_mask], cur_ids[cur_mask]
+    while iou.size and iou.max() >= iou_threshold:
+        i, j = np.unravel_index(np.argmax(iou), iou.shape)
+        pairs.append((int(prev_ids[i]), int(cur_ids[j])))
+        iou[i, :] = 0
+        iou[:, j] = 0
+    return pairs
+
+class TrackIdReconciler:
+    """
+    Map the local track IDs of consecutive segments to globally consistent IDs.
+
+    Every segment except the first re-processes a short warm-up window of
+    frames that the previous segment already emitted. Tracks are matched by
+    IoU on those shared frames; matched tracks inherit the previous
+    segment's global ID, all others get a new one in order of first
+    appearance. Segments are fed one frame at a time, and only the last
+    ``tail`` frames of the previous segment are kept for matching, so a
+    whole video never has to be held in memory.
+    """
+    def __init__(self, tail: int, iou_threshold: float = 0.5):
+        """
+        Initialize the reconciler.
+
+        Args:
+            tail: Frames of a segment kept to match the next one against,
+                  at least the length of the longest warm-up window
+            iou_threshold: Minimum IoU for two boxes to be the same object
+        """
+        self.iou_threshold = iou_threshold
+        self.mapping: Dict[int, int] = {}
+        self.next_id = 1
+        self._tail = deque(maxlen=max(0, tail))
+
+    def start_segment(self, warmup: List[Dict]):
+        """
+        Begin the next segment, matching its tracks to the previous one.
+
+        Args:
+            warmup: Per-frame Detections.to_dict() outputs of the segment's
+                    warm-up window
+        """
+        prev_frames, prev_mapping = list(self._tail), self.mapping
+        self._tail.clear()
+        self.mapping = {}
+
+        shared = min(len(warmup), len(prev_frames))
+        if not shared:
+            return
+
+        # Count how often each (previous, current) track pair matches
+        votes = defaultdict(int)
+        for prev, cur in zip(prev_frames[len(prev_frames) - shared:], warmup[len(warmup) - shared:]):
+            for pair in _match_frame(prev, cur, self.iou_threshold):
+                votes[pair] += 1
+
+        # Strongest matches first, each track used at most once
+        used = set()
+        for (prev_id, cur_id), _ in sorted(votes.items(), key=lambda item: -item[1]):
+            if cur_id in self.mapping or prev_id in used or prev_id not in prev_mapping:
+                continue
+            self.mapping[cur_id] = prev_mapping[prev_id]
+            used.add(prev_id)
+
+    def remap(self, frame: Dict) -> Dict:
+        """Return an emitted frame of the current segment with global track IDs."""
+        for track_id in frame['track_id']:
+            if track_id >= 0 and track_id not in self.mapping:
+                self.mapping[track_id] = self.next_id
+                self.next_id += 1
+        self._tail.append(frame)
+        return remap_track_ids(frame, self.mapping)
+
+def reconcile_track_ids(segments: List[Dict], iou_threshold: float = 0.5) -> List[Dict[int, int]]:
+    """
+    Map the local track IDs of each segment to globally consistent IDs.
+
+    Args:
+        segments: Segment results in order, each with "warmup" and "frames"
+                  lists of per-frame Detections.to_dict() outputs
+        iou_threshold: Minimum IoU for two boxes to be the same object
+
+    Returns:
+        One {local_id: global_id} mapping per segment
+    """
+    tail = max((len(segment.get('warmup', [])) for segment in segments), default=0)
+    reconciler = TrackIdReconciler(tail, iou_threshold)
+    mappings = []
+    for segment in segments:
+        reconciler.start_segment(segment.get('warmup', []))
+        for frame in segment['frames']:
+            reconciler.remap(frame)
+        mappings.append(reconciler.mapping)
+    return mappings
+
+def remap_track_ids(frame: Dict, mapping: Dict[int, int]) -> Dict:
+    """Return a copy of a per-frame detections dict with global track IDs."""
+    remapped = dict(frame)
+    remapped['track_id'] = [mapping.get(track_id, -1) if track_id >= 0 else -1
+                            for track_id in frame['track_id']]
+    return remapped
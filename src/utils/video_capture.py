@@ -1,52 +1,195 @@
 import cv2
 import numpy as np
 import logging
-from typing import Optional, Tuple
+import os
+from threading import Thread, Event
+from typing import Optional, Tuple, Union
+
+from .pipeline import FrameQueue, END_OF_STREAM
+
+# OpenCV capture backends selectable by name
+CAPTURE_BACKENDS = {
+    'any': cv2.CAP_ANY,
+    'ffmpeg': cv2.CAP_FFMPEG,
+    'gstreamer': cv2.CAP_GSTREAMER,
+    'v4l2': cv2.CAP_V4L2,
+    'dshow': cv2.CAP_DSHOW,
+    'msmf': cv2.CAP_MSMF,
+    'avfoundation': cv2.CAP_AVFOUNDATION
+}
 
 class VideoCapture:
     """
     A class to handle video capture operations.
+
+    Optionally decodes on a background thread into a bounded queue, so
+    decoding overlaps with whatever consumes the frames. Files block the
+    decoder when the queue is full; live sources only keep the newest frame,
+    so readers never lag behind the camera.
     """
-    def __init__(self, source: int = 0):
+    def __init__(self, source: Union[int, str] = 0, prefetch: int = 0,
+                 backend: str = 'any', decode_threads: Optional[int] = None,
+                 hw_acceleration: bool = False, decode_width: Optional[int] = None,
+                 start_frame: int = 0):
         """
         Initialize the video capture.
-        
+
         Args:
-            source (int): Camera index or video file path. Default is 0 (webcam)
+            source (Union[int, str]): Camera index or video file path. Default is 0 (webcam)
+            prefetch (int): Size of the decoded frame queue; 0 decodes on the
+                            calling thread
+            backend (str): Capture backend, one of CAPTURE_BACKENDS
+            decode_threads (Optional[int]): Number of decoder threads (FFmpeg)
+            hw_acceleration (bool): Ask the backend for hardware decoding if available
+            decode_width (Optional[int]): Deliver frames at this width, keeping the
+                            aspect ratio. Cameras are asked for the lower resolution
+                            directly; files are downscaled on the decoder thread.
+            start_frame (int): Seek to this frame before reading (files only)
         """
+        if backend not in CAPTURE_BACKENDS:
+            raise ValueError(f"Unknown capture backend: {backend}. "
+                             f"Options: {', '.join(CAPTURE_BACKENDS)}")
         self.source = source
+        self.prefetch = prefetch
+        self.backend = backend
+        self.decode_threads = decode_threads
+        self.hw_acceleration = hw_acceleration
+        self.decode_width = decode_width
+        self.start_frame = start_frame
         self.cap = None
         self.logger = logging.getLogger(__name__)
+        self._queue: Optional[FrameQueue] = None
+        self._thread: Optional[Thread] = None
+        self._stop_event = Event()
+        self._decode_size: Optional[Tuple[int, int]] = None
+
+    @property
+    def is_live(self) -> bool:
+        """True for camera indices, False for files and URLs."""
+        return isinstance(self.source, int)
+
+    def _open_params(self) -> list:
+        """Backend properties applied while opening the source."""
+        params = []
+        if self.hw_acceleration:
+            params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        if self.decode_threads:
+            if hasattr(cv2, 'CAP_PROP_N_THREADS'):
+                params += [cv2.CAP_PROP_N_THREADS, self.decode_threads]
+            else:
+                # Older OpenCV builds only take FFmpeg options from the environment
+                os.environ.setdefault('OPENCV_FFMPEG_CAPTURE_OPTIONS', f'threads;{self.decode_threads}')
+        return params
 
     def start(self) -> bool:
         """
         Start the video capture.
-        
+
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            self.cap = cv2.VideoCapture(self.source)
+            params = self._open_params()
+            api = CAPTURE_BACKENDS[self.backend]
+            if params:
+                self.cap = cv2.VideoCapture(self.source, api, params)
+            else:
+                self.cap = cv2.VideoCapture(self.source, api)
             if not self.cap.isOpened():
                 self.logger.error("Failed to open video capture")
                 return False
+
+            self._configure_resolution()
+            if self.start_frame and not self.is_live:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.start_frame)
+
+            if self.prefetch > 0:
+                # Live sources keep just the newest frame so readers never lag behind
+                if self.is_live:
+                    self._queue = FrameQueue(1, 'drop_oldest')
+                else:
+                    self._queue = FrameQueue(self.prefetch, 'block')
+                self._stop_event.clear()
+                self._thread = Thread(target=self._decode_loop, name='video-decode', daemon=True)
+                self._thread.start()
             return True
         except Exception as e:
             self.logger.error(f"Error starting video capture: {str(e)}")
             return False
 
+    def _configure_resolution(self):
+        """Work out the delivered frame size for reduced-resolution decoding."""
+        self._decode_size = None
+        if not self.decode_width:
+            return
+
+        width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
+        height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
+        if width <= self.decode_width or height <= 0:
+            return
+        target = (int(self.decode_width), int(round(height * self.decode_width / width)))
+
+        if self.is_live:
+            # Cameras can usually deliver a lower mode, which saves decoding too
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, target[0])
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, target[1])
+            if self.cap.get(cv2.CAP_PROP_FRAME_WIDTH) <= target[0]:
+                return
+        self._decode_size = target
+
+    def _read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Decode one frame, downscaled if requested."""
+        ret, frame = self.cap.read()
+        if not ret:
+            return False, None
+        if self._decode_size is not None and frame.shape[1] != self._decode_size[0]:
+            frame = cv2.resize(frame, self._decode_size, interpolation=cv2.INTER_AREA)
+        return True, frame
+
+    def _decode_loop(self):
+        """Decoder thread: fill the frame queue until the source ends."""
+        frame_queue = self._queue
+        try:
+            while not self._stop_event.is_set():
+                ret, frame = self._read()
+                if not ret:
+                    break
+                # Retry on timeout for files so no frame is silently lost
+                while not self._stop_event.is_set():
+                    if frame_queue.put(frame, timeout=0.1) or self.is_live:
+                        break
+        except Exception as e:
+            self.logger.error(f"Error decoding frame: {str(e)}")
+        finally:
+            while not self._stop_event.is_set():
+                if frame_queue.put(END_OF_STREAM, timeout=0.1, force=True):
+                    break
+
     def read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
         """
         Read a frame from the video capture.
-        
+
         Returns:
             Tuple[bool, Optional[np.ndarray]]: (success, frame)
         """
         if self.cap is None:
             return False, None
-        
+
         try:
-            ret, frame = self.cap.read()
+            if self._queue is not None:
+                while not self._stop_event.is_set():
+                    success, frame = self._queue.get(timeout=0.1)
+                    if not success:
+                        continue
+                    if frame is END_OF_STREAM:
+                        # Leave the marker for any further reads
+                        self._queue.put(END_OF_STREAM, force=True)
+                        break
+                    return True, frame
+                self.logger.warning("Failed to read frame")
+                return False, None
+
+            ret, frame = self._read()
             if not ret:
                 self.logger.warning("Failed to read frame")
                 return False, None
@@ -55,8 +198,34 @@ class VideoCapture:
             self.logger.error(f"Error reading frame: {str(e)}")
             return False, None
 
+    def get(self, prop: int) -> float:
+        """Read a raw OpenCV capture property."""
+        return self.cap.get(prop) if self.cap is not None else 0.0
+
+    @property
+    def fps(self) -> float:
+        """Frame rate reported by the source."""
+        return self.get(cv2.CAP_PROP_FPS)
+
+    @property
+    def frame_count(self) -> int:
+        """Number of frames in the source, 0 if unknown."""
+        return max(0, int(self.get(cv2.CAP_PROP_FRAME_COUNT)))
+
+    @property
+    def frame_size(self) -> Tuple[int, int]:
+        """(width, height) of the delivered frames."""
+        if self._decode_size is not None:
+            return self._decode_size
+        return int(self.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
     def release(self):
         """Release the video capture resources."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self._queue = None
         if self.cap is not None:
             self.cap.release()
             self.cap = None
@@ -68,4 +237,4 @@ class VideoCapture:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit."""
-        self.release() 
\ No newline at end of file
+        self.release()
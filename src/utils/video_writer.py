@@ -0,0 +1,136 @@
+import cv2
+import logging
+import shutil
+import subprocess
+from pathlib import Path
+from threading import Thread
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .pipeline import FrameQueue, END_OF_STREAM
+
+logger = logging.getLogger(__name__)
+
+# Containers that support fragmented output, playable while still being written
+FRAGMENTED_CONTAINERS = ('.mp4', '.m4v', '.mov')
+
+class StreamingVideoWriter:
+    """
+    Video writer that pipes raw frames to a background FFmpeg process.
+
+    Frames are handed to a writer thread through a bounded queue, so encoding
+    overlaps with whatever produces them. Output is H.264 in yuv420p, which
+    browsers can play. MP4 files are written as fragmented MP4, so the file
+    is playable while the job is still running. Without FFmpeg on the PATH,
+    the writer falls back to cv2.VideoWriter.
+    """
+    def __init__(self, path: str, fps: float, frame_size: Tuple[int, int],
+                 crf: int = 23, preset: str = 'veryfast', queue_size: int = 16):
+        """
+        Initialize the writer and start the encoder.
+
+        Args:
+            path: Output file
+            fps: Output frame rate
+            frame_size: (width, height) of the frames that will be written
+            crf: x264 quality, lower is better
+            preset: x264 speed preset
+            queue_size: Frames buffered between producer and encoder
+        """
+        self.path = str(path)
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.frame_size = tuple(int(v) for v in frame_size)
+        self.frames_written = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._fallback: Optional[cv2.VideoWriter] = None
+        self._queue = FrameQueue(queue_size, 'block')
+        self._thread: Optional[Thread] = None
+
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is not None:
+            self._process = subprocess.Popen(
+                self._ffmpeg_command(ffmpeg, crf, preset),
+                stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+        else:
+            logger.warning("ffmpeg not found, falling back to cv2.VideoWriter (mp4v)")
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            self._fallback = cv2.VideoWriter(self.path, fourcc, self.fps, self.frame_size)
+
+        self._thread = Thread(target=self._write_loop, name='video-encode', daemon=True)
+        self._thread.start()
+
+    @property
+    def is_streaming(self) -> bool:
+        """True if the output can be played while it is being written."""
+        return self._process is not None and Path(self.path).suffix.lower() in FRAGMENTED_CONTAINERS
+
+    def _ffmpeg_command(self, ffmpeg: str, crf: int, preset: str) -> list:
+        """FFmpeg arguments reading BGR frames from stdin."""
+        width, height = self.frame_size
+        command = [
+            ffmpeg, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}', '-r', str(self.fps), '-i', '-',
+            # yuv420p needs even dimensions
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+            '-c:v', 'libx264', '-preset', preset, '-crf', str(crf),
+            '-pix_fmt', 'yuv420p'
+        ]
+        if Path(self.path).suffix.lower() in FRAGMENTED_CONTAINERS:
+            command += ['-movflags', 'frag_keyframe+empty_moov+default_base_moof']
+        return command + [self.path]
+
+    def write(self, frame: np.ndarray):
+        """Queue a frame for encoding; blocks while the encoder is behind."""
+        if frame.shape[1::-1] != self.frame_size:
+            frame = cv2.resize(frame, self.frame_size, interpolation=cv2.INTER_AREA)
+        self._queue.put(frame)
+
+    def _write_loop(self):
+        """Encoder thread: feed queued frames to the encoder."""
+        while True:
+            _, frame = self._queue.get()
+            if frame is END_OF_STREAM:
+                break
+            try:
+                if self._process is not None:
+                    self._process.stdin.write(np.ascontiguousarray(frame).tobytes())
+                else:
+                    self._fallback.write(frame)
+                self.frames_written += 1
+            except (BrokenPipeError, OSError) as e:
+                logger.error(f"Video encoder stopped accepting frames: {e}")
+                # Keep draining so producers never block on a dead encoder
+                continue
+
+    def release(self):
+        """Flush queued frames and finish the file."""
+        if self._thread is None:
+            return
+        self._queue.put(END_OF_STREAM, force=True)
+        self._thread.join()
+        self._thread = None
+
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+            _, stderr = self._process.communicate()
+            if self._process.returncode != 0:
+                logger.error(f"ffmpeg exited with code {self._process.returncode}: "
+                             f"{stderr.decode(errors='replace').strip()}")
+            self._process = None
+        if self._fallback is not None:
+            self._fallback.release()
+            self._fallback = None
+
+    def __enter__(self):
+        """Context manager enter."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.release()
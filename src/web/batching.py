@@ -0,0 +1,151 @@
+import logging
+import time
+from collections import deque
+from threading import Thread, Event, Condition
+from typing import List, Optional
+
+import numpy as np
+
+from ..detection_and_tracking.detector import YOLODetector
+from ..detection_and_tracking.detections import Detections
+
+logger = logging.getLogger(__name__)
+
+class ServerBusyError(Exception):
+    """Raised when the inference queue is full."""
+
+class InferenceTimeoutError(Exception):
+    """Raised when a request is not answered in time."""
+
+class InferenceRequest:
+    """A single image waiting for inference."""
+    def __init__(self, image: np.ndarray, conf_threshold: float):
+        self.image = image
+        self.conf_threshold = conf_threshold
+        self.done = Event()
+        self.result: Optional[Detections] = None
+        self.error: Optional[Exception] = None
+        self.cancelled = False
+
+class BatchInferenceServer:
+    """
+    Micro-batching front end for a shared detector.
+
+    Concurrent requests are collected for up to ``max_wait_ms`` (or until
+    ``max_batch_size`` images are waiting) and run as one letterboxed batch.
+    Each caller is then handed its own untracked detections. The queue is
+    bounded: when it is full, new requests fail fast with ServerBusyError
+    instead of piling up.
+    """
+    def __init__(self, detector: YOLODetector, max_batch_size: int = 8,
+                 max_wait_ms: float = 5, max_queue_size: int = 32,
+                 timeout: float = 10.0):
+        """
+        Initialize the server.
+
+        Args:
+            detector: Detector whose model runs the batches
+            max_batch_size: Maximum number of images per forward pass
+            max_wait_ms: How long to wait for more requests after the first
+            max_queue_size: Maximum number of queued requests
+            timeout: Seconds a caller waits for its result
+        """
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+        self.timeout = timeout
+        self._queue = deque()
+        self._cond = Condition()
+        self._stop_event = Event()
+        self._thread = None
+
+    def start(self):
+        """Start the batching thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = Thread(target=self._serve, name='batch-inference', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the batching thread."""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a batch."""
+        with self._cond:
+            return len(self._queue)
+
+    def submit(self, image: np.ndarray, conf_threshold: float = 0.5) -> Detections:
+        """
+        Queue an image and wait for its detections.
+
+        Raises:
+            ServerBusyError: If the queue is full
+            InferenceTimeoutError: If no result arrives within the timeout
+        """
+        self.start()
+        request = InferenceRequest(image, conf_threshold)
+
+        with self._cond:
+            if len(self._queue) >= self.max_queue_size:
+                raise ServerBusyError("Inference queue is full, try again later")
+            self._queue.append(request)
+            self._cond.notify_all()
+
+        if not request.done.wait(self.timeout):
+            # Let the batching thread skip it if it has not started yet
+            request.cancelled = True
+            raise InferenceTimeoutError(f"No inference result within {self.timeout}s")
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _collect_batch(self) -> List[InferenceRequest]:
+        """Wait for a first request, then gather more until full or the window closes."""
+        with self._cond:
+            while not self._queue and not self._stop_event.is_set():
+                self._cond.wait(timeout=0.1)
+
+            deadline = time.monotonic() + self.max_wait
+            while len(self._queue) < self.max_batch_size and not self._stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(timeout=remaining)
+
+            batch = []
+            while self._queue and len(batch) < self.max_batch_size:
+                request = self._queue.popleft()
+                if not request.cancelled:
+                    batch.append(request)
+            return batch
+
+    def _serve(self):
+        """Batching thread: run queued requests through the model together."""
+        while not self._stop_event.is_set():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            try:
+                # Run at the lowest requested threshold, then filter per request
+                min_conf = min(request.conf_threshold for request in batch)
+                batch_detections = self.detector.predict(
+                    [request.image for request in batch], min_conf)
+                for request, detections in zip(batch, batch_detections):
+                    request.result = detections[detections.conf >= request.conf_threshold]
+            except Exception as e:
+                logger.error(f"Error during batched inference: {str(e)}")
+                for request in batch:
+                    request.error = e
+            finally:
+                for request in batch:
+                    request.done.set()
@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from pathlib import Path
 from flask_cors import CORS
@@ -12,5 +13,14 @@ CORS(app)
 app.config.update(
     MAX_CONTENT_LENGTH=16 * 1024 * 1024,  # 16MB max file size
     UPLOAD_FOLDER=Path(__file__).parent / 'static/uploads',
-    RESULTS_FOLDER=Path(__file__).parent / 'static/results'
+    RESULTS_FOLDER=Path(__file__).parent / 'static/results',
+    # Micro-batching of concurrent image requests
+    INFERENCE_MAX_BATCH_SIZE=8,  # Max images per forward pass
+    INFERENCE_MAX_WAIT_MS=5,  # How long to wait for more requests
+    INFERENCE_MAX_QUEUE_SIZE=32,  # Requests beyond this get a 503
+    INFERENCE_TIMEOUT=10,  # Seconds before a waiting request gets a 503
+    # Content-hash cache of image detection results
+    RESULT_CACHE_MAX_BYTES=64 * 1024 * 1024,  # Memory tier, 0 disables it
+    RESULT_CACHE_DIR=os.environ.get('RESULT_CACHE_DIR'),  # Disk tier, off if unset
+    RESULT_CACHE_DISK_MAX_BYTES=512 * 1024 * 1024
 ) 
\ No newline at end of file
@@ -0,0 +1,143 @@
+import json
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+class DetectionsWriter:
+    """
+    Append-only NDJSON detections file, readable while it is being written.
+
+    The first line holds the class names, every following line one frame as
+    ``{"frame": i, **Detections.to_dict()}``. Every ``index_every`` frames the
+    byte offset of the frame is recorded in a sidecar ``.idx`` file, so
+    readers can seek close to any frame instead of scanning from the start.
+    Data is flushed after every ``flush()`` call, at batch boundaries, so
+    readers only ever see complete lines plus at most one partial one.
+    """
+    def __init__(self, path: str, names: Dict[int, str], index_every: int = 256,
+                 resume: Optional[Dict] = None):
+        """
+        Open the file and write the header line.
+
+        Args:
+            path: Output .ndjson file
+            names: Class ID to class name mapping
+            index_every: Frames between two index entries
+            resume: A ``position()`` of an earlier writer of the same file.
+                    The file is cut back to it and appended to instead of
+                    being started over.
+        """
+        self.path = Path(path)
+        self.index_every = index_every
+        self.frames = 0
+        if resume is not None:
+            self._file = open(self.path, 'r+b')
+            self._index = open(index_path(self.path), 'r+')
+            for f, offset in ((self._file, resume['offset']), (self._index, resume['index_offset'])):
+                f.truncate(offset)
+                f.seek(offset)
+            self.frames = resume['frames']
+        else:
+            self._file = open(self.path, 'wb')
+            self._index = open(index_path(self.path), 'w')
+            self._file.write(json.dumps({'names': names}).encode() + b'\n')
+
+    def write(self, frame: Dict):
+        """Append one frame in the format of Detections.to_dict()."""
+        if self.frames % self.index_every == 0:
+            self._index.write(f"{self.frames} {self._file.tell()}\n")
+        self._file.write(json.dumps({'frame': self.frames, **frame}).encode() + b'\n')
+        self.frames += 1
+
+    def flush(self):
+        """Make everything written so far visible to readers."""
+        self._file.flush()
+        self._index.flush()
+
+    def position(self) -> Dict:
+        """Flush and return the state needed to resume writing at this point."""
+        self.flush()
+        return {'frames': self.frames, 'offset': self._file.tell(),
+                'index_offset': self._index.tell()}
+
+    def close(self):
+        """Flush and close the file."""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+            self._index.close()
+
+    def __enter__(self):
+        """Context manager enter."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
+
+def index_path(path: Path) -> Path:
+    """Sidecar index file of a detections file."""
+    return path.with_name(path.name + '.idx')
+
+def remove_detections(path: str):
+    """Delete a detections file and its index, if they exist."""
+    for file in (Path(path), index_path(Path(path))):
+        file.unlink(missing_ok=True)
+
+def _seek_offset(path: Path, start: int) -> int:
+    """Byte offset of the last indexed frame at or before ``start``, 0 if none."""
+    offset = 0
+    try:
+        with open(index_path(path)) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 2:
+                    break  # Entry still being written
+                frame, position = int(parts[0]), int(parts[1])
+                if frame > start:
+                    break
+                offset = position
+    except FileNotFoundError:
+        pass
+    return offset
+
+def read_names(path: Path) -> Dict[str, str]:
+    """Class names from the header line of a detections file."""
+    with open(path, 'rb') as f:
+        return json.loads(f.readline()).get('names', {})
+
+def iter_frames(path: Path, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Yield the raw NDJSON lines of frames ``start`` (inclusive) to ``end``
+    (exclusive), in order, without loading the whole file.
+
+    A trailing line that is still being written is skipped.
+    """
+    path = Path(path)
+    with open(path, 'rb') as f:
+        f.readline()  # Names header
+        offset = _seek_offset(path, start)
+        if offset:
+            f.seek(offset)
+
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # Partial line of a running job
+            # Cheap prefix check avoids parsing frames before the range
+            frame = int(line[len(b'{"frame": '):line.index(b',')])
+            if frame < start:
+                continue
+            if end is not None and frame >= end:
+                break
+            yield line
+
+def read_frames(path: Path, start: int = 0, limit: int = 100) -> Tuple[List[Dict], int]:
+    """
+    Read a page of frames.
+
+    Returns:
+        Tuple[List[Dict], int]: Frames from ``start``, at most ``limit`` of
+        them, and the number of the frame after the last one returned
+    """
+    frames = [json.loads(line) for line in iter_frames(path, start, start + limit)]
+    next_frame = frames[-1]['frame'] + 1 if frames else start
+    return frames, next_frame
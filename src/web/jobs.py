@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+import pickle
+from typing import Dict, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Task states after which a job cannot be attached to any more
+FINAL_FAILURE_STATES = ('FAILURE', 'REVOKED')
+
+# Delete a key only while it still holds the given value
+_COMPARE_AND_DELETE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Content hash of a file, read in chunks."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class JobRegistry:
+    """
+    Redis-backed bookkeeping for video jobs.
+
+    Maps a job key (content hash of the upload plus the processing
+    parameters) to the Celery task that handles it, so duplicate uploads
+    attach to the running job or reuse its result. Also stores checkpoints
+    of running jobs, keyed by task ID, so a redelivered task can resume.
+    """
+    def __init__(self, url: str, ttl: int = 24 * 3600, checkpoint_ttl: int = 24 * 3600):
+        """
+        Initialize the registry.
+
+        Args:
+            url: Redis URL
+            ttl: Seconds a job mapping is kept; matches Celery's default
+                 result expiry, after which a finished job cannot be reused
+            checkpoint_ttl: Seconds a checkpoint is kept after its last update
+        """
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.checkpoint_ttl = checkpoint_ttl
+
+    @staticmethod
+    def job_key(digest: str, params: Dict) -> str:
+        """Key of a job from the upload's content hash and its parameters."""
+        encoded = json.dumps(params, sort_keys=True, default=str).encode()
+        return f"video_job:{digest}:{hashlib.blake2b(encoded, digest_size=8).hexdigest()}"
+
+    def claim(self, job_key: str, task_id: str) -> Optional[str]:
+        """
+        Register ``task_id`` for a job unless another task already has it.
+
+        Returns:
+            Optional[str]: ID of the existing task, or None if the claim succeeded
+        """
+        if self.client.set(job_key, task_id, nx=True, ex=self.ttl):
+            return None
+        existing = self.client.get(job_key)
+        return existing.decode() if existing is not None else None
+
+    def replace(self, job_key: str, task_id: str):
+        """Point a job at a new task, e.g. after the previous one failed."""
+        self.client.set(job_key, task_id, ex=self.ttl)
+
+    def release(self, job_key: str, task_id: str):
+        """Drop a claim unless another task has taken the job over since."""
+        self.client.eval(_COMPARE_AND_DELETE, 1, job_key, task_id)
+
+    def forget_all(self):
+        """Drop all job mappings, e.g. after their result files were deleted."""
+        keys = list(self.client.scan_iter('video_job:*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def save_checkpoint(self, task_id: str, checkpoint: Dict):
+        """Store the latest checkpoint of a running task."""
+        self.client.set(f"video_checkpoint:{task_id}", pickle.dumps(checkpoint),
+                        ex=self.checkpoint_ttl)
+
+    def load_checkpoint(self, task_id: str) -> Optional[Dict]:
+        """Latest checkpoint of a task, or None."""
+        data = self.client.get(f"video_checkpoint:{task_id}")
+        if data is None:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint of task {task_id}: {e}")
+            return None
+
+    def clear_checkpoint(self, task_id: str):
+        """Remove the checkpoint of a finished task."""
+        self.client.delete(f"video_checkpoint:{task_id}")
@@ -0,0 +1,76 @@
+import time
+from typing import Dict, Optional
+
+class ProgressReporter:
+    """
+    Rate-limited PROGRESS updates for a bound Celery task.
+
+    Every update is a write to the result backend, so instead of reporting
+    each frame, a new state is only published when progress moved by at
+    least ``min_delta`` percent and ``min_interval`` seconds have passed
+    since the last one. That caps a job at roughly ``100 / min_delta``
+    writes, however many frames it has. When the total frame count is
+    unknown, updates are limited by ``min_interval`` only.
+    """
+    def __init__(self, task, total_frames: int, min_interval: float = 1.0,
+                 min_delta: float = 1.0, meta: Optional[Dict] = None):
+        """
+        Initialize the reporter.
+
+        Args:
+            task: Bound Celery task (``self`` inside the task)
+            total_frames: Number of frames the job will process, 0 if unknown
+            min_interval: Minimum seconds between two updates
+            min_delta: Minimum progress change in percent between two updates
+            meta: Extra fields sent with every update
+        """
+        self.task = task
+        self.total_frames = max(0, int(total_frames))
+        self.min_interval = min_interval
+        self.min_delta = min_delta
+        self.meta = dict(meta or {})
+        self.updates = 0
+        self.start_time = time.monotonic()
+        self._last_time: Optional[float] = None
+        self._last_progress = 0.0
+
+    def update(self, frames_done: int, detections: int = 0, force: bool = False) -> bool:
+        """
+        Record progress and publish it if enough has changed.
+
+        Args:
+            frames_done: Frames processed so far
+            detections: Number of objects in the latest frame
+            force: Publish regardless of the limits
+
+        Returns:
+            bool: True if an update was written
+        """
+        now = time.monotonic()
+        progress = min(100.0, frames_done / self.total_frames * 100) if self.total_frames else 0.0
+
+        if not force and self._last_time is not None:
+            if now - self._last_time < self.min_interval:
+                return False
+            # Without a total, progress stays at 0 and cannot be compared
+            if self.total_frames and progress - self._last_progress < self.min_delta:
+                return False
+
+        elapsed = now - self.start_time
+        fps = frames_done / elapsed if elapsed > 0 else 0.0
+        remaining = self.total_frames - frames_done
+        eta = remaining / fps if fps > 0 and remaining > 0 and self.total_frames else None
+
+        self.task.update_state(state='PROGRESS', meta={
+            'progress': progress,
+            'frames_processed': frames_done,
+            'total_frames': self.total_frames,
+            'fps': round(fps, 2),
+            'eta': round(eta, 1) if eta is not None else None,
+            'detections': detections,
+            **self.meta
+        })
+        self.updates += 1
+        self._last_time = now
+        self._last_progress = progress
+        return True
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class ResultCache:
+    """
+    Two-tier cache of image detection results keyed by image content.
+
+    Entries are small dicts (detections list and, if rendered, the annotated
+    JPEG). The memory tier is an LRU bounded by bytes. Every entry is also
+    written to an optional disk tier, which survives restarts, is bounded by
+    total file size and evicts the least recently used files first.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Memory tier budget, 0 disables it
+            disk_dir: Directory of the disk tier, None disables it
+            disk_max_bytes: Disk tier budget
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self._disk_bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(f.stat().st_size for f in self.disk_dir.glob('*.pkl'))
+
+    @staticmethod
+    def key(image: np.ndarray, settings: Dict) -> str:
+        """
+        Cache key of an image and the settings that affect its result.
+
+        The pixels are hashed after decoding, so re-encoded copies of the
+        same image with identical pixels still hit.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(np.ascontiguousarray(image).data)
+        digest.update(f"{image.shape}{image.dtype}".encode())
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _size(entry: Dict) -> int:
+        """Approximate memory footprint of an entry."""
+        return len(entry.get('jpeg') or b'') + len(json.dumps(entry.get('detections', [])))
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up an entry, checking memory first and then disk."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        entry = self._disk_get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._memory_put(key, entry)
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        """Store an entry in both tiers."""
+        with self._lock:
+            self._memory_put(key, entry)
+        self._disk_put(key, entry)
+
+    def _memory_put(self, key: str, entry: Dict):
+        """Insert into the LRU and evict down to the budget; caller holds the lock."""
+        if self.max_bytes <= 0:
+            return
+        if key in self._entries:
+            self._bytes -= self._sizes.pop(key)
+            del self._entries[key]
+        size = self._size(entry)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._sizes[key] = size
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            old_key, _ = self._entries.popitem(last=False)
+            self._bytes -= self._sizes.pop(old_key)
+            self.evictions += 1
+
+    def _disk_path(self, key: str) -> Path:
+        """File of an entry in the disk tier."""
+        return self.disk_dir / f"{key}.pkl"
+
+    def _disk_get(self, key: str) -> Optional[Dict]:
+        """Read an entry from disk, marking it as recently used."""
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache file {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+    def _disk_put(self, key: str, entry: Dict):
+        """Write an entry to disk and evict least recently used files."""
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        if path.exists():
+            os.utime(path)
+            return
+        try:
+            # Write to a temporary name so readers never see a partial file
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache file {path.name}: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes += path.stat().st_size
+            if self._disk_bytes <= self.disk_max_bytes:
+                return
+            files = sorted(self.disk_dir.glob('*.pkl'), key=lambda f: f.stat().st_mtime)
+            for old_path in files:
+                if self._disk_bytes <= self.disk_max_bytes:
+                    break
+                size = old_path.stat().st_size
+                old_path.unlink(missing_ok=True)
+                self._disk_bytes -= size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries from both tiers, e.g. after a config change."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            if self.disk_dir is not None:
+                for path in self.disk_dir.glob('*.pkl'):
+                    path.unlink(missing_ok=True)
+                self._disk_bytes = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and tier sizes."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'memory_bytes': self._bytes,
+                'disk_bytes': self._disk_bytes
+            }
@@ -1,4 +1,4 @@
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask import request
 from .config import app  # Import from config instead
 import cv2
@@ -6,31 +6,65 @@ import base64
 import logging
 import time
 from threading import Thread, Event
-from typing import Dict
+from typing import Dict, Optional
 import numpy as np
 
+from ..detection_and_tracking.adaptive import AdaptiveController
 from ..detection_and_tracking.detector import YOLODetector
+from ..detection_and_tracking.detections import Detections
+from ..detection_and_tracking.motion import MotionGate
 from .utils import FileHandler
+from ..utils.display_utils import FramePacer
 
 logger = logging.getLogger(__name__)
 socketio = SocketIO()
 
+# Frame transports supported by WebcamStream
+STREAM_TRANSPORTS = ('base64', 'binary')
+
 class WebcamStream:
-    """Handle webcam streaming and processing."""
+    """
+    Handle webcam streaming and processing.
+    
+    Two transports are supported:
+        - "base64": each frame is emitted to every client as a JSON "frame"
+          event with a base64 data URL and the full detections
+        - "binary": each frame is JPEG-encoded once and emitted as raw bytes
+          in a "frame_binary" event to the clients subscribed to the stream,
+          followed by a compact "frame_meta" event with the detections
+    
+    With a motion sensitivity set, inference is skipped while the camera
+    sees a static scene and the last detections are reused.
+    
+    With a target FPS set, the stream paces itself to that rate and an
+    AdaptiveController lowers the input size or model of the stream's
+    detector whenever frames take longer than the frame interval. The
+    detector must then be leased from the model registry.
+    """
     
     def __init__(self, stream_id: str, detector: YOLODetector, 
                  conf_threshold: float = 0.5,
-                 frame_rate: int = 30):
+                 frame_rate: int = 30,
+                 transport: str = 'base64',
+                 motion_sensitivity: Optional[float] = None,
+                 target_fps: Optional[float] = None):
+        if transport not in STREAM_TRANSPORTS:
+            raise ValueError(f"Unknown transport: {transport}. Options: {', '.join(STREAM_TRANSPORTS)}")
         self.stream_id = stream_id
         self.detector = detector
         self.conf_threshold = conf_threshold
-        self.frame_rate = frame_rate
+        self.frame_rate = target_fps or frame_rate
+        self.transport = transport
+        self.frame_seq = 0
+        self.latest_frame = None  # Latest encoded JPEG, shared by all subscribers
         self.cap = None
         self.thread = None
         self.stop_event = Event()
-        self.latest_detections = []  # Store latest detections
-        self.last_frame_time = 0
-        self.fps = 0
+        self.latest_detections = Detections.empty()  # Store latest detections
+        self.pacer = FramePacer(self.frame_rate)
+        self.max_dropped_frames = 5  # Stale frames discarded at most per overrun
+        self.motion_gate = MotionGate(motion_sensitivity) if motion_sensitivity is not None else None
+        self.adaptive = AdaptiveController(detector, target_fps) if target_fps else None
         
     def start(self):
         """Start the streaming thread."""
@@ -46,46 +80,108 @@ class WebcamStream:
         """Stop the streaming thread."""
         try:
             self.stop_event.set()
+            # Wait for the frame in flight, so the detector is idle once stop() returns
             if self.thread:
-                self.thread.join(timeout=1)
+                self.thread.join()
             if self.cap:
                 self.cap.release()
+            if self.adaptive is not None:
+                self.adaptive.close()
         except Exception as e:
             logger.error(f"Error stopping stream: {e}")
             
+    @property
+    def fps(self) -> float:
+        """Smoothed achieved frame rate."""
+        return self.pacer.fps
+    
+    @property
+    def latency(self) -> float:
+        """Smoothed capture-to-emit latency in seconds."""
+        return self.pacer.latency
+    
+    @property
+    def skip_ratio(self) -> float:
+        """Fraction of frames for which the motion gate skipped inference."""
+        return self.motion_gate.skip_ratio if self.motion_gate is not None else 0.0
+    
+    @property
+    def operating_point(self) -> Optional[Dict]:
+        """Current model and input size of an adaptive stream, else None."""
+        return self.adaptive.operating_point() if self.adaptive is not None else None
+    
     def _stream_thread(self):
         """Thread function for streaming."""
         while not self.stop_event.is_set():
-            # Calculate FPS
-            current_time = time.time()
-            if self.last_frame_time > 0:
-                self.fps = 1.0 / (current_time - self.last_frame_time)
-            self.last_frame_time = current_time
+            # Wait only for what is left of this frame's time slot
+            missed = self.pacer.wait(self.stop_event)
+            if self.stop_event.is_set():
+                break
             
+            # Behind schedule: discard frames buffered by the camera
+            for _ in range(min(missed, self.max_dropped_frames)):
+                self.cap.grab()
+            
+            start_time = time.perf_counter()
             success, frame = self.cap.read()
             if not success:
                 break
                 
             # Process frame
-            results = self.detector.detect_and_track(frame, self.conf_threshold)
+            skipped = self.motion_gate.skipped if self.motion_gate is not None else 0
+            results = self.detector.detect_and_track(frame, self.conf_threshold,
+                                                     motion_gate=self.motion_gate)
             self.latest_detections = results  # Update latest detections
-            processed_frame = self.detector.draw_results(frame, results)
+            processed_frame = self.detector.draw_results(frame, results, in_place=True)
             
-            # Convert frame to base64
+            # Encode once; the same bytes go to every subscriber
             _, buffer = cv2.imencode('.jpg', processed_frame)
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
+            self.latest_frame = buffer.tobytes()
+            self.frame_seq += 1
             
-            # Emit frame and detections
-            socketio.emit('frame', {
-                'stream_id': self.stream_id,
-                'frame': f"data:image/jpeg;base64,{frame_base64}",
-                'detections': results,
-                'fps': self.fps,
-                'timestamp': time.time()
-            }, namespace='/stream')
+            if self.transport == 'binary':
+                self._emit_binary(results)
+            else:
+                self._emit_base64(results)
             
-            # Control frame rate
-            time.sleep(1/self.frame_rate)
+            self.pacer.frame_done(start_time)
+            
+            # Frames the motion gate skipped say nothing about inference cost
+            if self.adaptive is not None and (
+                    self.motion_gate is None or self.motion_gate.skipped == skipped):
+                self.adaptive.update(time.perf_counter() - start_time)
+    
+    def _emit_base64(self, results: Detections):
+        """Emit frame and detections as a single JSON event to all clients."""
+        frame_base64 = base64.b64encode(self.latest_frame).decode('utf-8')
+        socketio.emit('frame', {
+            'stream_id': self.stream_id,
+            'frame': f"data:image/jpeg;base64,{frame_base64}",
+            'detections': results.to_list(),
+            'fps': self.fps,
+            'latency': self.latency,
+            'skip_ratio': self.skip_ratio,
+            'timestamp': time.time()
+        }, namespace='/stream')
+    
+    def _emit_binary(self, results: Detections):
+        """Emit raw JPEG bytes and a compact detections message to subscribers."""
+        timestamp = time.time()
+        socketio.emit('frame_binary', {
+            'stream_id': self.stream_id,
+            'seq': self.frame_seq,
+            'frame': self.latest_frame,
+            'timestamp': timestamp
+        }, namespace='/stream', to=self.stream_id)
+        socketio.emit('frame_meta', {
+            'stream_id': self.stream_id,
+            'seq': self.frame_seq,
+            'detections': results.to_dict(),
+            'fps': self.fps,
+            'latency': self.latency,
+            'skip_ratio': self.skip_ratio,
+            'timestamp': timestamp
+        }, namespace='/stream', to=self.stream_id)
 
 # Store active streams
 active_streams: Dict[str, WebcamStream] = {}
@@ -119,6 +215,47 @@ def handle_disconnect():
     """Handle client disconnection."""
     logger.info('Client disconnected')
 
+@socketio.on('subscribe', namespace='/stream')
+def handle_subscribe(data):
+    """Join a stream's room to receive its binary frames."""
+    try:
+        stream_id = data.get('stream_id')
+        if not stream_id or stream_id not in active_streams:
+            raise ValueError(f"Invalid stream ID: {stream_id}")
+        
+        stream = active_streams[stream_id]
+        join_room(stream_id)
+        
+        # Class names are sent once instead of with every frame
+        emit('stream_info', {
+            'stream_id': stream_id,
+            'transport': stream.transport,
+            'names': stream.detector.model.names
+        })
+        
+        # Send the latest frame right away so late joiners see something
+        if stream.transport == 'binary' and stream.latest_frame is not None:
+            emit('frame_binary', {
+                'stream_id': stream_id,
+                'seq': stream.frame_seq,
+                'frame': stream.latest_frame,
+                'timestamp': time.time()
+            })
+        
+    except Exception as e:
+        logger.error(f"Error subscribing to stream: {str(e)}")
+        emit('error', {
+            'code': 'subscribe_error',
+            'message': str(e)
+        })
+
+@socketio.on('unsubscribe', namespace='/stream')
+def handle_unsubscribe(data):
+    """Leave a stream's room."""
+    stream_id = data.get('stream_id')
+    if stream_id:
+        leave_room(stream_id)
+
 @socketio.on('get_detections', namespace='/stream')
 def handle_get_detections(data):
     """Handle request for current detections."""
@@ -132,7 +269,7 @@ def handle_get_detections(data):
         
         emit('detections', {
             'stream_id': stream_id,
-            'detections': stream.latest_detections,
+            'detections': stream.latest_detections.to_list(),
             'timestamp': time.time()
         })
         
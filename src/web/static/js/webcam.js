@@ -19,6 +19,7 @@ document.addEventListener('DOMContentLoaded', function() {
         upgrade: true
     });
     let streamId = null;
+    let frameUrl = null;  // Object URL of the frame currently drawn
 
     // Update confidence threshold display
     confThreshold.addEventListener('input', function() {
@@ -33,6 +34,7 @@ document.addEventListener('DOMContentLoaded', function() {
             // Create form data (API expects form data, not JSON)
             const formData = new FormData();
             formData.append('conf_threshold', confThreshold.value);
+            formData.append('transport', 'binary');
             
             // Request server to start stream
             const response = await fetch('/api/v1/stream/start', {
@@ -48,6 +50,9 @@ document.addEventListener('DOMContentLoaded', function() {
             // Get stream ID from the nested data structure
             streamId = data.data.stream_id;
             
+            // Join the stream's room to receive its binary frames
+            socket.emit('subscribe', { stream_id: streamId });
+            
             // Show stream container and stop button
             streamContainer.classList.remove('hidden');
             stopButton.classList.remove('hidden');
@@ -65,6 +70,8 @@ document.addEventListener('DOMContentLoaded', function() {
             try {
                 if (DEBUG) console.log('Manually stopping stream:', streamId);
                 
+                socket.emit('unsubscribe', { stream_id: streamId });
+                
                 // Note the streamId is part of the URL path
                 const response = await fetch(`/api/v1/stream/stop/${streamId}`, {
                     method: 'POST'
@@ -130,6 +137,34 @@ document.addEventListener('DOMContentLoaded', function() {
         console.log("Received frame with dimensions:", img.width, "x", img.height);
     });
 
+    // Binary transport: raw JPEG bytes, detections arrive separately
+    socket.on('frame_binary', (data) => {
+        if (data.stream_id !== streamId) return;
+        
+        const blob = new Blob([data.frame], { type: 'image/jpeg' });
+        const url = URL.createObjectURL(blob);
+        const img = new Image();
+        img.onload = () => {
+            if (canvas.width !== img.width || canvas.height !== img.height) {
+                canvas.width = img.width;
+                canvas.height = img.height;
+            }
+            const ctx = canvas.getContext('2d');
+            ctx.drawImage(img, 0, 0);
+            
+            // Release the previous frame's memory
+            if (frameUrl) URL.revokeObjectURL(frameUrl);
+            frameUrl = url;
+        };
+        img.src = url;
+    });
+
+    socket.on('frame_meta', (data) => {
+        if (data.stream_id !== streamId) return;
+        fpsCounter.textContent = data.fps ? data.fps.toFixed(1) : "0";
+        objectsCounter.textContent = data.detections ? data.detections.conf.length : "0";
+    });
+
     socket.on('error', (error) => {
         showError(error);
     });
@@ -1,100 +1,217 @@
-from celery import Celery
+from celery import Celery, chord
+from celery.signals import worker_process_init
 import cv2
+import json
 import os
+from functools import lru_cache
 from pathlib import Path
 import time
-from typing import Dict
+from typing import Dict, List, Optional
 import logging
 
-from ..detection_and_tracking.detector import YOLODetector
+from ..detection_and_tracking.detector import TrajectoryManager, draw_detections
+from ..detection_and_tracking.detections import Detections
+from ..detection_and_tracking.model_pool import model_registry
+from ..detection_and_tracking.tiling import Tiler
+from ..utils.video_capture import VideoCapture
+from ..utils.video_writer import StreamingVideoWriter
+from ..utils.segments import probe_keyframes, plan_segments, TrackIdReconciler
 from .utils import FileHandler
+from .progress import ProgressReporter
+from .detections_store import DetectionsWriter, iter_frames, read_names, remove_detections
+from .jobs import JobRegistry
 
 # Configure Celery
 celery = Celery('tasks', broker='redis://localhost:6379/0')
 celery.conf.update(
     result_backend='redis://localhost:6379/0',  # Redis stores task results
-    task_track_started=True
+    task_track_started=True,
+    # Late-acked jobs are redelivered after this, so it must exceed the longest job
+    broker_transport_options={'visibility_timeout': 12 * 3600}
 )
 
 logger = logging.getLogger(__name__)
 
-@celery.task(bind=True)
+# Models loaded into every worker process at startup
+PRELOAD_MODELS = os.environ.get('PRELOAD_MODELS', 'yolov8n.pt').split(',')
+
+# Decoder settings for video tasks
+DECODE_THREADS = int(os.environ.get('VIDEO_DECODE_THREADS', 0)) or None
+HW_DECODE = os.environ.get('VIDEO_HW_DECODE', 'false').lower() == 'true'
+
+# Frames between two checkpoints of a running video job, 0 disables them
+CHECKPOINT_INTERVAL = int(os.environ.get('VIDEO_CHECKPOINT_INTERVAL', 500))
+
+@lru_cache(maxsize=None)
+def job_registry() -> JobRegistry:
+    """Job registry on the Celery result backend's Redis."""
+    return JobRegistry(celery.conf.result_backend)
+
+def save_checkpoint(task_id: str, frame: int, detector, detections_file: DetectionsWriter):
+    """Checkpoint a video job; failures are logged, the job carries on."""
+    try:
+        job_registry().save_checkpoint(task_id, {
+            'frame': frame,
+            'detector': detector.get_state(),
+            'detections': detections_file.position()
+        })
+    except Exception as e:
+        logger.warning(f"Could not checkpoint task {task_id} at frame {frame}: {e}")
+
+def open_video(file_path: str, prefetch: int = 0, start_frame: int = 0) -> VideoCapture:
+    """Open a video with the worker's decoder settings, decoding ahead on a thread."""
+    video = VideoCapture(file_path, prefetch=prefetch, decode_threads=DECODE_THREADS,
+                         hw_acceleration=HW_DECODE, start_frame=start_frame)
+    if not video.start():
+        logger.error(f"Could not open video file at {file_path}")
+        raise ValueError("Could not open video file")
+    return video
+
+@worker_process_init.connect
+def preload_models(**kwargs):
+    """Load model weights once per worker process instead of once per task."""
+    try:
+        model_registry.preload([name for name in PRELOAD_MODELS if name])
+    except Exception as e:
+        logger.error(f"Error preloading models: {str(e)}")
+
+@celery.task(bind=True, acks_late=True, reject_on_worker_lost=True)
 def process_video(self, file_path: str, conf_threshold: float = 0.5,
-                 display_width: int = 640, save_output: bool = True) -> Dict:
-    """Process video file in background."""
+                 display_width: int = 640, save_output: bool = True,
+                 batch_size: int = 8, detect_interval: int = 1,
+                 tiling: Optional[Dict] = None, precision: Optional[str] = None) -> Dict:
+    """
+    Process video file in background, running inference in batches of frames.
+    
+    With ``detect_interval`` > 1 the model only runs on every N-th frame and
+    the boxes in between are predicted from the tracker. ``tiling`` holds
+    Tiler settings for ROI or tiled inference, ``precision`` the model
+    weights to use ("fp32" or "int8"). Detections are appended to
+    a per-task NDJSON file as each batch completes.
+    
+    The task is acknowledged only after it finishes, so it is redelivered if
+    the worker dies. Every ``CHECKPOINT_INTERVAL`` frames the tracker state
+    and the position in the detections file are checkpointed, and a
+    redelivered task resumes from there.
+    """
     cap = None
     out = None
+    detector = None
+    detections_file = None
     try:
         logger.info(f"Starting video processing for file: {file_path}")
         logger.info(f"File exists: {os.path.exists(file_path)}")
         
-        detector = YOLODetector()
+        detector = model_registry.acquire(precision=precision)
+        detector.tiler = Tiler.from_dict(tiling) if tiling else None
         file_handler = FileHandler()
         
-        # Open video
-        cap = cv2.VideoCapture(file_path)
-        if not cap.isOpened():
-            logger.error(f"Could not open video file at {file_path}")
-            raise ValueError("Could not open video file")
+        detections_path, detections_url = file_handler.detections_result_path(self.request.id)
+        
+        # A redelivered task continues from its last checkpoint
+        checkpoint = job_registry().load_checkpoint(self.request.id)
+        if checkpoint is not None and not os.path.exists(detections_path):
+            logger.warning(f"Detections of task {self.request.id} are gone, starting over")
+            checkpoint = None
+        resume_frame = checkpoint['frame'] if checkpoint is not None else 0
+        if checkpoint is not None:
+            detector.set_state(checkpoint['detector'])
+            logger.info(f"Resuming task {self.request.id} from frame {resume_frame}")
+        
+        # Open video, decoding the next batches while the current one is inferred.
+        # Without output video, frames before the checkpoint are not needed at all.
+        cap = open_video(file_path, prefetch=batch_size * 2,
+                         start_frame=0 if save_output else resume_frame)
             
         # Get video properties
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width, height = cap.frame_size
+        fps = int(cap.fps)
+        total_frames = cap.frame_count
         
-        # Create output video writer if needed
-        output_path = None
+        # Stream output straight into the results folder if needed; it can
+        # be played back while the job is still running
+        result_url = None
         if save_output:
-            output_path = str(Path(file_path).parent / f"output_{Path(file_path).name}")
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+            output_path, result_url = file_handler.video_result_path(Path(file_path).name)
+            out = StreamingVideoWriter(output_path, fps, (width, height))
         
-        frame_count = 0
+        # Detections are appended per batch, so they can be read before the job ends
+        detections_file = DetectionsWriter(
+            detections_path, detector.model.names,
+            resume=checkpoint['detections'] if checkpoint is not None else None
+        )
+        
+        meta = {'detections_url': detections_url}
+        if out is not None and out.is_streaming:
+            meta['output_video_url'] = result_url
+        progress = ProgressReporter(self, total_frames, meta=meta)
+        
+        processed_frame = None
         start_time = time.time()
         
+        if resume_frame and out is not None:
+            # Re-render the video up to the checkpoint from the stored
+            # detections, which is much cheaper than running the model again
+            names = detector.model.names
+            for line in iter_frames(Path(detections_path), 0, resume_frame):
+                success, frame = cap.read_frame()
+                if not success:
+                    break
+                results = Detections.from_dict(json.loads(line), names)
+                processed_frame = detector.draw_results(frame, results, in_place=True)
+                out.write(processed_frame)
+        frame_count = resume_frame
+        last_checkpoint = resume_frame
+        
         while True:
-            success, frame = cap.read()
-            if not success:
+            # Read the next batch of frames
+            frames = []
+            while len(frames) < batch_size:
+                success, frame = cap.read_frame()
+                if not success:
+                    break
+                frames.append(frame)
+            if not frames:
                 break
                 
-            # Process frame
-            results = detector.detect_and_track(frame, conf_threshold)
-            processed_frame = detector.draw_results(frame, results)
+            # Process batch
+            batch_results = detector.detect_batch(frames, conf_threshold, detect_interval)
             
-            # Save frame if output is requested
-            if out is not None:
-                out.write(processed_frame)
+            for frame, results in zip(frames, batch_results):
+                detections_file.write(results.to_dict())
+                # Only render when there is an output video to write
+                if out is not None:
+                    processed_frame = detector.draw_results(frame, results, in_place=True)
+                    out.write(processed_frame)
+            detections_file.flush()
             
-            # Update progress
-            frame_count += 1
-            progress = (frame_count / total_frames) * 100
-            self.update_state(
-                state='PROGRESS',
-                meta={'progress': progress}
-            )
+            # Update progress, throttled to a few backend writes per job
+            frame_count += len(frames)
+            progress.update(frame_count, detections=len(batch_results[-1]))
+            
+            if CHECKPOINT_INTERVAL and frame_count - last_checkpoint >= CHECKPOINT_INTERVAL:
+                save_checkpoint(self.request.id, frame_count, detector, detections_file)
+                last_checkpoint = frame_count
         
         # Clean up
         cap.release()
         if out is not None:
-            out.write(processed_frame)
+            if processed_frame is not None:
+                out.write(processed_frame)
             out.release()
+            out = None
+        detections_file.close()
+        job_registry().clear_checkpoint(self.request.id)
         
         processing_time = time.time() - start_time
         
-        # Save result video if output was created
-        result_url = None
-        if output_path:
-            result_url = file_handler.save_video_result(
-                output_path,
-                Path(file_path).name
-            )
-        
         return {
             'status': 'completed',
             'processing_time': processing_time,
             'frames_processed': frame_count,
-            'output_video_url': result_url
+            'resumed_from': resume_frame,
+            'output_video_url': result_url,
+            'detections_url': detections_url
         }
         
     except Exception as e:
@@ -102,8 +219,217 @@ def process_video(self, file_path: str, conf_threshold: float = 0.5,
         raise
     finally:
         # Ensure resources are released
+        if detector is not None:
+            model_registry.release(detector)
+        if cap is not None:
+            cap.release()
+        if out is not None:
+            out.release()
+        if detections_file is not None:
+            detections_file.close()
+        cv2.destroyAllWindows() 
+
+@celery.task(bind=True)
+def process_video_parallel(self, file_path: str, conf_threshold: float = 0.5,
+                           display_width: int = 640, save_output: bool = True,
+                           segments: int = 4, overlap: int = 10, batch_size: int = 8,
+                           detect_interval: int = 1, tiling: Optional[Dict] = None,
+                           precision: Optional[str] = None):
+    """
+    Split a video into keyframe-aligned segments and process them in parallel.
+    
+    The segments run as separate Celery tasks that write their detections to
+    intermediate files. This task is then replaced by the merge step, which
+    keeps the original task ID, so the status endpoint keeps working for the
+    whole job.
+    """
+    logger.info(f"Planning parallel processing for file: {file_path}")
+    
+    cap = open_video(file_path)
+    fps = cap.fps
+    total_frames = cap.frame_count
+    cap.release()
+    
+    # Each segment must be longer than the overlap it re-processes
+    keyframes = probe_keyframes(file_path, fps)
+    ranges = plan_segments(total_frames, segments, keyframes, min_frames=max(1, overlap * 2))
+    logger.info(f"Processing {len(ranges)} segments: {ranges}")
+    
+    header = [
+        process_video_segment.s(
+            file_path, self.request.id, start, end if i < len(ranges) - 1 else None,
+            overlap=overlap if i > 0 else 0,
+            conf_threshold=conf_threshold,
+            batch_size=batch_size,
+            detect_interval=detect_interval,
+            tiling=tiling,
+            precision=precision
+        )
+        for i, (start, end) in enumerate(ranges)
+    ]
+    body = merge_video_segments.s(
+        file_path,
+        save_output=save_output,
+        start_time=time.time()
+    )
+    raise self.replace(chord(header, body))
+
+@celery.task
+def process_video_segment(file_path: str, job_id: str, start: int, end: Optional[int] = None,
+                          overlap: int = 0, conf_threshold: float = 0.5,
+                          batch_size: int = 8, detect_interval: int = 1,
+                          tiling: Optional[Dict] = None, precision: Optional[str] = None) -> Dict:
+    """
+    Run detection and tracking on one segment of a video.
+    
+    Detections are written to an NDJSON file keyed by the job and segment,
+    warm-up frames first, so only the file's path and frame counts go
+    through the result backend.
+    
+    Args:
+        file_path: Path to video file
+        job_id: Task ID of the parallel job the segment belongs to
+        start: First frame of the segment
+        end: Frame after the last one, or None to read until the end
+        overlap: Number of frames before ``start`` to process for tracker
+                 warm-up. They are stored first and only used to
+                 reconcile track IDs, never emitted.
+        conf_threshold: Confidence threshold for detections
+        batch_size: Number of frames to run through the model at once
+        detect_interval: Run the model on every N-th frame only
+        tiling: Optional Tiler settings for ROI or tiled inference
+        precision: Model weights to use, the worker's default if None
+    """
+    cap = None
+    detector = None
+    writer = None
+    detections_path = FileHandler().segment_detections_path(job_id, start)
+    try:
+        detector = model_registry.acquire(precision=precision)
+        detector.tiler = Tiler.from_dict(tiling) if tiling else None
+        writer = DetectionsWriter(detections_path, detector.model.names)
+        
+        warmup_start = max(0, start - overlap)
+        cap = open_video(file_path, prefetch=batch_size * 2, start_frame=warmup_start)
+        
+        frame_index = warmup_start
+        while end is None or frame_index < end:
+            # Read the next batch of frames
+            batch = []
+            while len(batch) < batch_size and (end is None or frame_index + len(batch) < end):
+                success, frame = cap.read_frame()
+                if not success:
+                    break
+                batch.append(frame)
+            if not batch:
+                break
+            
+            for results in detector.detect_batch(batch, conf_threshold, detect_interval):
+                writer.write(results.to_dict())
+                frame_index += 1
+            
+            if len(batch) < batch_size and (end is None or frame_index < end):
+                break
+        writer.close()
+        
+        warmup_frames = min(start - warmup_start, writer.frames)
+        frames = writer.frames - warmup_frames
+        logger.info(f"Segment [{start}, {end}) processed {frames} frames")
+        return {
+            'start': start,
+            'path': detections_path,
+            'warmup_frames': warmup_frames,
+            'frames': frames
+        }
+        
+    except Exception:
+        remove_detections(detections_path)
+        raise
+    finally:
+        if detector is not None:
+            model_registry.release(detector)
+        if cap is not None:
+            cap.release()
+        if writer is not None:
+            writer.close()
+
+@celery.task(bind=True)
+def merge_video_segments(self, segments: List[Dict], file_path: str,
+                         save_output: bool = True, start_time: Optional[float] = None) -> Dict:
+    """
+    Stitch segment results together with consistent track IDs.
+    
+    The segments' detection files are streamed one after another into one
+    results file, remapping track IDs on the way, and removed afterwards.
+    If output is requested, the annotated video is rendered here in a single
+    pass from the results file, so labels and trajectories use the
+    reconciled IDs.
+    """
+    cap = None
+    out = None
+    try:
+        start_time = start_time or time.time()
+        file_handler = FileHandler()
+        segments = sorted(segments, key=lambda segment: segment['start'])
+        
+        # JSON serialization turns integer keys into strings
+        names = {int(k): v for k, v in read_names(Path(segments[0]['path'])).items()}
+        total_frames = sum(segment['frames'] for segment in segments)
+        
+        # Keyed by the task ID, which the merge step inherits from the job
+        detections_path, detections_url = file_handler.detections_result_path(self.request.id)
+        reconciler = TrackIdReconciler(max(segment['warmup_frames'] for segment in segments))
+        with DetectionsWriter(detections_path, names) as writer:
+            for segment in segments:
+                path = Path(segment['path'])
+                warmup = [json.loads(line) for line in iter_frames(path, 0, segment['warmup_frames'])]
+                reconciler.start_segment(warmup)
+                for line in iter_frames(path, segment['warmup_frames']):
+                    frame = json.loads(line)
+                    del frame['frame']  # Numbered within the segment
+                    writer.write(reconciler.remap(frame))
+        
+        result_url = None
+        if save_output:
+            cap = open_video(file_path, prefetch=8)
+            width, height = cap.frame_size
+            fps = int(cap.fps)
+            
+            output_path, result_url = file_handler.video_result_path(Path(file_path).name)
+            out = StreamingVideoWriter(output_path, fps, (width, height))
+            progress = ProgressReporter(
+                self, total_frames,
+                meta={'output_video_url': result_url} if out.is_streaming else None
+            )
+            
+            trajectory_manager = TrajectoryManager()
+            for frame_count, line in enumerate(iter_frames(Path(detections_path)), start=1):
+                success, frame = cap.read_frame()
+                if not success:
+                    break
+                results = Detections.from_dict(json.loads(line), names)
+                out.write(draw_detections(frame, results, trajectory_manager))
+                progress.update(frame_count, detections=len(results))
+            
+            out.release()
+            out = None
+        
+        return {
+            'status': 'completed',
+            'processing_time': time.time() - start_time,
+            'frames_processed': total_frames,
+            'segments': len(segments),
+            'output_video_url': result_url,
+            'detections_url': detections_url
+        }
+        
+    except Exception as e:
+        logger.error(f"Error merging video segments: {str(e)}")
+        raise
+    finally:
         if cap is not None:
             cap.release()
         if out is not None:
             out.release()
-        cv2.destroyAllWindows() 
\ No newline at end of file
+        for segment in segments:
+            remove_detections(segment['path'])
@@ -5,9 +5,11 @@ from werkzeug.utils import secure_filename
 import cv2
 import base64
 import numpy as np
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 import shutil
 
+from .detections_store import DetectionsWriter
+
 class FileHandler:
     """Handle file uploads and temporary storage."""
     
@@ -17,20 +19,44 @@ class FileHandler:
     def __init__(self):
         self.upload_folder = Path(__file__).parent / 'static/uploads'
         self.results_folder = Path(__file__).parent / 'static/results'
+        self.segments_folder = Path(__file__).parent / 'segments'
         self.upload_folder.mkdir(parents=True, exist_ok=True)
         self.results_folder.mkdir(parents=True, exist_ok=True)
+        self.segments_folder.mkdir(parents=True, exist_ok=True)
     
-    def save_upload(self, file, prefix: str = '') -> Tuple[str, str]:
-        """Save uploaded file and return paths."""
+    @staticmethod
+    def unique_filename(file, prefix: str = '') -> str:
+        """Build a unique file name that keeps the upload's extension."""
         filename = secure_filename(file.filename)
         ext = filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{prefix}_{uuid.uuid4().hex}.{ext}"
+        return f"{prefix}_{uuid.uuid4().hex}.{ext}"
+    
+    def save_upload(self, file, prefix: str = '') -> Tuple[str, str]:
+        """Save uploaded file and return paths."""
+        unique_filename = self.unique_filename(file, prefix)
         
         upload_path = self.upload_folder / unique_filename
         file.save(str(upload_path))
         
         return str(upload_path), unique_filename
     
+    @staticmethod
+    def decode_upload(file) -> Optional[np.ndarray]:
+        """Decode an uploaded image straight from memory, without touching disk."""
+        data = np.frombuffer(file.read(), dtype=np.uint8)
+        file.seek(0)  # Allow the upload to be saved afterwards
+        if data.size == 0:
+            return None
+        return cv2.imdecode(data, cv2.IMREAD_COLOR)
+    
+    @staticmethod
+    def encode_jpeg(image: np.ndarray, quality: int = 90) -> bytes:
+        """Encode an image as JPEG bytes in memory."""
+        success, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not success:
+            raise ValueError("Could not encode image")
+        return buffer.tobytes()
+    
     def save_result(self, image: np.ndarray, original_filename: str) -> str:
         """Save processed image and return URL."""
         filename = f"result_{original_filename}"
@@ -39,6 +65,13 @@ class FileHandler:
         
         return f"/static/results/{filename}"
 
+    def save_result_jpeg(self, jpeg: bytes, original_filename: str) -> str:
+        """Save an already encoded JPEG result and return URL."""
+        filename = f"result_{Path(original_filename).stem}.jpg"
+        (self.results_folder / filename).write_bytes(jpeg)
+        
+        return f"/static/results/{filename}"
+
     @staticmethod
     def is_allowed_image(filename: str) -> bool:
         return '.' in filename and \
@@ -49,6 +82,15 @@ class FileHandler:
         return '.' in filename and \
             filename.rsplit('.', 1)[1].lower() in FileHandler.ALLOWED_VIDEO_EXTENSIONS
 
+    def video_result_path(self, original_filename: str) -> Tuple[str, str]:
+        """
+        Path and URL for a processed video written directly into the results folder.
+        
+        Results are always MP4, whatever the container of the upload.
+        """
+        filename = f"result_{Path(original_filename).stem}.mp4"
+        return str(self.results_folder / filename), f"/static/results/{filename}"
+
     def save_video_result(self, output_path: str, original_filename: str) -> str:
         """Save processed video and return URL."""
         filename = f"result_{original_filename}"
@@ -57,4 +99,39 @@ class FileHandler:
         # Move the processed video to results folder
         shutil.move(output_path, str(result_path))
         
-        return f"/static/results/{filename}" 
\ No newline at end of file
+        return f"/static/results/{filename}"
+
+    def detections_result_path(self, key: str) -> Tuple[str, str]:
+        """
+        Path and URL of a per-frame detections file.
+        
+        Video jobs key the file by their task ID, so it can be found and
+        paged through while the job is still writing it.
+        """
+        filename = f"detections_{secure_filename(key)}.ndjson"
+        return str(self.results_folder / filename), f"/static/results/{filename}"
+
+    def segment_detections_path(self, key: str, start: int) -> str:
+        """
+        Path of the intermediate detections file of one video segment.
+        
+        Segment files are only read by the merge step and are kept out of
+        the static folder.
+        """
+        return str(self.segments_folder / f"segment_{secure_filename(key)}_{start}.ndjson")
+
+    def save_detections_result(self, frames: List[Dict], names: Dict[int, str],
+                               key: str) -> str:
+        """
+        Save per-frame detections as NDJSON and return URL.
+        
+        The first line holds the class names, every following line one frame
+        in the columnar format of Detections.to_dict().
+        """
+        result_path, url = self.detections_result_path(key)
+        
+        with DetectionsWriter(result_path, names) as writer:
+            for frame in frames:
+                writer.write(frame)
+        
+        return url
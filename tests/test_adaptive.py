@@ -0,0 +1,102 @@
+import threading
+from types import SimpleNamespace
+from src.detection_and_tracking.adaptive import AdaptiveController, estimated_cost, operating_points
+
+class FakeRegistry:
+    """Registry that hands out named placeholders and tracks leases."""
+    def __init__(self):
+        self.active = {}
+
+    def get_model(self, model_size, precision=None):
+        return model_size, threading.Lock()
+
+    def switch_model(self, detector, model_size=None, precision=None):
+        self.active[detector.model_name] = self.active.get(detector.model_name, 1) - 1
+        self.active[model_size] = self.active.get(model_size, 0) + 1
+        detector.model, detector.model_lock = self.get_model(model_size)
+        detector.model_name = model_size
+
+def make_detector(model_size):
+    return SimpleNamespace(model_name=model_size, imgsz=640, precision='fp32',
+                           model=model_size, model_lock=threading.Lock())
+
+def run(controller, detector, frames, load):
+    """Feed latencies proportional to the cost of the current operating point."""
+    for _ in range(frames):
+        controller.update(0.001 * load * estimated_cost(detector.model_name, detector.imgsz))
+        if controller._loading is not None:
+            controller._loading.join()
+
+def test_operating_points_shrink_monotonically():
+    """Test that the ladder gets cheaper and never returns to a larger model."""
+    points = operating_points('yolov8m.pt')
+    assert points[0] == ('yolov8m.pt', 640)
+    assert points[-1] == ('yolov8n.pt', 320)
+    costs = [estimated_cost(*point) for point in points]
+    assert costs == sorted(costs, reverse=True)
+    models = [model for model, _ in points]
+    assert models == sorted(models, key=['yolov8m.pt', 'yolov8s.pt', 'yolov8n.pt'].index)
+
+def test_operating_points_without_cascade():
+    """Test that only the input size changes without the model cascade."""
+    assert operating_points('yolov8s.pt', 512, cascade=False) == [
+        ('yolov8s.pt', 512), ('yolov8s.pt', 416), ('yolov8s.pt', 320)]
+
+def test_controller_cascades_under_load_and_recovers():
+    """Test stepping down to smaller models under load and back up afterwards."""
+    registry = FakeRegistry()
+    detector = make_detector('yolov8m.pt')
+    controller = AdaptiveController(detector, target_fps=20, cooldown=5, registry=registry)
+    
+    run(controller, detector, 200, load=6.0)
+    assert detector.model_name == 'yolov8n.pt'
+    assert estimated_cost(detector.model_name, detector.imgsz) * 0.006 <= controller.budget
+    assert registry.active['yolov8n.pt'] == 1
+    assert registry.active['yolov8m.pt'] == 0
+    
+    run(controller, detector, 400, load=1.0)
+    assert detector.model_name == 'yolov8m.pt'
+    assert controller.operating_point()['model'] == 'yolov8m.pt'
+    
+    controller.close()
+    assert detector.imgsz == 640
+
+def test_close_restores_starting_point():
+    """Test that closing waits for a pending load and returns to the starting model."""
+    registry = FakeRegistry()
+    loading = threading.Event()
+    get_model = registry.get_model
+    
+    def slow_get_model(model_size, precision=None):
+        loading.wait()
+        return get_model(model_size, precision)
+    
+    registry.get_model = slow_get_model
+    detector = make_detector('yolov8s.pt')
+    controller = AdaptiveController(detector, target_fps=20, cooldown=1, registry=registry)
+    
+    # Step down through the sizes of yolov8s until the next step needs yolov8n
+    while controller._loading is None:
+        controller.update(1.0)
+    assert detector.model_name == 'yolov8s.pt' and detector.imgsz < 640
+    
+    loading.set()
+    controller.close()
+    assert controller._loading is None
+    assert detector.model_name == 'yolov8s.pt'
+    assert detector.imgsz == 640
+    assert controller.operating_point()['level'] == 0
+
+def test_close_switches_back_to_starting_model():
+    """Test that a detector cascaded to a smaller model is released on its own model."""
+    registry = FakeRegistry()
+    detector = make_detector('yolov8m.pt')
+    controller = AdaptiveController(detector, target_fps=20, cooldown=5, registry=registry)
+    run(controller, detector, 200, load=6.0)
+    assert detector.model_name == 'yolov8n.pt'
+    
+    controller.close()
+    assert detector.model_name == 'yolov8m.pt'
+    assert detector.imgsz == 640
+    assert registry.active['yolov8m.pt'] == 1
+    assert registry.active['yolov8n.pt'] == 0
@@ -106,6 +106,75 @@ def test_process_image_with_parameters(client, test_image):
     data = response.get_json()
     assert data['success'] is True
 
+def test_process_image_json_output(client, test_image):
+    """Test image processing that returns detections only."""
+    response = client.post('/api/v1/detect/image', data={
+        'image': (test_image, 'test.jpg'),
+        'output': 'json'
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['success'] is True
+    assert 'detections' in data['data']
+    assert 'processed_image_url' not in data['data']
+    
+    # Nothing should have been written to disk
+    assert not any(Path('src/web/static/uploads').glob('img_*'))
+    assert not any(Path('src/web/static/results').glob('result_img_*'))
+
+def test_process_image_inline_output(client, test_image):
+    """Test image processing that returns the annotated image inline."""
+    response = client.post('/api/v1/detect/image', data={
+        'image': (test_image, 'test.jpg'),
+        'output': 'inline'
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['success'] is True
+    assert data['data']['processed_image'].startswith('data:image/jpeg;base64,')
+
+def test_process_image_jpeg_output(client, test_image):
+    """Test image processing that streams the annotated JPEG."""
+    response = client.post('/api/v1/detect/image', data={
+        'image': (test_image, 'test.jpg'),
+        'output': 'jpeg'
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert 'X-Detections-Count' in response.headers
+    image = cv2.imdecode(np.frombuffer(response.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert image is not None
+
+def test_process_image_invalid_output(client, test_image):
+    """Test image processing with an unknown output mode."""
+    response = client.post('/api/v1/detect/image', data={
+        'image': (test_image, 'test.jpg'),
+        'output': 'gif'
+    })
+    assert response.status_code == 400
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['error']['code'] == 'invalid_parameter'
+
+def test_process_image_cached(client, test_image):
+    """Test that a repeated image is served from the result cache."""
+    data = test_image.getvalue()
+    first = client.post('/api/v1/detect/image', data={
+        'image': (io.BytesIO(data), 'test.jpg'),
+        'output': 'json',
+        'conf_threshold': '0.42'
+    }).get_json()
+    second = client.post('/api/v1/detect/image', data={
+        'image': (io.BytesIO(data), 'test.jpg'),
+        'output': 'json',
+        'conf_threshold': '0.42'
+    }).get_json()
+    assert second['data']['cached'] is True
+    assert second['data']['detections'] == first['data']['detections']
+    
+    stats = client.get('/api/v1/cache').get_json()['data']
+    assert stats['hits'] >= 1
+
 def test_process_video_no_file(client):
     """Test video processing endpoint with no file."""
     response = client.post('/api/v1/detect/video')
@@ -134,6 +203,28 @@ def test_process_video_invalid_type(client):
     assert data['success'] is False
     assert data['error']['code'] == 'invalid_file_type'
 
+def test_process_video_invalid_segments(client, test_video):
+    """Test video processing endpoint with an invalid segment count."""
+    response = client.post('/api/v1/detect/video', data={
+        'video': (test_video, 'demo_video.mp4'),
+        'segments': '0'
+    })
+    assert response.status_code == 500
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['error']['code'] == 'processing_error'
+
+def test_process_video_invalid_detect_interval(client, test_video):
+    """Test video processing endpoint with an invalid detection interval."""
+    response = client.post('/api/v1/detect/video', data={
+        'video': (test_video, 'demo_video.mp4'),
+        'detect_interval': '0'
+    })
+    assert response.status_code == 500
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['error']['code'] == 'processing_error'
+
 def test_video_status_invalid_id(client):
     """Test video status endpoint with invalid task ID."""
     response = client.get('/api/v1/detect/video/status/invalid_task_id')
@@ -143,6 +234,22 @@ def test_video_status_invalid_id(client):
     assert data['error']['code'] == 'status_error'
     assert 'message' in data['error']
 
+def test_video_detections_unknown_task(client):
+    """Test detections endpoint for a task without results."""
+    response = client.get('/api/v1/detect/video/invalid_task_id/detections')
+    assert response.status_code == 404
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['error']['code'] == 'not_found'
+
+def test_video_detections_invalid_range(client):
+    """Test detections endpoint with an invalid frame range."""
+    response = client.get('/api/v1/detect/video/invalid_task_id/detections?start=10&end=5')
+    assert response.status_code == 400
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['error']['code'] == 'invalid_parameters'
+
 def test_video_processing_flow(client, test_video):
     """Test complete video processing flow."""
     # Start processing
@@ -176,6 +283,42 @@ def test_video_processing_flow(client, test_video):
     assert data['success'] is True
     assert data['data']['status'] in ['completed', 'failed']
 
+def test_process_video_deduplicated(client, test_video):
+    """Test that a repeated upload attaches to the existing job."""
+    data = test_video.getvalue()
+    form = {'conf_threshold': '0.37', 'save_output': 'false'}
+    first = client.post('/api/v1/detect/video', data={
+        'video': (io.BytesIO(data), 'demo_video.mp4'), **form
+    }).get_json()
+    second = client.post('/api/v1/detect/video', data={
+        'video': (io.BytesIO(data), 'demo_video.mp4'), **form
+    }).get_json()
+    assert first['success'] is True and second['success'] is True
+    assert second['data']['task_id'] == first['data']['task_id']
+    assert second['data']['deduplicated'] is True
+
+def test_process_video_enqueue_failure_releases_job(client, test_video, monkeypatch):
+    """Test that a job whose task could not be enqueued is not reused."""
+    from app import process_video
+    
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker unavailable")
+    
+    data = test_video.getvalue()
+    form = {'conf_threshold': '0.38', 'save_output': 'false'}
+    with monkeypatch.context() as patch:
+        patch.setattr(process_video, 'apply_async', broker_down)
+        failed = client.post('/api/v1/detect/video', data={
+            'video': (io.BytesIO(data), 'demo_video.mp4'), **form
+        })
+    assert failed.status_code == 500
+    
+    retried = client.post('/api/v1/detect/video', data={
+        'video': (io.BytesIO(data), 'demo_video.mp4'), **form
+    }).get_json()
+    assert retried['success'] is True
+    assert retried['data']['deduplicated'] is False
+
 def test_process_video_with_parameters(client, test_video):
     """Test video processing with different parameters."""
     response = client.post('/api/v1/detect/video', data={
@@ -210,6 +353,24 @@ def test_get_config(client):
     assert isinstance(config['trajectory_length'], int)
     assert isinstance(config['fade_steps'], int)
     assert isinstance(config['display_width'], int)
+    assert isinstance(config['imgsz'], int)
+    assert isinstance(config['adaptive_streams'], dict)
+
+def test_start_stream_invalid_target_fps(client):
+    """Test starting a stream with a non-positive target FPS."""
+    response = client.post('/api/v1/stream/start', data={'target_fps': '0'})
+    assert response.status_code == 500
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['error']['code'] == 'stream_error'
+
+def test_start_stream_invalid_model(client):
+    """Test starting a stream on a model outside the YOLOv8 family."""
+    response = client.post('/api/v1/stream/start', data={'model': 'yolov5n.pt'})
+    assert response.status_code == 500
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['error']['code'] == 'stream_error'
 
 def test_update_config_no_data(client):
     """Test updating config with no data."""
@@ -230,6 +391,14 @@ def test_update_config_invalid_data(client):
     assert data['success'] is False
     assert data['error']['code'] == 'config_error'
 
+def test_update_config_invalid_precision(client):
+    """Test updating config with an unknown precision."""
+    response = client.put('/api/v1/config', json={'precision': 'int4'})
+    assert response.status_code == 500
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['error']['code'] == 'config_error'
+
 def test_update_config_success(client):
     """Test successful config update."""
     # Get original config
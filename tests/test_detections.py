@@ -0,0 +1,18 @@
+import json
+import numpy as np
+from src.detection_and_tracking.detections import Detections
+
+def test_to_dict_rounds_float32():
+    """Test that the compact dict keeps its rounding through JSON."""
+    detections = Detections(
+        np.array([[123.43, 10.06, 200.0, 300.56]], dtype=np.float32),
+        np.array([0.87654], dtype=np.float32),
+        np.array([2], dtype=np.float32),
+        np.array([7]),
+        {2: 'car'}
+    )
+    data = detections.to_dict()
+    assert data['xyxy'] == [[123.4, 10.1, 200.0, 300.6]]
+    assert data['conf'] == [0.8765]
+    assert json.dumps(data['conf']) == '[0.8765]'
+    assert data['track_id'] == [7]
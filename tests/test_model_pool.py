@@ -0,0 +1,71 @@
+import threading
+import time
+from types import SimpleNamespace
+import pytest
+from src.detection_and_tracking import model_pool
+from src.detection_and_tracking.model_pool import ModelRegistry
+from src.detection_and_tracking.tiling import Tiler
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Replace weight loading with a slow fake that records each load."""
+    calls = []
+    
+    def load_backend_model(model_size, backend, threads, precision='fp32', calibration_dir=None):
+        calls.append(model_size)
+        time.sleep(0.3 if model_size == 'yolov8x.pt' else 0)
+        return SimpleNamespace(names={0: 'person'}, name=model_size)
+    
+    monkeypatch.setattr(model_pool, 'load_backend_model', load_backend_model)
+    return calls
+
+def test_slow_load_does_not_block_registry(loads):
+    """Test that a cold load only blocks callers waiting for that model."""
+    registry = ModelRegistry(max_models=3)
+    registry.get_model('yolov8n.pt')
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get_model('yolov8x.pt')))
+               for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    
+    # Loaded models stay available while yolov8x is loading
+    start = time.perf_counter()
+    registry.get_model('yolov8n.pt')
+    assert time.perf_counter() - start < 0.1
+    
+    for thread in threads:
+        thread.join()
+    assert loads.count('yolov8x.pt') == 1
+    assert all(result is results[0] for result in results)
+
+def test_released_detector_restores_settings(loads):
+    """Test that a pooled detector does not carry one lessee's settings to the next."""
+    registry = ModelRegistry()
+    detector = registry.acquire('yolov8n.pt')
+    detector.tiler = Tiler(tile_size=320)
+    detector.imgsz = 320
+    detector.trajectory_manager.max_points = 5
+    detector.trajectory_manager.fade_steps = 2
+    registry.release(detector)
+    
+    reused = registry.acquire('yolov8n.pt')
+    assert reused is detector
+    assert reused.tiler is None
+    assert reused.imgsz == 640
+    assert reused.trajectory_manager.max_points == 30
+    assert reused.trajectory_manager.fade_steps == 10
+    registry.release(reused)
+
+def test_switch_model_moves_lease(loads):
+    """Test that a switched detector keeps its new model loaded and frees the old one."""
+    registry = ModelRegistry(max_models=1)
+    detector = registry.acquire('yolov8s.pt')
+    registry.switch_model(detector, 'yolov8n.pt')
+    
+    assert detector.model_name == 'yolov8n.pt'
+    assert detector.model.name == 'yolov8n.pt'
+    assert registry.loaded_models() == [('yolov8n.pt', 'fp32')]
+    registry.release(detector)
@@ -0,0 +1,48 @@
+import pytest
+from src.web.progress import ProgressReporter
+
+class FakeTask:
+    """Records the states a task publishes."""
+    def __init__(self):
+        self.states = []
+
+    def update_state(self, state, meta):
+        self.states.append((state, meta))
+
+def test_progress_throttled_by_delta():
+    """Test that updates need a minimum progress change with a known total."""
+    task = FakeTask()
+    reporter = ProgressReporter(task, total_frames=1000, min_interval=0, min_delta=10)
+    for frame in range(1, 1001):
+        reporter.update(frame)
+    
+    # One update per 10 percent, the first at frame 1
+    assert len(task.states) == 10
+    assert task.states[-1][1]['progress'] < 100
+    
+    reporter.update(1000, force=True)
+    assert task.states[-1][1]['progress'] == pytest.approx(100.0)
+    assert task.states[-1][1]['frames_processed'] == 1000
+
+def test_progress_unknown_total():
+    """Test that updates keep flowing when the frame count is unknown."""
+    task = FakeTask()
+    reporter = ProgressReporter(task, total_frames=0, min_interval=0)
+    for frame in range(1, 50):
+        reporter.update(frame, detections=frame % 3)
+    
+    assert len(task.states) == 49
+    meta = task.states[-1][1]
+    assert meta['frames_processed'] == 49
+    assert meta['progress'] == 0.0
+    assert meta['eta'] is None
+
+def test_progress_throttled_by_interval():
+    """Test that updates need a minimum time gap unless forced."""
+    task = FakeTask()
+    reporter = ProgressReporter(task, total_frames=0, min_interval=3600, meta={'task': 'x'})
+    assert reporter.update(1)
+    assert not reporter.update(2)
+    assert reporter.update(3, force=True)
+    assert len(task.states) == 2
+    assert task.states[0][1]['task'] == 'x'
@@ -0,0 +1,80 @@
+from src.utils.segments import TrackIdReconciler, plan_segments, reconcile_track_ids, remap_track_ids
+
+def frame(*tracks):
+    """Per-frame detections dict from (track_id, x) pairs of 10 px boxes."""
+    return {
+        'xyxy': [[x, 0, x + 10, 10] for _, x in tracks],
+        'conf': [0.9] * len(tracks),
+        'cls': [0] * len(tracks),
+        'track_id': [track_id for track_id, _ in tracks],
+        'interpolated': [False] * len(tracks)
+    }
+
+def test_plan_segments_even_split():
+    """Test that segments cover the video contiguously."""
+    assert plan_segments(100, 4) == [(0, 25), (25, 50), (50, 75), (75, 100)]
+    assert plan_segments(0, 4) == [(0, 0)]
+
+def test_plan_segments_snaps_to_keyframes():
+    """Test that boundaries move to the nearest keyframe."""
+    assert plan_segments(100, 2, keyframes=[0, 30, 60, 90]) == [(0, 60), (60, 100)]
+
+def test_plan_segments_respects_min_frames():
+    """Test that snapping never creates segments shorter than min_frames."""
+    # The boundary at 50 snaps to keyframe 95, which would leave 5 frames
+    assert plan_segments(100, 2, keyframes=[0, 95], min_frames=10) == [(0, 100)]
+    
+    segments = plan_segments(100, 4, keyframes=[0, 20, 24, 26, 80], min_frames=20)
+    assert all(end - start >= 20 for start, end in segments)
+    assert segments[0][0] == 0 and segments[-1][1] == 100
+    
+    # Never more segments than min_frames allows
+    assert len(plan_segments(30, 10, min_frames=10)) == 3
+
+def test_reconcile_track_crossing_boundary():
+    """Test that a track seen in a warm-up window keeps its global ID."""
+    first = {'warmup': [], 'frames': [frame((5, 0)), frame((5, 2)), frame((5, 4))]}
+    # The second segment re-tracks the last two frames under a new local ID
+    second = {'warmup': [frame((1, 2)), frame((1, 4))], 'frames': [frame((1, 6))]}
+    
+    mappings = reconcile_track_ids([first, second])
+    assert mappings[0] == {5: 1}
+    assert mappings[1] == {1: 1}
+    assert remap_track_ids(second['frames'][0], mappings[1])['track_id'] == [1]
+
+def test_reconcile_unmatched_track_gets_new_id():
+    """Test that a track without a match in the warm-up gets a fresh ID."""
+    first = {'warmup': [], 'frames': [frame((5, 0))]}
+    second = {'warmup': [frame((1, 0))], 'frames': [frame((1, 2), (2, 200))]}
+    
+    mappings = reconcile_track_ids([first, second])
+    assert mappings[1] == {1: 1, 2: 2}
+
+def test_reconcile_ignores_warmup_only_tracks():
+    """Test that tracks seen only in warm-up frames are never emitted."""
+    first = {'warmup': [], 'frames': [frame((5, 0))]}
+    # Track 3 leaves during the warm-up and never appears in emitted frames
+    second = {'warmup': [frame((1, 0), (3, 100))], 'frames': [frame((1, 2))]}
+    third = {'warmup': [frame((7, 2))], 'frames': [frame((7, 4), (8, 300))]}
+    
+    mappings = reconcile_track_ids([first, second, third])
+    assert 3 not in mappings[1]
+    assert mappings[2] == {7: 1, 8: 2}
+    
+    # Unmapped tracks come out untracked
+    remapped = remap_track_ids(frame((3, 100)), mappings[1])
+    assert remapped['track_id'] == [-1]
+
+def test_reconciler_streams_with_short_tail():
+    """Test that keeping only the overlapping tail gives the same IDs as reconciling in memory."""
+    first = {'warmup': [], 'frames': [frame((5, 0)), frame((6, 100)), frame((5, 2), (6, 102))]}
+    second = {'warmup': [frame((1, 2), (2, 102))], 'frames': [frame((2, 104), (3, 300))]}
+
+    reconciler = TrackIdReconciler(tail=1)
+    remapped = []
+    for segment in (first, second):
+        reconciler.start_segment(segment['warmup'])
+        remapped.extend(reconciler.remap(f) for f in segment['frames'])
+
+    assert [f['track_id'] for f in remapped] == [[1], [2], [1, 2], [2, 3]]
+    assert reconciler.mapping == reconcile_track_ids([first, second])[1]
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from src.detection_and_tracking.detections import Detections
+from src.detection_and_tracking.tiling import Tiler
+
+def covered(regions, shape):
+    """Mask of the frame pixels covered by at least one region."""
+    mask = np.zeros(shape[:2], dtype=bool)
+    for x1, y1, x2, y2 in regions:
+        mask[y1:y2, x1:x2] = True
+    return mask
+
+def test_regions_cover_4k_frame():
+    """Test that the grid covers a 4K frame with full-size, in-bounds tiles."""
+    tiler = Tiler(tile_size=640, overlap=0.2, full_frame=False)
+    shape = (2160, 3840, 3)
+    regions = tiler.regions(shape)
+    
+    assert covered(regions, shape).all()
+    for x1, y1, x2, y2 in regions:
+        assert x2 - x1 == 640 and y2 - y1 == 640
+        assert 0 <= x1 and 0 <= y1 and x2 <= 3840 and y2 <= 2160
+    
+    # The last tile of each row and column ends flush with the frame
+    assert max(x2 for _, _, x2, _ in regions) == 3840
+    assert max(y2 for _, _, _, y2 in regions) == 2160
+
+def test_regions_full_frame_pass():
+    """Test that the whole frame is added once when full_frame is set."""
+    regions = Tiler(tile_size=640).regions((1080, 1920, 3))
+    assert regions.count((0, 0, 1920, 1080)) == 1
+    
+    # A frame smaller than a tile is a single region
+    assert Tiler(tile_size=640).regions((480, 640, 3)) == [(0, 0, 640, 480)]
+
+def test_regions_clip_rois():
+    """Test that ROIs are clipped to the frame and skipped when outside it."""
+    tiler = Tiler(tile_size=640, rois=[[-100, -50, 300, 200], [2000, 2000, 2100, 2100]])
+    assert tiler.regions((1080, 1920, 3)) == [(0, 0, 300, 200)]
+
+def test_invalid_settings():
+    """Test that invalid tiler settings are rejected."""
+    with pytest.raises(ValueError):
+        Tiler(overlap=1.0)
+    with pytest.raises(ValueError):
+        Tiler(rois=[[10, 10, 5, 20]])
+    with pytest.raises(ValueError):
+        Tiler(match_metric='giou')
+
+def test_merge_box_split_across_tiles():
+    """Test that a box cut at a tile border merges with the full box."""
+    tiler = Tiler(tile_size=640, overlap=0.2, match_metric='ios')
+    regions = [(0, 0, 640, 640), (512, 0, 1152, 640)]
+    # The object spans x=600..700: the first tile only sees its left edge
+    left = Detections([[600, 100, 640, 200]], [0.6], [0])
+    right = Detections([[88, 100, 188, 200]], [0.9], [0])
+    
+    merged = tiler.merge([left, right], regions, {0: 'person'})
+    assert len(merged) == 1
+    np.testing.assert_allclose(merged.xyxy[0], [600, 100, 700, 200])
+    assert merged.conf[0] == pytest.approx(0.9)
+
+def test_merge_keeps_different_classes():
+    """Test that overlapping boxes of different classes do not suppress each other."""
+    tiler = Tiler(tile_size=640, match_metric='iou')
+    regions = [(0, 0, 640, 640), (0, 0, 640, 640)]
+    first = Detections([[10, 10, 110, 110]], [0.9], [0])
+    second = Detections([[12, 12, 112, 112]], [0.8], [2])
+    
+    merged = tiler.merge([first, second], regions)
+    assert len(merged) == 2
+    assert sorted(merged.cls.tolist()) == [0, 2]
+    
+    # The same boxes with one class are duplicates
+    second.cls[:] = 0
+    assert len(tiler.merge([first, second], regions)) == 1
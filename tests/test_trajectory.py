@@ -0,0 +1,49 @@
+import numpy as np
+from src.detection_and_tracking.detector import TrajectoryManager
+
+def test_points_wrap_around():
+    """Test that a full ring buffer returns the newest points, oldest first."""
+    manager = TrajectoryManager(max_points=5, max_tracks=4)
+    for i in range(12):
+        manager.update(1, (i, 2 * i))
+    
+    points = manager.points(1)
+    assert points.tolist() == [[i, 2 * i] for i in range(7, 12)]
+    assert len(manager.points(99)) == 0
+
+def test_prune_frees_rows_for_reuse():
+    """Test that pruned tracks give their row to new tracks with empty history."""
+    manager = TrajectoryManager(max_points=5, max_tracks=2)
+    manager.update(1, (1, 1))
+    manager.update(2, (2, 2))
+    manager.prune({2})
+    
+    assert manager.track_ids == [2]
+    manager.update(3, (3, 3))
+    assert manager.points(3).tolist() == [[3, 3]]
+    assert manager.points(2).tolist() == [[2, 2]]
+    assert manager._points.shape[0] == 2
+
+def test_grows_past_max_tracks():
+    """Test that the buffer doubles when more tracks than max_tracks are active."""
+    manager = TrajectoryManager(max_points=3, max_tracks=2)
+    track_ids = np.arange(10, 15)
+    for step in range(4):
+        manager.update_many(track_ids, np.stack([track_ids, np.full(5, step)], axis=1))
+    
+    assert manager._points.shape[0] == 8
+    assert sorted(manager.track_ids) == track_ids.tolist()
+    for track_id in track_ids:
+        assert manager.points(int(track_id)).tolist() == [[track_id, 1], [track_id, 2], [track_id, 3]]
+
+def test_max_points_setter_clears_state():
+    """Test that resizing the trajectories drops existing history."""
+    manager = TrajectoryManager(max_points=5)
+    manager.update(1, (1, 1))
+    manager.max_points = 10
+    
+    assert manager.max_points == 10
+    assert manager.track_ids == []
+    assert len(manager.points(1)) == 0
+    manager.update(1, (2, 2))
+    assert manager.points(1).tolist() == [[2, 2]]